@@ -0,0 +1,196 @@
+""" api.py
+
+Python API to explore must-gathers from scripts and notebooks e.g:
+
+    from omg.api import MustGather
+
+    mg = MustGather("/path/to/must-gather")
+    for pod in mg.resources("pods", namespace="openshift-etcd"):
+        print(pod["metadata"]["name"], pod["status"]["phase"])
+
+    for line in mg.logs("etcd-master-0", "etcd", namespace="openshift-etcd", tail=10):
+        print(line)
+
+Resources are loaded on first access per (type, namespace, filters) and
+kept in memory (up to max_cached result sets, least recently used are
+dropped). They are served from the persistent parse cache and item
+indexes, as for the omg commands. release() and close() (or using
+MustGather as a context manager) drop what is kept in memory.
+
+The logs of omg (loguru) are disabled, unless omg logging has been set up
+already. Enable them with `logger.enable("omg")`, e.g to see warnings
+about broken yaml files.
+"""
+
+import os
+import copy
+from loguru import logger as lg
+from omg.config import logging
+from omg.utils import vfs
+from omg.utils.lru import LRU
+from omg.utils.selector import parse_selector, parse_field_selector
+from omg.must_gather.scan_mg import scan_mg
+from omg.must_gather.load_resources import load_res
+from omg.log.stream import log_window
+
+__all__ = ["MustGather"]
+
+
+class MustGather:
+    """A must-gather (or a directory/archive with several of them)
+
+    Args:
+        path (str): Path of the must-gather directory or archive
+        max_cached (int): Maximum number of loaded result sets kept in memory
+
+    Raises:
+        NoValidMgFound: If no must-gather is found in path
+    """
+
+    def __init__(self, path, max_cached=32):
+        if logging.current_loglevel is None:
+            # Default loguru sink would print the debug logs of omg,
+            # the sinks of the application are left alone
+            lg.disable("omg")
+        self.paths = scan_mg((path,))
+        self._cache = LRU(max_cached)
+
+    def __repr__(self):
+        return "MustGather({})".format(", ".join(self.paths))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _load(self, key):
+        """Loaded resources of a key (loaded on first access)"""
+        res = self._cache.get(key)
+        if res is None:
+            r_type, namespace, names, selector, field_selector = key
+            reqs = parse_selector(selector) if selector else None
+            f_reqs = parse_field_selector(field_selector) if field_selector else None
+            res = []
+            for path in self.paths:
+                res.extend(
+                    r["res"] for r in load_res(
+                        path, r_type, list(names) if names else None, namespace or "_all",
+                        selector=reqs, field_selector=f_reqs)
+                )
+            self._cache.put(key, res)
+        return res
+
+    def resources(self, r_type, namespace=None, names=None, selector=None,
+                  field_selector=None):
+        """Resources of a type
+
+        Nothing is loaded until the returned iterator is first advanced.
+        The resources are copies, modifying them doesn't affect later results.
+
+        Args:
+            r_type (str): Resource type e.g, pods, node, clusteroperators.config.openshift.io
+            namespace (str, optional): Namespace, all namespaces if not set.
+                                       Ignored for cluster scoped types.
+            names (list[str], optional): Only the resources with these names
+            selector (str, optional): Label selector e.g, "app=etcd"
+            field_selector (str, optional): Field selector e.g, "status.phase!=Running"
+
+        Returns:
+            iterator: Resources (dicts, as in the yaml files)
+
+        Raises:
+            UnkownResourceType: If r_type is not known
+            ValueError: If a selector is not valid
+        """
+        key = (
+            r_type.lower(), namespace, tuple(names) if names else None,
+            selector, field_selector
+        )
+        for res in self._load(key):
+            yield copy.deepcopy(res)
+
+    def _log_file(self, pod, container, namespace, previous):
+        """Path of the log file of a container"""
+        pod_dirs = []
+        for path in self.paths:
+            nss = [namespace] if namespace else (
+                vfs.listdir(os.path.join(path, "namespaces"))
+                if vfs.isdir(os.path.join(path, "namespaces")) else []
+            )
+            for ns in nss:
+                pod_dir = os.path.join(path, "namespaces", ns, "pods", pod)
+                if vfs.isdir(pod_dir):
+                    pod_dirs.append(pod_dir)
+        if not pod_dirs:
+            raise FileNotFoundError("Pod directory of {} not found".format(pod))
+        if len(pod_dirs) > 1 and not namespace:
+            raise ValueError("Pod {} found in more than one namespace, "
+                             "namespace is required".format(pod))
+
+        pod_dir = pod_dirs[0]
+        containers = sorted(
+            c for c in vfs.listdir(pod_dir) if vfs.isdir(os.path.join(pod_dir, c)))
+        if container is None:
+            if len(containers) != 1:
+                raise ValueError("Pod {} has containers {}, container is required".format(
+                    pod, containers))
+            container = containers[0]
+        elif container not in containers:
+            raise FileNotFoundError("Container {} not found in pod {}".format(container, pod))
+
+        log = "previous.log" if previous else "current.log"
+        logfile = os.path.join(pod_dir, container, container, "logs", log)
+        if not vfs.isfile(logfile):
+            raise FileNotFoundError("Log file not found: {}".format(logfile))
+        return logfile
+
+    def logs(self, pod, container=None, namespace=None, previous=False, tail=None,
+             since=None):
+        """Lines of the log of a container
+
+        The log is streamed, it is never loaded in memory as a whole.
+
+        Args:
+            pod (str): Pod name
+            container (str, optional): Container name, required if the pod has more than one
+            namespace (str, optional): Namespace, required if the pod name is not unique
+            previous (bool): Log of the previous container instance
+            tail (int, optional): Only the last `tail` lines
+            since (datetime or timedelta, optional): Only lines since this time (see
+                                                     omg.log.stream.log_window)
+
+        Returns:
+            iterator: Log lines (str, without the trailing new line)
+
+        Raises:
+            FileNotFoundError: If the pod, container or log file is not found
+            ValueError: If the container or namespace is required
+        """
+        logfile = self._log_file(pod, container, namespace, previous)
+        start, end = log_window(logfile, tail, since)
+        with vfs.open(logfile, "rb") as l_f:
+            l_f.seek(start)
+            pos = start
+            while pos < end:
+                line = l_f.readline(end - pos)
+                if not line:
+                    break
+                pos += len(line)
+                yield line.rstrip(b"\n").decode("utf-8", errors="replace")
+
+    def release(self, r_type=None, namespace=None):
+        """Drop loaded resources from memory
+
+        Args:
+            r_type (str, optional): Only the resources of this type
+            namespace (str, optional): Only the resources of this namespace
+        """
+        for key in self._cache.keys():
+            if (r_type is None or key[0] == r_type.lower()) and (
+                    namespace is None or key[1] == namespace):
+                self._cache.pop(key)
+
+    def close(self):
+        """Drop everything that is kept in memory"""
+        self._cache.clear()
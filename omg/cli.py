@@ -1,21 +1,68 @@
+""" cli.py
+
+omg command line interface.
+
+Implementations of the subcommands (and their shell completions) are only
+imported when a subcommand is invoked. Importing all of them upfront pulls in
+yaml, tabulate, dateutil, cryptography and the resource definitions, which
+slows down every omg invocation, including `omg version` and every shell
+completion request (see tests/test_cli_startup.py).
+"""
+
+import sys
 import click
-import os
-import subprocess
+from importlib import import_module
 
 from omg import version
-from omg.config import logging, config
-from omg.use import use
-from omg.project import project, projects
-from omg.project.complete import complete_projects
-from omg.get import get
-from omg.get.complete import complete_get
-from omg.log.complete import complete_pods, complete_containers
-from omg.log import log
-from omg.whoami import whoami
-from omg.components.ceph import ceph
-from omg.components.etcdctl import etcdctl
-from omg.machine_config.compare import mc_compare
-from omg.machine_config.extract import mc_extract
+
+
+def _lazy(target):
+    """Shell completion callback that imports target ("module:function") when called"""
+    def callback(ctx, args, incomplete):
+        module, func = target.split(":")
+        return getattr(import_module(module), func)(ctx, args, incomplete)
+    return callback
+
+
+def _configure(loglevel=None, path=None, namespace=None, all_namespaces=None, jobs=None):
+    """Set up logging and config for the invoked subcommand (only for the options passed)"""
+    from omg.config import logging, config
+    if loglevel:
+        logging.setup_logging(loglevel)
+    if path:
+        config.filtered_path = path
+    if namespace:
+        config.namespace = namespace
+    if all_namespaces:
+        config.all_namespaces = all_namespaces
+    if jobs is not None:
+        config.jobs = jobs
+
+
+class _DefaultGroup(click.Group):
+    """Click group that falls back to a default subcommand
+
+    i.e, `omg logs <pod>` is the same as `omg logs pod <pod>`,
+    while `omg logs grep ...` still runs the grep subcommand.
+    """
+
+    def __init__(self, *args, default=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.default = default
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ctx.help_option_names:
+            args = [self.default] + list(args)
+        return super().parse_args(ctx, args)
+
+    def shell_complete(self, ctx, incomplete):
+        # Suggest the arguments of the default subcommand as well
+        completions = super().shell_complete(ctx, incomplete)
+        for param in self.commands[self.default].params:
+            if isinstance(param, click.Argument):
+                completions.extend(param.shell_complete(ctx, incomplete))
+                break
+        return completions
 
 
 # Common Options used by multiple subcommands
@@ -25,12 +72,19 @@ o_filtered_path = click.option(
 o_log_level = click.option(
     "-l", "--loglevel", type=click.Choice(["normal", "info", "debug", "trace"]))
 
+o_log_level_long = click.option(
+    "--loglevel", type=click.Choice(["normal", "info", "debug", "trace"]))
+
 o_namespace = click.option(
-    "--namespace", "-n", required=False, shell_complete=complete_projects)
+    "--namespace", "-n", required=False,
+    shell_complete=_lazy("omg.project.complete:complete_projects"))
 
 o_all_namespaces = click.option(
     "--all-namespaces", "-A", required=False, is_flag=True)
 
+o_jobs = click.option(
+    "--jobs", "-j", type=int, help="Parallel yaml parsing processes (0: one per cpu)")
+
 
 # Main click group
 @click.group()
@@ -38,48 +92,54 @@ o_all_namespaces = click.option(
 @o_filtered_path
 @o_namespace
 @o_all_namespaces
-def cli(loglevel, path, namespace, all_namespaces):
+@o_jobs
+@click.option("--profile", is_flag=True,
+              help="Print the time spent in each stage on stderr (or set OMG_PROFILE=1)")
+@click.option("--profile-format", type=click.Choice(["text", "json"]),
+              help="Format of the --profile summary (OMG_PROFILE=json for json)")
+@click.option("--profile-output", type=click.Path(dir_okay=False),
+              help="Also write a Chrome trace (*.json) or cProfile stats file")
+def cli(loglevel, path, namespace, all_namespaces, jobs, profile, profile_format,
+        profile_output):
+    from omg.config import logging
     logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
-    if namespace:
-        config.namespace = namespace
-    if all_namespaces:
-        config.all_namespaces = all_namespaces
+    _configure(path=path, namespace=namespace, all_namespaces=all_namespaces, jobs=jobs)
+    from omg.utils import profile as prof
+    if prof.requested(profile, profile_format, profile_output):
+        prof.start(profile_format, profile_output)
+        click.get_current_context().call_on_close(prof.report)
 
 
 # omg *use*
 @cli.command("use")
 @click.argument("mg_paths", nargs=-1, required=False, type=click.Path(
-                    exists=True, file_okay=False, resolve_path=True, allow_dash=False))
+                    exists=True, resolve_path=True, allow_dash=False))
 @click.option("--cwd", is_flag=True)
 @o_log_level
 @o_filtered_path
 def use_cmd(mg_paths, cwd, loglevel, path):
     """
     Select one or more must-gather(s) to use
+
+    Must-gathers can also be used directly from .tar, .tar.gz, .tgz and .zip archives
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.use import use
     use.cmd(mg_paths, cwd)
 
 
 # omg *project*
 @cli.command("project")
 @click.argument("name", required=False,
-                shell_complete=complete_projects)
+                shell_complete=_lazy("omg.project.complete:complete_projects"))
 @o_log_level
 @o_filtered_path
 def project_cmd(name, loglevel, path):
     """
     Switch to another project
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.project import project
     project.cmd(name)
 
 
@@ -91,56 +151,161 @@ def projects_cmd(path, loglevel):
     """
     Display existing projects
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.project import projects
     projects.cmd()
 
 
 # omg *get*
 @cli.command("get")
-@click.argument("objects", nargs=-1, shell_complete=complete_get)
-@click.option("--output", "-o", type=click.Choice(["yaml", "json", "wide", "name"]))
+@click.argument("objects", nargs=-1, shell_complete=_lazy("omg.get.complete:complete_get"))
+@click.option("--output", "-o", type=click.Choice(
+    ["yaml", "json", "ndjson", "jsonl", "wide", "name"]))
 @click.option("--show-labels", is_flag=True, type=bool)
-@o_log_level
+@click.option("--selector", "-l", help="Label selector to filter on e.g, app=etcd,tier!=db")
+@click.option("--field-selector", help="Field selector to filter on e.g, status.phase!=Running")
+@o_log_level_long
 @o_namespace
 @o_all_namespaces
 @o_filtered_path
-def get_cmd(objects, output, show_labels, loglevel, namespace, all_namespaces, path):
+@o_jobs
+def get_cmd(objects, output, show_labels, selector, field_selector, loglevel, namespace,
+            all_namespaces, path, jobs):
     """
     Display one or many resources
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
-    if namespace:
-        config.namespace = namespace
-    if all_namespaces:
-        config.all_namespaces = all_namespaces
-    get.cmd(objects, output, show_labels)
+    _configure(loglevel, path=path, namespace=namespace, all_namespaces=all_namespaces, jobs=jobs)
+    from omg.get import get
+    get.cmd(objects, output, show_labels, selector, field_selector)
+
+
+# Click group for logs
+@cli.group("logs", cls=_DefaultGroup, default="pod")
+def logs_grp():
+    """
+    Print or search the logs of containers
+
+    \b
+    omg logs <pod> [-c <container>]  Print the logs of a container in a pod
+    omg logs grep <pattern>          Search the logs of many pods at once
+    """
+    pass
 
 
-# omg *log*
-@cli.command("logs")
-@click.argument("resource", shell_complete=complete_pods)
-@click.option("--container", "-c", shell_complete=complete_containers)
+# omg logs *pod* (default)
+@logs_grp.command("pod")
+@click.argument("resource", shell_complete=_lazy("omg.log.complete:complete_pods"))
+@click.option("--container", "-c", shell_complete=_lazy("omg.log.complete:complete_containers"))
 @click.option("--previous", "-p", is_flag=True)
+@click.option("--tail", type=int, default=-1,
+              help="Lines of recent log file to display (-1: all lines)")
+@click.option("--since", help="Only return logs newer than a relative duration like 5s, 2m, "
+              "or 3h (relative to when the logs were collected)")
+@click.option("--since-time", help="Only return logs after a specific date (RFC3339)")
+@click.option("--limit-bytes", type=int, help="Maximum bytes of logs to return")
 @o_log_level
 @o_filtered_path
 @o_namespace
-def logs_cmd(resource, container, previous, namespace, loglevel, path):
+def logs_cmd(resource, container, previous, tail, since, since_time, limit_bytes,
+             namespace, loglevel, path):
     """
-    Print the logs for a container in a pod
+    Print the logs for a container in a pod (default)
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
-    if namespace:
-        config.namespace = namespace
-    log.cmd(resource, container, previous)
+    _configure(loglevel, path=path, namespace=namespace)
+    from omg.log import log
+    log.cmd(resource, container, previous,
+            tail=tail, since=since, since_time=since_time, limit_bytes=limit_bytes)
+
+
+# omg logs *grep*
+@logs_grp.command("grep")
+@click.argument("pattern")
+@click.option("--selector", "-l", help="Label selector to filter pods e.g, app=etcd")
+@click.option("--ignore-case", "-i", is_flag=True)
+@o_log_level_long
+@o_filtered_path
+@o_namespace
+@o_all_namespaces
+@o_jobs
+def logs_grep_cmd(pattern, selector, ignore_case, loglevel, path, namespace, all_namespaces,
+                  jobs):
+    """
+    Search (regex) the current and previous logs of all containers in a namespace
+    """
+    _configure(loglevel, path=path, namespace=namespace, all_namespaces=all_namespaces,
+               jobs=jobs)
+    from omg.log import grep
+    grep.cmd(pattern, selector, ignore_case)
+
+
+# omg *events*
+@cli.command("events")
+@click.option("--timeline", is_flag=True,
+              help="Events of all namespaces (unless -n is set) in chronological order")
+@click.option("--since", help="Only events since this time, or duration before collection e.g, 1h")
+@click.option("--until", help="Only events until this time, or duration before collection")
+@o_log_level
+@o_namespace
+@o_all_namespaces
+@o_filtered_path
+@o_jobs
+def events_cmd(timeline, since, until, loglevel, namespace, all_namespaces, path, jobs):
+    """
+    Display events
+    """
+    if timeline and not namespace:
+        all_namespaces = True
+    _configure(loglevel, path=path, namespace=namespace, all_namespaces=all_namespaces, jobs=jobs)
+    if timeline or since or until:
+        from omg.events import timeline as events_timeline
+        events_timeline.cmd(since, until)
+    else:
+        from omg.get import get
+        get.cmd(("events",), None, False)
+
+
+# omg *serve*
+@cli.command("serve")
+@click.option("--socket", "socket_path", help="Unix socket to listen on (default: $OMG_SOCKET "
+              "or $XDG_RUNTIME_DIR/omg-<uid>.sock)")
+@click.option("--cache-size", type=int, default=128,
+              help="Loaded resource lists to keep in memory")
+@click.option("--stop", is_flag=True, help="Stop the running daemon")
+@o_log_level
+def serve_cmd(socket_path, cache_size, stop, loglevel):
+    """
+    Run a daemon that keeps loaded must-gather data in memory
+
+    \b
+    While it runs, get, logs, projects, project, events and shell
+    completions are run by the daemon (set OMG_NO_SERVE=1 to bypass it).
+    """
+    _configure(loglevel)
+    if stop:
+        from omg.serve import client
+        if not client.stop():
+            click.echo("omg serve is not running", err=True)
+            sys.exit(1)
+        return
+    from omg.serve import server
+    server.serve(socket_path, cache_size)
+
+
+# omg *shell*
+@cli.command("shell")
+@click.option("--cache-size", type=int, default=32,
+              help="Loaded resource lists to keep in memory (LRU)")
+@o_log_level
+def shell_cmd(cache_size, loglevel):
+    """
+    Interactive shell that keeps loaded must-gather data in memory
+
+    \b
+    Commands are the same as omg subcommands e.g, `get pods -A`
+    """
+    _configure(loglevel)
+    from omg.shell import shell
+    shell.cmd(cache_size)
 
 
 # omg *whoami*
@@ -149,6 +314,7 @@ def whoami_cmd():
     """
     Tell you who you are
     """
+    from omg.whoami import whoami
     whoami.cmd()
 
 
@@ -169,6 +335,8 @@ def completion(shell):
     """
     Output shell completion code for the specified shell (bash or zsh)
     """
+    import os
+    import subprocess
     newenv = os.environ.copy()
     newenv["_OMG_COMPLETE"] = "{}_source".format(shell)
     subprocess.run("omg", env=newenv)
@@ -181,10 +349,8 @@ def completion(shell):
 @o_log_level
 @o_filtered_path
 def ceph_cmd(ceph_args, output, loglevel, path):
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.components.ceph import ceph
     ceph.cmd(ceph_args, output, com="ceph")
 
 
@@ -194,10 +360,8 @@ def ceph_cmd(ceph_args, output, loglevel, path):
 @o_log_level
 @o_filtered_path
 def rados_cmd(ceph_args, loglevel, path):
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.components.ceph import ceph
     ceph.cmd(ceph_args, None, com="rados")
 
 
@@ -207,10 +371,8 @@ def rados_cmd(ceph_args, loglevel, path):
 @o_log_level
 @o_filtered_path
 def rbd_cmd(ceph_args, loglevel, path):
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.components.ceph import ceph
     ceph.cmd(ceph_args, None, com="rbd")
 
 
@@ -221,10 +383,8 @@ def rbd_cmd(ceph_args, loglevel, path):
 @o_log_level
 @o_filtered_path
 def etcdctl_cmd(etcdctl_args, output, loglevel, path):
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.components.etcdctl import etcdctl
     etcdctl.cmd(etcdctl_args, output)
 
 
@@ -246,10 +406,8 @@ def extract_mc_cmd(mc_names, loglevel, path):
     """
     Extract Machine Configs
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.machine_config.extract import mc_extract
     mc_extract(mc_names)
 
 
@@ -263,8 +421,43 @@ def compare_mc_cmd(mc_names, show_contents, loglevel, path):
     """
     Compare Machine Configs
     """
-    if loglevel:
-        logging.setup_logging(loglevel)
-    if path:
-        config.filtered_path = path
+    _configure(loglevel, path=path)
+    from omg.machine_config.compare import mc_compare
     mc_compare(mc_names, show_contents)
+
+
+def run(argv):
+    """Run an omg command in this process (used by omg serve and omg shell)
+
+    Options set by a previous command (e.g, -n) are reset first.
+
+    Args:
+        argv (list[str]): omg arguments e.g, ["get", "pods", "-A"]
+
+    Returns:
+        int: Exit code of the command
+    """
+    from omg.config import config
+    config.reset_options()
+    try:
+        cli.main(args=argv, prog_name="omg")
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        click.echo(e.code, err=True)
+        return 1
+    return 0
+
+
+def main():
+    """omg entry point
+
+    Commands are forwarded to the omg serve daemon if it is running
+    (see omg.serve), otherwise they are run directly.
+    """
+    from omg.serve import client
+    rc = client.forward(sys.argv[1:])
+    if rc is None:
+        cli()
+    else:
+        sys.exit(rc)
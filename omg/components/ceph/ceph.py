@@ -2,6 +2,7 @@ import os
 from loguru import logger as lg
 
 from omg.config import config
+from omg.utils import vfs
 
 
 def cmd(ceph_args, output, com):
@@ -27,14 +28,14 @@ def cmd(ceph_args, output, com):
     i = 1
     for p in mg_paths:
         ceph_cmd_path = os.path.join(p, ceph_file)
-        if os.path.isfile(ceph_cmd_path):
+        if vfs.isfile(ceph_cmd_path):
             lg.info("Command output file found: {}".format(ceph_cmd_path))
             ceph_cmd_paths[i] = ceph_cmd_path
         i += 1
 
     if ceph_cmd_paths:
         for i, cp in ceph_cmd_paths.items():
-            with open(cp, "r") as lf:
+            with vfs.open(cp, "r") as lf:
                 print(lf.read())
             if len(mg_paths) > 1:
                 lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
@@ -43,7 +44,7 @@ def cmd(ceph_args, output, com):
         i = 1
         for p in mg_paths:
             try:
-                files = os.listdir(os.path.join(p, "ceph", "must_gather_commands"))
+                files = vfs.listdir(os.path.join(p, "ceph", "must_gather_commands"))
                 file_match = "{}_{}".format(com, "_".join(ceph_args))
                 sugg = []
                 sugg.extend([
@@ -2,6 +2,7 @@ import os
 from importlib import import_module
 from loguru import logger as lg
 from omg.utils.load_json import load_json
+from omg.utils import vfs
 
 from omg.config import config
 
@@ -23,7 +24,7 @@ def cmd(etcdctl_args, output):
     i = 1
     for p in mg_paths:
         ceph_cmd_path = os.path.join(p, etcd_file)
-        if os.path.isfile(ceph_cmd_path):
+        if vfs.isfile(ceph_cmd_path):
             lg.info("Command output file found: {}".format(ceph_cmd_path))
             etcd_cmd_paths[i] = ceph_cmd_path
         i += 1
@@ -37,7 +38,7 @@ def cmd(etcdctl_args, output):
             except Exception as e:
                 lg.warning("Error generating output for {}: {}".format(command, e))
                 lg.success("\nHere is the raw file ({}):".format(cp))
-                with open(cp, "r") as cf:
+                with vfs.open(cp, "r") as cf:
                     print(cf.read())
             if len(mg_paths) > 1:
                 lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
@@ -46,7 +47,7 @@ def cmd(etcdctl_args, output):
         i = 1
         for p in mg_paths:
             try:
-                files = os.listdir(os.path.join(p, "etcd_info"))
+                files = vfs.listdir(os.path.join(p, "etcd_info"))
                 file_match = "_".join(etcdctl_args)
                 sugg = []
                 sugg.extend([
@@ -1,9 +1,11 @@
 """ config.py """
 
 import yaml
-from os import path, getenv
+from os import path, getenv, stat
 from loguru import logger as lg
+from omg.utils import cache
 from omg.utils.dget import dget
+from omg.utils.profile import timed
 from omg.must_gather.scan_mg import scan_mg, NoValidMgFound
 
 _default_cfile = path.join(getenv("HOME") or "", ".omgconfig")
@@ -17,6 +19,16 @@ namespace = None
 # -A, --all-namespaces
 all_namespaces = False
 
+# -j, --jobs
+jobs = None
+
+# Config loaded in this process {cfile: (cfile stamp, config)}
+# Dropped by invalidate(), which is called when config is saved
+_loaded = {}
+
+# CWD mode scan results in this process {(cwd, cwd mtime): paths}
+_cwd_scans = {}
+
 
 class NoMgSelected(Exception):
     """
@@ -86,9 +98,61 @@ def _dump_config(config, cfile):
         raise SystemExit(1)
 
 
+def reset_options():
+    """Reset the command line options (-P, -n, -A, -j) to their defaults
+
+    Used by long running processes (omg serve, omg shell), that run
+    many commands in the same process.
+    """
+    global filtered_path, namespace, all_namespaces, jobs
+    filtered_path = 0
+    namespace = None
+    all_namespaces = False
+    jobs = None
+
+
+def invalidate():
+    """Drop the config loaded (and cached) in this process"""
+    _loaded.clear()
+    _cwd_scans.clear()
+
+
+def _cfile_stamp(cfile):
+    try:
+        st = stat(cfile)
+        return (st.st_size, st.st_mtime_ns)
+    except OSError:
+        return None
+
+
+def _scan_cwd():
+    """Scan the current directory for must-gathers (CWD Mode)
+
+    The result is cached (in process and on disk) keyed by the
+    current directory and its mtime, so the directory is not walked
+    again and again.
+
+    Returns:
+        list: List of valid (absolute) must-gather/inspect directories
+    """
+    cwd = path.abspath(".")
+    stamp = stat(cwd).st_mtime_ns
+    if (cwd, stamp) not in _cwd_scans:
+        v_mgs = cache.load("cwd_scan", cwd, stamp)
+        if v_mgs is cache.MISS:
+            v_mgs = scan_mg(["."])
+            cache.dump("cwd_scan", cwd, stamp, v_mgs)
+        _cwd_scans[(cwd, stamp)] = v_mgs
+    return list(_cwd_scans[(cwd, stamp)])
+
+
+@timed("config")
 def get(cfile=None):
     """Get config from file.
 
+    The config file is loaded once per process (unless it changes on disk),
+    later calls are served from memory.
+
     Args:
         cfile (str, optional): Config file. Defaults to None.
 
@@ -105,15 +169,21 @@ def get(cfile=None):
         else:
             cfile = _default_cfile
 
-    try:
-        config = _load_config(cfile)
-    except NoMgSelected as e:
-        lg.error(e)
-        raise SystemExit(1)
+    stamp = _cfile_stamp(cfile)
+    if cfile not in _loaded or _loaded[cfile][0] != stamp:
+        try:
+            _loaded[cfile] = (stamp, _load_config(cfile))
+        except NoMgSelected as e:
+            lg.error(e)
+            raise SystemExit(1)
+
+    # Callers are free to modify the returned config
+    config = dict(_loaded[cfile][1])
+    config["paths"] = list(config["paths"])
 
     if config["paths"] == ["."]:
         try:
-            v_mgs = scan_mg(["."])
+            v_mgs = _scan_cwd()
             config["paths"] = v_mgs
             config["cwd"] = True
         except NoValidMgFound as e:
@@ -162,3 +232,4 @@ def save(paths=None, project=None, cfile=None):
 
     _dump_config(
         {"paths": save_paths, "project": save_project}, cfile)
+    invalidate()
@@ -39,8 +39,13 @@ _success_fmt = (
     "<bold>{message}</bold>"
 )
 
+# loglevel set by the last setup_logging call
+# (used to setup logging in worker processes)
+current_loglevel = None
+
 
 def setup_logging(loglevel):
+    global current_loglevel
 
     # If loglevel is not set, we check the env['OMG_LOG_LEVEL']
     # else we set it to default "normal"
@@ -67,6 +72,10 @@ def setup_logging(loglevel):
     else:
         raise ValueError('Invalid loglevel: ' + str(loglevel))
 
+    current_loglevel = loglevel
+
+    # Disabled by omg.api.MustGather if logging was not set up
+    logger.enable("omg")
     logger.remove()
 
     # debug or trace uses _debug_fmt format
@@ -0,0 +1,224 @@
+""" timeline.py
+
+omg events --timeline: Events of all namespaces in chronological order.
+
+The events.yaml of every namespace is loaded and sorted on its own
+(in worker processes, see omg.utils.pool). Workers only send back the
+times and item index positions of the sorted events, and the widths of
+their table cells. The events are then loaded again lazily, a chunk at a
+time per namespace (see item_index.load_items), and merged with a k-way
+merge (heapq.merge) in global time order. Rows are written as they come
+out of the merge, so at most a chunk of events per namespace is in memory.
+(Yamls without an item index, e.g. truncated or with the cache disabled,
+are kept in memory as a whole.)
+
+Events are ordered by lastTimestamp, falling back to eventTime,
+firstTimestamp and creationTimestamp (for events without lastTimestamp).
+"""
+
+import os
+import heapq
+from datetime import datetime
+from loguru import logger as lg
+from omg.config import config
+from omg.utils.dget import dget
+from omg.utils.age import to_datetime
+from omg.utils.vfs import getmtime
+from omg.utils.pool import map_ordered
+from omg.log.stream import parse_duration
+from omg.must_gather.locate_yamls import locate_yamls
+from omg.must_gather import item_index
+from omg.must_gather.load_resources import load_res_from_yaml
+from omg.must_gather.exceptions import InvalidResource
+from omg.get.output.build_table import get_columns, build_row
+from omg.get.output.plain_table import PlainTable
+
+# Events without any timestamp are sorted first
+_NO_TIME = datetime.min
+
+# Events loaded at a time from a yaml, while merging
+CHUNK = 256
+
+
+def event_time(res):
+    """Time of an event (see module docstring)
+
+    Args:
+        res (dict): Event resource
+
+    Returns:
+        datetime: Time of the event (naive, utc)
+    """
+    ts = (
+        res.get("lastTimestamp")
+        or res.get("eventTime")
+        or res.get("firstTimestamp")
+        or dget(res, ["metadata", "creationTimestamp"])
+    )
+    if not ts:
+        return _NO_TIME
+    try:
+        return to_datetime(ts)
+    except (ValueError, OverflowError):
+        return _NO_TIME
+
+
+def _sorted_events(args):
+    """Load and sort the events of a single yaml file (runs in worker processes)
+
+    Args:
+        args (tuple): (yfile, rdef, since, until, ns_col)
+
+    Returns:
+        tuple: (events, indexed, table)
+               events: [(time, item index position), ...] sorted by time if indexed,
+                       otherwise [(time, resource), ...]
+               table: PlainTable with the cell widths of the events (no rows)
+    """
+    yfile, rdef, since, until, ns_col = args
+    table = PlainTable()
+    try:
+        res = load_res_from_yaml(yfile, rdef)
+    except InvalidResource as e:
+        lg.warning(e)
+        return [], False, table
+    events = [(event_time(r["res"]), i, r) for i, r in enumerate(res)]
+    events = [
+        e for e in events
+        if (since is None or e[0] >= since) and (until is None or e[0] <= until)
+    ]
+    events.sort(key=lambda e: e[0])
+
+    _, head_f = get_columns("Event", ns_col, False, False, False)
+    table.add_rows((build_row(r, head_f) for _, _, r in events), keep=False)
+
+    index = item_index.get_index(yfile)
+    if index is not None and len(index) == len(res):
+        return [(t, i) for t, i, _ in events], True, table
+    return [(t, r) for t, _, r in events], False, table
+
+
+def _load_events(yfile, rdef, events):
+    """Sorted events of a yaml, loaded a chunk at a time using the item index
+
+    Args:
+        yfile (str): Yaml file
+        rdef (dict): Resource definition of events
+        events (list[tuple]): [(time, item index position), ...] see _sorted_events
+
+    Yields:
+        tuple: (time, resource)
+    """
+    index = item_index.get_index(yfile)
+    yfile_ts = getmtime(yfile)
+    for c in range(0, len(events), CHUNK):
+        chunk = events[c:c + CHUNK]
+        items = item_index.load_items(yfile, [index[pos] for _, pos in chunk])
+        for (t, _), item in zip(chunk, items):
+            yield t, {"res": item, "yfile_ts": yfile_ts, "yfile": yfile, "rdef": rdef}
+
+
+def _parse_time(value, collected):
+    """Parse --since/--until
+
+    Args:
+        value (str): Duration (before the must-gather was collected) or timestamp
+        collected (datetime): Time the must-gather was collected
+
+    Returns:
+        datetime: Parsed time
+    """
+    try:
+        return collected - parse_duration(value)
+    except ValueError:
+        return to_datetime(value)
+
+
+def _timeline(path, ns, since, until, ns_col):
+    """Events in chronological order and a table measured for them (see timeline)
+
+    Returns:
+        tuple: (iterator of events, PlainTable)
+    """
+    table = PlainTable()
+    rdef, yamls = locate_yamls(path, "events", ns=ns)
+    yamls = [y for y in yamls if type(y) is not dict]
+    if not yamls:
+        return iter([]), table
+
+    collected = to_datetime(max(getmtime(y) for y in yamls), "epoch")
+    since = _parse_time(since, collected) if since else None
+    until = _parse_time(until, collected) if until else None
+    lg.debug("Timeline of {} event yamls, since: {}, until: {}".format(len(yamls), since, until))
+
+    sorted_events = map_ordered(
+        _sorted_events, [(y, rdef, since, until, ns_col) for y in yamls])
+    per_ns = []
+    for y, (events, indexed, y_table) in zip(yamls, sorted_events):
+        table.merge(y_table)
+        if events:
+            per_ns.append(_load_events(y, rdef, events) if indexed else events)
+    merged = (r for _, r in heapq.merge(*per_ns, key=lambda e: e[0]))
+    return merged, table
+
+
+def timeline(path, ns, since=None, until=None):
+    """Events of a must-gather path in chronological order
+
+    Args:
+        path (str): Must-gather path
+        ns (str): Namespace, or _all for all namespaces
+        since (str, optional): Only events at or after this time (or duration ago)
+        until (str, optional): Only events at or before this time (or duration ago)
+
+    Returns:
+        iterator: Event resources (as loaded by load_res_from_yaml) in time order
+    """
+    return _timeline(path, ns, since, until, ns == "_all")[0]
+
+
+def cmd(since=None, until=None):
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    cfg = config.get()
+    paths = dget(cfg, ["paths"])
+    ns = dget(cfg, ["project"])
+
+    if not paths:
+        lg.error("No must-gather selected")
+        raise SystemExit(1)
+    if ns is None:
+        lg.error("No namespace/project selected")
+        raise SystemExit(1)
+
+    # Events are sorted in parallel, use all cpus unless -j/OMG_JOBS says otherwise
+    if config.jobs is None and not os.getenv("OMG_JOBS"):
+        config.jobs = 0
+
+    header, head_f = get_columns("Event", ns == "_all", False, False, False)
+
+    for i, path in enumerate(paths, 1):
+        try:
+            events, table = _timeline(path, ns, since, until, ns == "_all")
+        except ValueError as e:
+            lg.error("Invalid --since/--until: {}".format(e))
+            raise SystemExit(1)
+
+        rows = (build_row(r, head_f) for r in events)
+        first = next(rows, None)
+        if first is None:
+            print("No events found")
+        elif table.fallback:
+            # Cells that need tabulate, the whole table is rendered at once
+            table.add_rows([header, first])
+            table.add_rows(rows)
+            table.write()
+        else:
+            # Column widths are known, rows are written as they are merged
+            table.add_rows([header], keep=False)
+            table.write_row(header)
+            table.write_row(first)
+            for row in rows:
+                table.write_row(row)
+        if len(paths) > 1:
+            lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
@@ -1,5 +1,4 @@
-from omg.must_gather.RDEFS import RDEFS
-from omg.must_gather.get_rdef import get_generated_rdefs
+from omg.must_gather.get_rdef import get_registry
 from omg.get.get_resources import get_all_resource_names
 from omg.get.parse import parse_get_args, ParseError
 from omg.config import config
@@ -11,25 +10,7 @@ def _suggest_type(incomplete_type):
     """
     Match type based on incomplete string
     """
-    all_rdefs = []
-    all_rdefs.extend(RDEFS)
-    all_rdefs.extend(get_generated_rdefs())
-
-    all_types = set()
-    for rdef in all_rdefs:
-        singular = dget(rdef, ["singular"])
-        plural = dget(rdef, ["plural"])
-        # shortNames = dget(rdef, ["shortNames"])
-        group = dget(rdef, ["group"])
-
-        if group != "core":
-            all_types.add(plural + "." + group)
-        else:
-            all_types.add(singular)
-            all_types.add(plural)
-            # if shortNames:
-            #     all_types.update(shortNames)
-
+    all_types = get_registry().all_types()
     match = [f for f in all_types if f.startswith(incomplete_type)]
     return match
 
@@ -4,28 +4,52 @@ from omg.config import config
 from omg.get.output.o_raw import o_raw
 from omg.get.output.o_table import o_table
 from omg.utils.dget import dget
+from omg.utils.selector import parse_selector, parse_field_selector
 from omg.get.get_resources import get_all_resources
 
 
-def cmd(objects, output, show_labels):
-    lg.debug("FUNC_INIT: {}".format(locals()))
+def load(objects, selector=None, field_selector=None):
+    """Parse the get arguments and load the resources from all paths
 
-    # Parse objects
-    try:
-        parsed_objects = parse_get_args(objects)
-    except ParseError as e:
-        lg.error(e)
-        return 2
+    Args:
+        objects (tuple): Objects to get e.g, ("pods", "svc/router")
+        selector (str, optional): Label selector
+        field_selector (str, optional): Field selector
+
+    Returns:
+        tuple: (namespace, resources from paths, see get_all_resources)
+
+    Raises:
+        ParseError: Invalid objects or selectors
+    """
+    parsed_objects = parse_get_args(objects)
 
     lg.debug("parsed_objects: {}".format(parsed_objects))
 
+    # Parse label and field selectors
+    try:
+        reqs = parse_selector(selector) if selector else None
+        f_reqs = parse_field_selector(field_selector) if field_selector else None
+    except ValueError as e:
+        raise ParseError(e)
+
     # Set namespace
     ns = dget(config.get(), ["project"])
 
     lg.debug("Namespace resolved to: {}".format(ns))
 
     # Collect resources
-    all_res_d = get_all_resources(parsed_objects, ns)
+    return ns, get_all_resources(parsed_objects, ns, selector=reqs, field_selector=f_reqs)
+
+
+def cmd(objects, output, show_labels, selector=None, field_selector=None):
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    try:
+        ns, all_res_d = load(objects, selector, field_selector)
+    except ParseError as e:
+        lg.error(e)
+        return 2
 
     # No resource type found e.g:
     # all_res_d == [{}, {}, ..<paths>.. ]
@@ -40,7 +64,7 @@ def cmd(objects, output, show_labels):
         return 2
 
     # Pass the parsed object to respective output function
-    if output in ["yaml", "json", "name"]:
+    if output in ["yaml", "json", "ndjson", "jsonl", "name"]:
         o_raw(all_res_d, output)
     elif output is None or output == "wide":
         o_table(all_res_d, ns, output, show_labels)
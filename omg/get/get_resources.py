@@ -1,17 +1,19 @@
 from loguru import logger as lg
 
 from omg.config import config
-from omg.utils.dget import dget
-from omg.must_gather.load_resources import load_res
+from omg.must_gather.load_resources import load_res, load_res_names
 from omg.must_gather.exceptions import NameSpaceRequired, UnkownResourceType
+from omg.utils.pool import map_threads
 
 
-def get_all_resources(parsed_objects, ns=None):
+def get_all_resources(parsed_objects, ns=None, selector=None, field_selector=None):
     """Get resources from all paths
 
     Args:
         parsed_objects (dict): Parsed object
         ns (string): Namespace/project
+        selector (list[tuple], optional): Parsed label selector (see omg.utils.selector)
+        field_selector (tuple[tuple], optional): Parsed field selector (see omg.utils.selector)
 
     Returns:
         list:   for each r_type, list of resources from each path
@@ -32,6 +34,27 @@ def get_all_resources(parsed_objects, ns=None):
     cfg = config.get()
     paths = cfg["paths"]
 
+    # (path, r_type) pairs are loaded concurrently
+    loads = [(path, r_type) for path in paths for r_type in parsed_objects]
+
+    def _load(load):
+        path, r_type = load
+        try:
+            return load_res(path, r_type, parsed_objects[r_type], ns,
+                            selector=selector, field_selector=field_selector)
+        except UnkownResourceType:
+            raise UnkownResourceType(r_type)
+
+    try:
+        loaded = map_threads(_load, loads)
+    except NameSpaceRequired as e:
+        lg.error(e)
+        raise SystemExit(1)
+    except UnkownResourceType as e:
+        lg.error("Unknow resource type: {}".format(e))
+        raise SystemExit(1)
+    loaded.reverse()
+
     # Resources dicts from selected paths
     # resd_from_paths = []
     resd_from_paths = {}
@@ -40,35 +63,46 @@ def get_all_resources(parsed_objects, ns=None):
     for path in paths:
         i += 1
         resd = {}
+        for r_type in parsed_objects:
+            resd[r_type] = loaded.pop()
+        # resd_from_paths.append(resd)
+        resd_from_paths[i] = resd
+    return resd_from_paths
+
+
+def get_all_resource_names(parsed_objects, ns=None):
+    """Get names of the resources from all paths
+
+    Resources are not loaded if the names can be taken from
+    the item index of the yamls (see load_res_names).
+
+    Args:
+        parsed_objects (dict): Parsed object
+        ns (string): Namespace/project
+
+    Returns:
+        list: Names of the resources
+    """
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    cfg = config.get()
+    paths = cfg["paths"]
+
+    all_names = []
+    for path in paths:
         for r_type in parsed_objects:
             r_names = parsed_objects[r_type]
 
             try:
-                res = load_res(path, r_type, r_names, ns)
+                names = load_res_names(path, r_type, ns)
             except NameSpaceRequired as e:
                 lg.error(e)
                 raise SystemExit(1)
             except UnkownResourceType:
                 lg.error("Unknow resource type: {}".format(r_type))
                 raise SystemExit(1)
-            else:
-                resd[r_type] = res
-        # resd_from_paths.append(resd)
-        resd_from_paths[i] = resd
-    return resd_from_paths
-
 
-def get_all_resource_names(parsed_objects, ns=None):
-
-    resd_from_paths = get_all_resources(parsed_objects, ns)
-
-    all_names = []
-    for i, path_resd in resd_from_paths.items():
-        for r_type in path_resd:
-            res = path_resd[r_type]
-            if res:
-                for r in res:
-                    name = dget(r, ["res", "metadata", "name"])
-                    if name:
-                        all_names.append(name)
+            if r_names:
+                names = [n for n in names if n in r_names]
+            all_names.extend(names)
     return all_names
@@ -2,7 +2,8 @@ from importlib import import_module
 from loguru import logger as lg
 
 from omg.utils.dget import dget
-from omg.utils.age import age
+from omg.utils.age import age, ages
+from omg.utils.profile import stage
 
 
 def _col_ns(res):
@@ -30,6 +31,21 @@ def _col_age(res):
     return age(pod_ct, yfile_ts)
 
 
+def _col_ages(res_list):
+    # Batch version of _col_age (whole column at once)
+    return ages(
+        [dget(r, ["res", "metadata", "creationTimestamp"]) for r in res_list],
+        [dget(r, ["yfile_ts"]) for r in res_list]
+    )
+
+
+# Column functions that have a batch version, which
+# computes the whole column in one go
+_batch_cols = {
+    _col_age: _col_ages
+}
+
+
 def _col_labels(res):
     lab = dget(res, ["res", "metadata", "labels"])
     if lab:
@@ -38,54 +54,72 @@ def _col_labels(res):
         return "<none>"
 
 
-def build_table(res, ns, output, show_type, show_labels):
-    lg.debug("FUNC_INIT: {}".format(locals()))
+def _cell(hf, r):
+    try:
+        return hf(r)
+    except Exception as e:
+        lg.debug("table cell execption: {}".format(e))
+        return "?Unknown?"
 
-    rdef = dget(res[0], ["rdef"])
 
-    # Get columns for the type of resources we are building table for
-    # If we find the matching module in table_modules we will use that
-    # Otherwise the default NAME and AGE columns will be used.
-    kind = dget(rdef, ["kind"])
+# Resolved table columns, see get_columns()
+_columns = {}
+
+
+def _module_columns(kind):
+    """Default and wide column dicts of a kind
+
+    If we find the matching module in table_modules we will use that
+    Otherwise the default NAME and AGE columns will be used.
+    """
     try:
         table_mod = import_module("omg.get.output.table_modules.{}".format(kind))
-        def_cols = table_mod.DEFAULT_COLUMNS
-        wid_cols = table_mod.WIDE_COLUMNS
+        return table_mod.DEFAULT_COLUMNS, table_mod.WIDE_COLUMNS
     except ModuleNotFoundError:
-        def_cols = {
-            "NAME": None,
-            "AGE": None
-        }
-        wid_cols = {}
-    pass
-
-    # Header and respective header functions
-    # We build the table header in header array and alongside,
-    # populate the respective functions for that column in head_f array
-    header = []
-    head_f = []
+        return {"NAME": None, "AGE": None}, {}
+
+
+def get_columns(kind, ns_col, wide, show_type, show_labels):
+    """Table header and the respective column functions for a kind
+
+    Columns are resolved once per combination of arguments and cached,
+    so the (module level) column dicts of table_modules are never modified.
+
+    Args:
+        kind (str): Kind of the resources in the table
+        ns_col (bool): Add the NAMESPACE column (all-namespaces output)
+        wide (bool): Add the wide columns (-o wide)
+        show_type (bool): Prefix names with the resource type
+        show_labels (bool): Add the LABELS column (--show-labels)
 
-    scope = dget(rdef, ["scope"])
+    Returns:
+        tuple: (header (list[str]), column functions (tuple))
+    """
+    key = (kind, ns_col, wide, show_type, show_labels)
+    if key in _columns:
+        return _columns[key]
 
-    # Populate NAME/AGE in default column dict
-    if dget(def_cols, ["NAME"], "") is None:
-        if show_type:
-            def_cols["NAME"] = _col_name_wtype
-        else:
-            def_cols["NAME"] = _col_name
-    if dget(def_cols, ["AGE"], "") is None:
-        def_cols["AGE"] = _col_age
+    def_cols, wid_cols = _module_columns(kind)
+
+    # NAME and AGE columns with None value are
+    # filled with the common name/age column functions
+    common = {
+        "NAME": _col_name_wtype if show_type else _col_name,
+        "AGE": _col_age
+    }
 
     # Go over default/wide column dicts and populate
-    # header and header_fn. Namespace and Labels are added
+    # header and header functions. Namespace and Labels are added
     # (first and last respectively) if needed
-    if ns == "_all" and scope == "Namespaced":
+    header = []
+    head_f = []
+    if ns_col:
         header.append("NAMESPACE")
         head_f.append(_col_ns)
     for hd, fn in def_cols.items():
         header.append(hd)
-        head_f.append(fn)
-    if output == "wide":
+        head_f.append(common.get(hd) if fn is None else fn)
+    if wide:
         for hd, fn in wid_cols.items():
             header.append(hd)
             head_f.append(fn)
@@ -93,17 +127,52 @@ def build_table(res, ns, output, show_type, show_labels):
         header.append("LABELS")
         head_f.append(_col_labels)
 
-    # Iterate over resources and call the header function
-    # to build the table body
-    body = []
-    for r in res:
-        row = []
-        for hf in head_f:
-            try:
-                row.append(hf(r))
-            except Exception as e:
-                lg.debug("table cell execption: {}".format(e))
-                row.append("?Unknown?")
-        body.append(row)
-
-    return [header] + body
+    _columns[key] = (header, tuple(head_f))
+    return _columns[key]
+
+
+def build_row(r, head_f):
+    """Table row of a single resource (see get_columns for head_f)"""
+    return [_cell(hf, r) for hf in head_f]
+
+
+# Resources per chunk of rows in iter_table (batch columns are computed per chunk)
+CHUNK = 500
+
+
+def iter_table(res, ns, output, show_type, show_labels):
+    """Rows of the table of a resource type, header first
+
+    Same rows as build_table, built chunk by chunk so that the
+    whole table of a type is never held in memory.
+    """
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    rdef = dget(res[0], ["rdef"])
+    header, head_f = get_columns(
+        dget(rdef, ["kind"]),
+        ns == "_all" and dget(rdef, ["scope"]) == "Namespaced",
+        output == "wide",
+        show_type,
+        show_labels
+    )
+    yield list(header)
+
+    # Build the table body column by column, using the batch version
+    # of the header function if available, otherwise calling it per resource
+    for start in range(0, len(res), CHUNK):
+        chunk = res[start:start + CHUNK]
+        with stage("build_table"):
+            columns = []
+            for hf in head_f:
+                if hf in _batch_cols:
+                    columns.append(_batch_cols[hf](chunk))
+                else:
+                    columns.append([_cell(hf, r) for r in chunk])
+            body = [list(row) for row in zip(*columns)]
+        yield from body
+
+
+def build_table(res, ns, output, show_type, show_labels):
+    """Table of a resource type (header and a row per resource), see iter_table"""
+    return list(iter_table(res, ns, output, show_type, show_labels))
@@ -1,15 +1,115 @@
 from loguru import logger as lg
 from omg.config import config
 from omg.utils.dget import dget
+from omg.utils import vfs
+from omg.must_gather import item_index
+from omg.utils.profile import timed
+import sys
 import yaml
 import json
 
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    lg.warning("yaml.CSafeDumper failed to load, using SafeDumper")
+    from yaml import SafeDumper
 
+
+def _write_yaml(items, out):
+    """Write items as yaml (a List if more than one)
+
+    The List header/footer is written once, and the items are
+    dumped one by one, instead of dumping the whole List at once.
+    The output is the same as yaml.dump() of the (key sorted) List.
+    """
+    if len(items) == 1:
+        out.write(yaml.dump(items[0], Dumper=SafeDumper))
+    else:
+        out.write("apiVersion: v1\nitems:\n")
+        for item in items:
+            out.write(yaml.dump([item], Dumper=SafeDumper))
+        out.write("kind: List\n")
+    out.write("\n")
+
+
+def _passthrough_ranges(all_res):
+    """Byte ranges of the yaml files that all_res was loaded from
+
+    The yaml files can be passed through as is, only if all_res maps 1:1 to
+    the items of (kind: List) yaml files, i.e, all items of every yaml file
+    are selected (no name filter etc.). The item index of a yaml file is
+    used to verify this, it is only available for completely loaded files
+    (i.e, not for broken/truncated ones).
+
+    Returns:
+        list[tuple]: (yfile, start, end) of the items of every yaml file
+                     or None if all_res can't be passed through
+    """
+    groups = []
+    for res in all_res:
+        yfile = res.get("yfile")
+        if yfile is None:
+            return None
+        if groups and groups[-1][0] == yfile:
+            groups[-1][1] += 1
+        else:
+            groups.append([yfile, 1])
+
+    if len(all_res) < 2 or len(groups) != len(set(g[0] for g in groups)):
+        return None
+
+    ranges = []
+    for yfile, count in groups:
+        index = item_index.get_index(yfile)
+        if not index or len(index) != count:
+            return None
+        ranges.append((yfile, index[0]["range"][0], index[-1]["range"][1]))
+    return ranges
+
+
+def _write_yaml_passthrough(ranges, out):
+    """Write the items of the yaml files (see _passthrough_ranges) as they are"""
+    lg.debug("Passing through yaml files: {}".format([r[0] for r in ranges]))
+    if len(ranges) == 1:
+        # All items of a single file: pass the whole file through
+        yfile = ranges[0][0]
+        vfs.copy_range(yfile, 0, vfs.getsize(yfile), out)
+    else:
+        out.write("apiVersion: v1\nitems:\n")
+        for yfile, start, end in ranges:
+            vfs.copy_range(yfile, start, end, out)
+        out.write("kind: List\n")
+    out.write("\n")
+
+
+def _write_json(items, out):
+    """Write items as json (a List if more than one), one item at a time"""
+    if len(items) == 1:
+        out.write(json.dumps(items[0]))
+    else:
+        out.write('{"apiVersion": "v1", "kind": "List", "items": [')
+        for n, item in enumerate(items):
+            if n:
+                out.write(", ")
+            out.write(json.dumps(item))
+        out.write("]}")
+    out.write("\n")
+
+
+def _write_ndjson(items, out):
+    """Write items as newline delimited json, i.e, one json object per line"""
+    for item in items:
+        out.write(json.dumps(item))
+        out.write("\n")
+
+
+@timed("output")
 def o_raw(resd_from_paths, output):
     lg.debug("FUNC_INIT: {}".format(locals()))
 
     cfg = config.get()
     paths = cfg["paths"]
+    out = sys.stdout
 
     for i, path_resd in resd_from_paths.items():
         all_res = []
@@ -18,34 +118,32 @@ def o_raw(resd_from_paths, output):
             if res:
                 all_res.extend(res)
 
-        if all_res:
-            if len(all_res) == 1:
-                out_res = dget(all_res[0], ["res"])
-            elif len(all_res) > 1:
-                out_res = {
-                        "apiVersion": "v1",
-                        "kind": "List",
-                        "items": [dget(res, ["res"]) for res in all_res]
-                    }
-            else:
-                continue
-
-            if output == "yaml":
-                print(yaml.dump(out_res))
-            elif output == "json":
-                print(json.dumps(out_res))
-            elif output == "name":
-                for res in all_res:
-                    group = dget(res, ["rdef", "group"])
-                    singular = dget(res, ["rdef", "singular"])
-                    if group == "core":
-                        out_type = singular
-                    else:
-                        out_type = str(singular) + "." + str(group)
-                    name = dget(res, ["res", "metadata", "name"])
-                    print(
-                        str(out_type) + "/" + str(name)
-                    )
-
-            if (len(paths) > 1):
-                lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
+        if not all_res:
+            continue
+
+        items = [dget(res, ["res"]) for res in all_res]
+        ranges = _passthrough_ranges(all_res) if output == "yaml" else None
+        if ranges:
+            _write_yaml_passthrough(ranges, out)
+        elif output == "yaml":
+            _write_yaml(items, out)
+        elif output == "json":
+            _write_json(items, out)
+        elif output in ("ndjson", "jsonl"):
+            _write_ndjson(items, out)
+        elif output == "name":
+            for res in all_res:
+                group = dget(res, ["rdef", "group"])
+                singular = dget(res, ["rdef", "singular"])
+                if group == "core":
+                    out_type = singular
+                else:
+                    out_type = str(singular) + "." + str(group)
+                name = dget(res, ["res", "metadata", "name"])
+                print(
+                    str(out_type) + "/" + str(name)
+                )
+
+        if (len(paths) > 1):
+            out.flush()
+            lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
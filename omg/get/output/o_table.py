@@ -2,9 +2,24 @@ from tabulate import tabulate
 from loguru import logger as lg
 from os import getenv
 from omg.config import config
-from omg.get.output.build_table import build_table
+from omg.get.output.build_table import iter_table
+from omg.get.output.plain_table import PlainTable
+from omg.utils.profile import timed
 
 
+def _rows(path_resd, ns, output, show_type, show_labels):
+    """Table rows of all resource types of a path (tables are separated by an empty row)"""
+    sep = False
+    for r_type in path_resd:
+        res = path_resd[r_type]
+        if res:
+            if sep:
+                yield [""]
+            yield from iter_table(res, ns, output, show_type, show_labels)
+            sep = True
+
+
+@timed("output")
 def o_table(resd_from_paths, ns, output, show_labels):
     """Handles table output.
        Both simple (without -o) and wide (-o wide)
@@ -32,16 +47,26 @@ def o_table(resd_from_paths, ns, output, show_labels):
         show_type = True
 
     for i, path_resd in resd_from_paths.items():
-        table_all_res = None
-        for r_type in path_resd:
-            res = path_resd[r_type]
-            if res:
-                res_table = build_table(res, ns, output, show_type, show_labels)
-                if table_all_res:
-                    table_all_res += [[""]] + res_table
-                else:
-                    table_all_res = res_table
-        if table_all_res:
-            print(tabulate(table_all_res, tablefmt=tablefmt))
-            if (len(paths) > 1):
-                lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
+        rows = _rows(path_resd, ns, output, show_type, show_labels)
+        if tablefmt == "plain":
+            # Plain tables are streamed by PlainTable: the column widths are
+            # measured in a first pass (that keeps no rows), then every row
+            # is built again and written as soon as it is built
+            table = PlainTable()
+            table.add_rows(rows, keep=False)
+            if not table.widths:
+                continue
+            rows = _rows(path_resd, ns, output, show_type, show_labels)
+            if table.fallback:
+                table.add_rows(rows)
+                table.write()
+            else:
+                for row in rows:
+                    table.write_row(row)
+        else:
+            rows = list(rows)
+            if not rows:
+                continue
+            print(tabulate(rows, tablefmt=tablefmt))
+        if (len(paths) > 1):
+            lg.opt(colors=True).success("^^^<e>[{}]</>^^^\n".format(i))
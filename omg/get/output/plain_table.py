@@ -0,0 +1,148 @@
+""" plain_table.py
+
+Streaming renderer for OMG_TABLE_FMT=plain (default) table output.
+
+tabulate keeps several copies of the whole table (formatted columns,
+aligned columns, rows, lines and finally the joined output string) and
+prints nothing until all of it is built. PlainTable only keeps the cell
+strings: column widths are computed while rows are added, and the table is
+written to the output line by line.
+
+The output is byte-identical to tabulate(rows, tablefmt="plain") for
+the tables built by build_table, i.e, where the first row is a header
+(hence every column is a string column and is left aligned).
+
+If the column widths are known upfront (rows measured with keep=False,
+possibly in other processes, see merge), rows can also be written one by
+one with write_row, without keeping them at all. This is how o_table and
+the events timeline stream their tables.
+"""
+
+import re
+import sys
+from tabulate import tabulate
+
+try:
+    from wcwidth import wcswidth as _width
+except ImportError:
+    _width = None
+
+_newline_re = re.compile(r"[\r\n]")
+
+
+def _len(s):
+    # Same width function as tabulate (wide characters aware if wcwidth is available)
+    if _width is None or (s.isascii() and s.isprintable()):
+        return len(s)
+    return _width(s)
+
+
+def _cells(row):
+    return ["" if v is None else "{}".format(v) for v in row]
+
+
+def _pad(s, width):
+    # Pad s to the visible width
+    return s.ljust(width - (_len(s) - len(s)))
+
+
+class PlainTable(object):
+    """Plain format table, rendered like tabulate(rows, tablefmt="plain")"""
+
+    def __init__(self):
+        self.rows = []
+        self.widths = []
+        self.multiline = False
+        self.fallback = False
+
+    def add_rows(self, rows, keep=True):
+        """Add rows to the table
+
+        Args:
+            rows (list[list]): Rows to add, missing cells and None values
+                               are rendered as empty cells (same as tabulate)
+            keep (bool): Keep the rows, otherwise only the column widths are updated
+        """
+        widths = self.widths
+        for row in rows:
+            cells = _cells(row)
+            for i, c in enumerate(cells):
+                # Even if the new line is stripped, the whole table is multiline
+                if "\n" in c or "\r" in c:
+                    self.multiline = True
+                    w = max(map(_len, _newline_re.split(c.strip())))
+                else:
+                    w = _len(c.strip())
+                if w < 0 or "\x1b" in c:
+                    # ANSI codes or non printable characters
+                    self.fallback = True
+                if i == len(widths):
+                    widths.append(w)
+                elif w > widths[i]:
+                    widths[i] = w
+            if keep:
+                self.rows.append(cells)
+
+    def merge(self, other):
+        """Widen the columns to fit the rows measured by another table"""
+        for i, w in enumerate(other.widths):
+            if i == len(self.widths):
+                self.widths.append(w)
+            elif w > self.widths[i]:
+                self.widths[i] = w
+        self.multiline = self.multiline or other.multiline
+        self.fallback = self.fallback or other.fallback
+
+    def _cells(self, cells):
+        """Cells of a row, padded to the column widths"""
+        return [
+            _pad(cells[i].strip() if i < len(cells) else "", w)
+            for i, w in enumerate(self.widths)
+        ]
+
+    def _multiline_cells(self, cells):
+        """Lines of every cell of a (multiline) row, padded to the column widths"""
+        padded = []
+        for i, w in enumerate(self.widths):
+            c = cells[i].strip() if i < len(cells) else ""
+            if _width:
+                # (Same as tabulate) pad widths are corrected with the wide characters
+                # of the [\r\n] split lines, but applied to the splitlines() lines
+                pads = [w - (_len(ln) - len(ln)) for ln in _newline_re.split(c)]
+                lines = [ln.ljust(pw) for ln, pw in zip(c.splitlines() or c, pads)]
+            else:
+                lines = [ln.ljust(w) for ln in c.splitlines()]
+            padded.append(lines)
+        return padded
+
+    def _write_cells(self, cells, out):
+        if not self.multiline:
+            out.write("  ".join(self._cells(cells)).rstrip() + "\n")
+            return
+        # Shorter cells are vertically padded with blank lines,
+        # rows with only empty cells are skipped altogether
+        lines = self._multiline_cells(cells)
+        for n in range(max(map(len, lines))):
+            out.write("  ".join(
+                ln[n] if n < len(ln) else " " * self.widths[i]
+                for i, ln in enumerate(lines)
+            ).rstrip() + "\n")
+
+    def write_row(self, row, out=None):
+        """Write a single row (that was measured before) to out (defaults to stdout)
+
+        Not possible if the table needs tabulate (fallback), write() the rows instead.
+        """
+        self._write_cells(_cells(row), out or sys.stdout)
+
+    def write(self, out=None):
+        """Write the table (followed by a new line) to out (defaults to stdout)"""
+        out = out or sys.stdout
+
+        if self.fallback:
+            # Leave the width handling of these to tabulate
+            out.write(tabulate(self.rows, tablefmt="plain") + "\n")
+            return
+
+        for cells in self.rows:
+            self._write_cells(cells, out)
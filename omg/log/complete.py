@@ -1,5 +1,6 @@
 from omg.config import config
 from omg.utils.dget import dget
+from omg.utils import vfs
 import os
 from loguru import logger as lg
 
@@ -18,8 +19,8 @@ def complete_pods(ctx, args, incomplete):
     suggestions = []
     for path in c_paths:
         pod_dir = os.path.join(path, "namespaces", ns, "pods")
-        if os.path.isdir(pod_dir):
-            pod_listing = os.listdir(pod_dir)
+        if vfs.isdir(pod_dir):
+            pod_listing = vfs.listdir(pod_dir)
             if pod_listing:
                 suggestions.extend([pod for pod in pod_listing if incomplete in pod])
     return suggestions
@@ -48,8 +49,8 @@ def complete_containers(ctx, args, incomplete):
     container_listing = []
     for path in c_paths:
         container_dir = os.path.join(path, "namespaces", ns, "pods", pod)
-        if os.path.isdir(container_dir):
-            containers = os.listdir(container_dir)
+        if vfs.isdir(container_dir):
+            containers = vfs.listdir(container_dir)
             if containers:
                 container_listing.extend(containers)
 
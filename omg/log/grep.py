@@ -0,0 +1,216 @@
+""" grep.py
+
+omg logs grep: Search the container logs of many pods at once.
+
+Log files (current.log and previous.log of every container) are scanned in
+worker processes (see omg.utils.pool), one file per task. Regular files are
+mmap'd. If the pattern contains a literal string that every match must
+contain, the file is searched for that literal first (which is much faster
+than running the regex on every line). Only the lines containing it are
+matched against the regex.
+
+Matching lines are printed prefixed with namespace/pod/container
+(and /previous for previous.log).
+"""
+
+import os
+import re
+import sys
+import mmap
+from loguru import logger as lg
+from omg.config import config
+from omg.utils.dget import dget
+from omg.utils import vfs
+from omg.utils.pool import map_ordered
+from omg.utils.selector import parse_selector, match_labels
+from omg.must_gather.load_resources import load_res
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+
+def literal_prefilter(pattern, flags=0):
+    """Longest literal string that every match of the pattern must contain
+
+    Only literals at the top level of the pattern are considered,
+    e.g, "conn.*refused" -> "refused", "foo|bar" -> None
+
+    Args:
+        pattern (str): Regular expression
+        flags (int): re flags the pattern is compiled with
+
+    Returns:
+        bytes: utf-8 encoded literal or None
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    best, cur = "", ""
+    for op, av in parsed:
+        if op == sre_parse.LITERAL:
+            cur += chr(av)
+            if len(cur) > len(best):
+                best = cur
+        else:
+            cur = ""
+    return best.encode("utf-8") if best else None
+
+
+def _lines(data):
+    """Lines of a bytes-like object (or mmap)"""
+    pos = 0
+    size = len(data)
+    while pos < size:
+        end = data.find(b"\n", pos)
+        if end < 0:
+            end = size
+        yield data[pos:end]
+        pos = end + 1
+
+
+def _prefiltered_lines(data, literal):
+    """Lines of data (bytes-like or mmap) that contain literal"""
+    pos = 0
+    while True:
+        hit = data.find(literal, pos)
+        if hit < 0:
+            return
+        start = data.rfind(b"\n", 0, hit) + 1
+        end = data.find(b"\n", hit)
+        if end < 0:
+            end = len(data)
+        yield data[start:end]
+        pos = end + 1
+
+
+def _grep_file(args):
+    """Grep a single log file (runs in worker processes)
+
+    Args:
+        args (tuple): (log file, pattern, flags, literal)
+
+    Returns:
+        list[str]: Matching lines
+    """
+    logfile, pattern, flags, literal = args
+    regex = re.compile(pattern, flags)
+    matches = []
+    try:
+        if vfs.getsize(logfile) == 0:
+            return matches
+        with vfs.open(logfile, "rb") as l_f:
+            try:
+                data = mmap.mmap(l_f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                # e.g, archive members
+                data = l_f.read()
+            try:
+                lines = _prefiltered_lines(data, literal) if literal else _lines(data)
+                for line in lines:
+                    line = line.decode("utf-8", errors="replace")
+                    if regex.search(line):
+                        matches.append(line)
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+    except OSError as e:
+        lg.warning("Unable to read {}: {}".format(logfile, e))
+    return matches
+
+
+def _namespaces(path, ns):
+    if ns != "_all":
+        return [ns]
+    p_nss = os.path.join(path, "namespaces")
+    if not vfs.isdir(p_nss):
+        return []
+    return sorted(vfs.listdir(p_nss))
+
+
+def _selected_pods(path, ns, selector):
+    """Names of the pods in ns that match the (parsed) label selector"""
+    return set(
+        dget(r, ["res", "metadata", "name"])
+        for r in load_res(path, "pods", ns=ns)
+        if match_labels(selector, dget(r, ["res", "metadata", "labels"]))
+    )
+
+
+def log_files(paths, ns, selector=None):
+    """Locate the container log files of the pods
+
+    Args:
+        paths (list[str]): Must-gather paths
+        ns (str): Namespace, or _all for all namespaces
+        selector (list, optional): Parsed label selector for the pods
+
+    Returns:
+        list[tuple]: [(tag, log file), ...] where tag is ns/pod/container[/previous]
+    """
+    files = []
+    for path in paths:
+        for p_ns in _namespaces(path, ns):
+            pods_dir = os.path.join(path, "namespaces", p_ns, "pods")
+            if not vfs.isdir(pods_dir):
+                continue
+            pods = sorted(vfs.listdir(pods_dir))
+            if selector is not None:
+                selected = _selected_pods(path, p_ns, selector)
+                pods = [p for p in pods if p in selected]
+            for pod in pods:
+                pod_dir = os.path.join(pods_dir, pod)
+                if not vfs.isdir(pod_dir):
+                    continue
+                for con in sorted(vfs.listdir(pod_dir)):
+                    logs_dir = os.path.join(pod_dir, con, con, "logs")
+                    for log, suffix in (("current.log", ""), ("previous.log", "/previous")):
+                        logfile = os.path.join(logs_dir, log)
+                        if vfs.isfile(logfile):
+                            files.append(("{}/{}/{}{}".format(p_ns, pod, con, suffix), logfile))
+    return files
+
+
+def cmd(pattern, selector, ignore_case):
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    cfg = config.get()
+    paths = dget(cfg, ["paths"])
+    ns = dget(cfg, ["project"])
+
+    if not paths:
+        lg.error("No must-gather selected")
+        raise SystemExit(1)
+    if ns is None:
+        lg.error("No namespace/project selected")
+        raise SystemExit(1)
+
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        re.compile(pattern, flags)
+        reqs = parse_selector(selector) if selector else None
+    except (re.error, ValueError) as e:
+        lg.error(e)
+        raise SystemExit(1)
+
+    files = log_files(paths, ns, reqs)
+    if not files:
+        lg.error("No log files found")
+        raise SystemExit(1)
+
+    # grep is embarrassingly parallel, use all cpus unless -j/OMG_JOBS says otherwise
+    if config.jobs is None and not os.getenv("OMG_JOBS"):
+        config.jobs = 0
+
+    literal = literal_prefilter(pattern, flags)
+    lg.debug("Grep {} log files, literal prefilter: {}".format(len(files), literal))
+    results = map_ordered(_grep_file, [(f, pattern, flags, literal) for _, f in files])
+
+    out = sys.stdout
+    for (tag, _), matches in zip(files, results):
+        for line in matches:
+            out.write("{}: {}\n".format(tag, line))
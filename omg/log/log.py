@@ -1,12 +1,29 @@
 import os
+import sys
 from loguru import logger as lg
 from omg.config import config
 from omg.utils.dget import dget
+from omg.utils import vfs
+from omg.utils.age import to_datetime
+from omg.log.stream import stream_log, parse_duration
 
 
-def cmd(resource, container, previous):
+def cmd(resource, container, previous,
+        tail=None, since=None, since_time=None, limit_bytes=None):
     lg.debug("FUNC_INIT: {}".format(locals()))
 
+    if since and since_time:
+        lg.error("Only one of --since and --since-time can be used")
+        raise SystemExit(1)
+    try:
+        if since:
+            since = parse_duration(since)
+        elif since_time:
+            since = to_datetime(since_time)
+    except ValueError as e:
+        lg.error("Invalid --since/--since-time: {}".format(e))
+        raise SystemExit(1)
+
     cfg = config.get()
     paths = dget(cfg, ["paths"])
     ns = dget(cfg, ["project"])
@@ -39,17 +56,17 @@ def cmd(resource, container, previous):
     for path in paths:
 
         proj_path = os.path.join(path, "namespaces", ns)
-        if not os.path.isdir(proj_path):
+        if not vfs.isdir(proj_path):
             continue
 
         pod_dir = os.path.join(proj_path, "pods", pod)
-        if not os.path.isdir(pod_dir):
+        if not vfs.isdir(pod_dir):
             # lg.warning("Pod directory not found: {}".format(pod_dir))
             continue
 
         con_dirs = [
-            c for c in os.listdir(pod_dir)
-            if os.path.isdir(os.path.join(pod_dir, c))
+            c for c in vfs.listdir(pod_dir)
+            if vfs.isdir(os.path.join(pod_dir, c))
         ]
 
         if not con_dirs:
@@ -89,12 +106,12 @@ def cmd(resource, container, previous):
         lg.error("No log files found")
 
     for logfile in log_files:
-        if not os.path.isfile(logfile):
+        if not vfs.isfile(logfile):
             lg.warning("Log file not found: {}".format(logfile))
         else:
             lg.info(logfile)
-            with open(logfile, "r") as lf:
-                print(lf.read())
+            stream_log(logfile, sys.stdout, tail=tail, since=since, limit_bytes=limit_bytes)
+            print("")
         if len(log_files) > 1:
             print("")
             print("~~~")
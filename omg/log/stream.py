@@ -0,0 +1,188 @@
+""" stream.py
+
+Stream (a window of) container log files, without loading them into memory.
+
+Container logs in must-gathers are collected with timestamps, i.e, every
+line is prefixed with an RFC3339 timestamp e.g:
+
+    2021-02-10T10:00:00.123456789Z I0210 10:00:00.123 1 controller.go:42] ...
+
+The window to print is worked out with seeks:
+  --tail N: Blocks are read backwards from the end of the file, until
+            N lines are found.
+  --since/--since-time: Binary search for the first line with a timestamp
+            at (or after) the given time. Log lines are in time order, so
+            this only needs to read ~log2(size) lines.
+  --limit-bytes: Stop after these many bytes.
+"""
+
+import re
+from datetime import timedelta
+from loguru import logger as lg
+from omg.utils import vfs
+from omg.utils.age import to_datetime
+from omg.utils.profile import timed
+
+# Size of the blocks read backwards for --tail
+BLOCK_SIZE = 64 * 1024
+
+# Timestamp prefix of a log line
+_ts_re = re.compile(rb"^(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d+)?(?:Z|[+-]\d\d:?\d\d)?)\s")
+
+# Go style duration e.g, 10s, 5m, 1h30m (as accepted by oc/kubectl logs --since)
+_duration_re = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_duration_units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(duration):
+    """Parse a duration string e.g, 1h30m
+
+    Args:
+        duration (str): Duration string
+
+    Returns:
+        timedelta: Parsed duration
+
+    Raises:
+        ValueError: If duration is not valid
+    """
+    if not duration or _duration_re.sub("", duration):
+        raise ValueError("Invalid duration: {}".format(duration))
+    seconds = sum(
+        float(n) * _duration_units[u] for n, u in _duration_re.findall(duration))
+    return timedelta(seconds=seconds)
+
+
+def line_ts(line):
+    """Timestamp of a log line, None if the line doesn't start with a timestamp"""
+    m = _ts_re.match(line)
+    if not m:
+        return None
+    try:
+        return to_datetime(m.group(1).decode())
+    except ValueError:
+        return None
+
+
+def _line_at(f, pos, size):
+    """First line (with a timestamp) that starts at or after pos
+
+    Returns:
+        tuple: (start offset, timestamp), (size, None) if there is no such line
+    """
+    if pos > 0:
+        f.seek(pos - 1)
+        f.readline()
+    else:
+        f.seek(0)
+    start = f.tell()
+    while start < size:
+        ts = line_ts(f.readline())
+        if ts is not None:
+            return start, ts
+        # e.g, a multi line message without timestamp prefix
+        start = f.tell()
+    return size, None
+
+
+def since_offset(f, since, size):
+    """Offset of the first log line with timestamp >= since (binary search)
+
+    Args:
+        f (file object): Log file opened in binary mode
+        since (datetime): Start time
+        size (int): Size of the log file
+
+    Returns:
+        int: Offset of the line
+    """
+    lo, hi = 0, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start, ts = _line_at(f, mid, size)
+        if ts is None or ts >= since:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_at(f, lo, size)[0]
+
+
+def tail_offset(f, lines, size):
+    """Offset of the start of the last `lines` lines (reverse block reads)
+
+    Args:
+        f (file object): Log file opened in binary mode
+        lines (int): Number of lines
+        size (int): Size of the log file
+
+    Returns:
+        int: Offset of the line
+    """
+    if lines <= 0:
+        return size
+    pos = size
+    found = 0
+    while pos > 0:
+        block = min(BLOCK_SIZE, pos)
+        pos -= block
+        f.seek(pos)
+        data = f.read(block)
+        end = len(data)
+        if pos + block == size and data.endswith(b"\n"):
+            # Trailing new line ends the last line, it doesn't start a new one
+            end -= 1
+        while True:
+            nl = data.rfind(b"\n", 0, end)
+            if nl < 0:
+                break
+            found += 1
+            if found == lines:
+                return pos + nl + 1
+            end = nl
+    return 0
+
+
+def log_window(logfile, tail=None, since=None, limit_bytes=None):
+    """Byte range of (a window of) a log file
+
+    Args:
+        logfile (str): Path of the log file (can be inside an archive)
+        tail (int, optional): Only the last `tail` lines
+        since (datetime or timedelta, optional): Only lines since this time.
+            A timedelta is relative to the time the log was collected (mtime).
+        limit_bytes (int, optional): Maximum bytes
+
+    Returns:
+        tuple: (start, end) offsets
+    """
+    size = vfs.getsize(logfile)
+    start = 0
+    with vfs.open(logfile, "rb") as f:
+        if since is not None:
+            if isinstance(since, timedelta):
+                since = to_datetime(vfs.getmtime(logfile), "epoch") - since
+            if line_ts(f.readline()) is None:
+                lg.warning("Log lines of {} don't have timestamps, "
+                           "--since/--since-time ignored".format(logfile))
+            else:
+                start = since_offset(f, since, size)
+        if tail is not None and tail >= 0:
+            start = max(start, tail_offset(f, tail, size))
+    end = size
+    if limit_bytes is not None and limit_bytes >= 0:
+        end = min(end, start + limit_bytes)
+    return start, end
+
+
+@timed("output")
+def stream_log(logfile, out, tail=None, since=None, limit_bytes=None):
+    """Write (a window of) a log file to out
+
+    Args:
+        logfile (str): Path of the log file (can be inside an archive)
+        out (file object): Output stream e.g, sys.stdout
+        tail, since, limit_bytes: See log_window
+    """
+    start, end = log_window(logfile, tail, since, limit_bytes)
+    lg.debug("Streaming bytes {}-{} of {}".format(start, end, logfile))
+    vfs.copy_range(logfile, start, end, out)
@@ -105,7 +105,7 @@ def mc_extract(m):
             if mc_data:
                 try:
                     os.makedirs(emc_path, exist_ok=True)
-                except PermissionError as e:
+                except OSError as e:
                     lg.warning(e)
                     continue
                 for mc in mc_data:
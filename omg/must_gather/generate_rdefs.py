@@ -1,6 +1,7 @@
 import os
 import yaml
 from loguru import logger as lg
+from omg.utils import cache
 from omg.utils.dget import dget
 from omg.must_gather.load_resources import load_res
 
@@ -52,6 +53,9 @@ def generate_rdefs(path):
                 yaml.dump(rdefs, rdf, default_flow_style=False)
                 lg.debug("{} rdefs written to: {}".format(len(rdefs), rdefs_f))
 
+            # Save the precompiled (pickled) copy, see get_rdef.py
+            cache.dump("rdefs", rdefs_f, cache.file_stamp(rdefs_f), rdefs)
+
     except Exception:
         # lg.warning("Unable to generate rdef file {}: {}".format(rdefs_f, e))
         pass
@@ -25,65 +25,149 @@ An rdef dict consists of the following keys:
 get_rdef() function finds, matches and returns the matching dict for
 a specific resource type, searching built-in rdefs first.
 
+Lookups are served from an RdefRegistry, which is built once per process
+and maps every name an rdef can be referred with (singular, plural,
+shortNames and <singular|plural>.<group> including partial groups e.g,
+config.operator for config.operator.openshift.io) to the rdef.
+Generated rdefs are loaded from a pickled copy of the rdefs file in the
+omg cache, rather than parsing the yaml every time.
+
 """
 
 import os
 from loguru import logger as lg
 
 from omg.must_gather.RDEFS import RDEFS
+from omg.utils import cache
 from omg.utils.load_yaml import load_yaml
 from omg.utils.dget import dget
 
+# Process wide registry, see get_registry()
+_registry = None
+
+
+class RdefRegistry(object):
+    """Dict based index of rdefs for constant time lookups
+
+    If more than one rdef matches a name, the first one
+    (in the order rdefs were added) wins.
+
+    Args:
+        rdefs (list[dict]): rdefs to add to the registry
+    """
+
+    def __init__(self, rdefs):
+        self.rdefs = []
+        self._names = {}
+        self._dotted = {}
+        self._types = None
+        for rdef in rdefs:
+            self.add(rdef)
+
+    def add(self, rdef):
+        if not isinstance(rdef, dict):
+            return
+        self.rdefs.append(rdef)
+        self._types = None
 
-def _match_rdef(r_type, rdef):
-    if isinstance(r_type, str) and isinstance(rdef, dict):
-        # kind = dget(rdef, ["kind"])
         singular = dget(rdef, ["singular"])
         plural = dget(rdef, ["plural"])
         group = dget(rdef, ["group"])
-        shortNames = dget(rdef, ["shortNames"])
+        shortNames = dget(rdef, ["shortNames"]) or []
+
+        for name in [singular, plural] + list(shortNames):
+            if name:
+                self._names.setdefault(name, rdef)
+
+        if group:
+            group_list = group.split(".")
+            for i in range(1, len(group_list) + 1):
+                partial_group = ".".join(group_list[:i])
+                for name in [str(singular), str(plural)]:
+                    self._dotted.setdefault(name + "." + partial_group, rdef)
 
+    def find(self, r_type):
+        """Find rdef for a (lower case) resource type
+
+        Returns:
+            dict: rdef dictionary or None if not found
+        """
         if "." in r_type:
-            r_type_kind = r_type.split(".")[0]
-            r_type_group_list = r_type.split(".")[1:]
-            r_def_group_list = group.split(".")
-            if r_type_kind.lower() in [str(singular), str(plural)]:
-                for rtgl in r_type_group_list:
-                    if rtgl != r_def_group_list[r_type_group_list.index(rtgl)]:
-                        return False
-                return True
-        else:
-            if (
-                r_type == singular or
-                r_type == plural or
-                (shortNames and r_type in shortNames)
-            ):
-                return True
-    return False
-
-
-def _find_rdef(r_type, rdefs):
-    if rdefs:
-        for rdef in rdefs:
-            if _match_rdef(r_type, rdef):
-                return rdef
-    return None
+            return self._dotted.get(r_type)
+        return self._names.get(r_type)
+
+    def all_types(self):
+        """All resource types, as we suggest them for completion
+
+        Returns:
+            set: singular and plural of core types, plural.group of others
+        """
+        if self._types is None:
+            self._types = set()
+            for rdef in self.rdefs:
+                singular = dget(rdef, ["singular"])
+                plural = dget(rdef, ["plural"])
+                group = dget(rdef, ["group"])
+                if group != "core":
+                    self._types.add(plural + "." + group)
+                else:
+                    self._types.add(singular)
+                    self._types.add(plural)
+        return self._types
+
+
+def _generated_rdefs_file():
+    return os.path.join(os.getenv("HOME") or "/tmp/", ".omg.rdefs")
+
+
+def _generated_rdefs_stamp():
+    try:
+        return cache.file_stamp(_generated_rdefs_file())
+    except OSError:
+        return None
 
 
 def get_generated_rdefs():
-    rdefs_f = os.path.join(os.getenv("HOME") or "/tmp/", ".omg.rdefs")
+    rdefs_f = _generated_rdefs_file()
+
+    stamp = _generated_rdefs_stamp()
+    if stamp is None:
+        return []
+
+    # Precompiled (pickled) rdefs
+    rdefs_y = cache.load("rdefs", rdefs_f, stamp)
+    if rdefs_y is not cache.MISS:
+        return rdefs_y
 
     try:
-        if os.path.isfile(rdefs_f):
-            rdefs_y = load_yaml(rdefs_f)
-            if rdefs_y and type(rdefs_y) is list:
-                return rdefs_y
+        rdefs_y = load_yaml(rdefs_f)
+        if rdefs_y and type(rdefs_y) is list:
+            cache.dump("rdefs", rdefs_f, stamp, rdefs_y)
+            return rdefs_y
     except FileNotFoundError:
         lg.warning("Unable to load rdefs file from {}".format(rdefs_f))
 
     return []
 
 
+def get_registry():
+    """Get the process wide RdefRegistry (built-in + generated rdefs)
+
+    The registry is re-built if the generated rdefs file changes.
+
+    Returns:
+        RdefRegistry: Registry of all known rdefs
+    """
+    global _registry
+    stamp = _generated_rdefs_stamp()
+    if _registry is None or _registry[0] != stamp:
+        registry = RdefRegistry(RDEFS)
+        for rdef in get_generated_rdefs():
+            registry.add(rdef)
+        _registry = (stamp, registry)
+    return _registry[1]
+
+
 def get_rdef(r_type):
     """Find Resource Definition (rdef) for a resource type.
 
@@ -97,22 +181,9 @@ def get_rdef(r_type):
 
     r_type = r_type.lower()
 
-    # Lookup rdef in internal RDEFS
-    rdef = _find_rdef(r_type, RDEFS)
-    if rdef:
-        lg.debug("rdef for {} found internally: {}".format(r_type, rdef))
-        return rdef
-
-    lg.debug("rdef for {} not found internally. Trying generated ones".format(
-        r_type
-    ))
-
-    # Find rdefs from generated rdefs file
-
-    rdef = _find_rdef(r_type, get_generated_rdefs())
-
+    rdef = get_registry().find(r_type)
     if rdef:
-        lg.debug("rdef for {} found in generated rdef: {}".format(r_type, rdef))
+        lg.debug("rdef for {} found: {}".format(r_type, rdef))
         return rdef
 
     lg.debug("rdef for {} was not found!".format(r_type))
@@ -0,0 +1,242 @@
+""" item_index.py
+
+Per-file index of the items in a (kind: List) yaml file.
+
+For every item in the list we save its name, kind and the byte range
+that it occupies in the yaml file. With this index, a query for specific
+resource names only has to read and parse the matching items, instead of
+parsing the whole (potentially huge) list.
+
+Indexes are saved in the persistent cache (see omg.utils.cache), keyed by
+the yaml path and stamped with its size and mtime. An index is built
+whenever a List yaml is parsed from scratch.
+
+An index looks like:
+
+    [
+        {"name": <name>, "kind": <kind>, "range": (start, end)},
+        ...
+    ]
+
+Alongside, an inverted label index is saved, that maps the labels of the
+items to their positions in the index. This is used to answer label
+selectors (-l) without parsing the items that don't match:
+
+    { <label key>: { <label value>: [item positions] } }
+
+and the same for a few fields that are commonly used in field selectors
+(see INDEXED_FIELDS):
+
+    { <field>: { <field value>: [item positions] } }
+"""
+
+import re
+import yaml
+from os.path import abspath
+from loguru import logger as lg
+from omg.utils import cache, vfs
+from omg.utils.dget import dget
+from omg.utils.load_yaml import SafeLoader
+from omg.utils.selector import field_value
+
+# Fields in the field index
+INDEXED_FIELDS = ("metadata.namespace", "spec.nodeName", "status.phase")
+
+# Start of a top level line, i.e, either a top level key (e.g, "kind: List")
+# or the start of a top level list item ("- apiVersion: v1")
+_top_level_re = re.compile(rb"^[^\s#]", re.M)
+
+
+def _item_ranges(ybytes):
+    """Byte ranges of the top level list items in a yaml file"""
+    ranges = []
+    start = None
+    for m in _top_level_re.finditer(ybytes):
+        if start is not None:
+            ranges.append((start, m.start()))
+            start = None
+        if ybytes.startswith(b"- ", m.start()):
+            start = m.start()
+    if start is not None:
+        ranges.append((start, len(ybytes)))
+    return ranges
+
+
+def _label_index(items):
+    """Inverted label index of the items"""
+    labels = {}
+    for i, item in enumerate(items):
+        for key, value in (dget(item, ["metadata", "labels"]) or {}).items():
+            try:
+                labels.setdefault(key, {}).setdefault(value, []).append(i)
+            except TypeError:
+                # unhashable (invalid) label value
+                pass
+    return labels
+
+
+def _field_index(items):
+    """Inverted index of the INDEXED_FIELDS of the items"""
+    fields = {}
+    for field in INDEXED_FIELDS:
+        by_value = fields[field] = {}
+        keys = field.split(".")
+        for i, item in enumerate(items):
+            by_value.setdefault(field_value(dget(item, keys)), []).append(i)
+    return fields
+
+
+def build_index(yfile, ydata):
+    """Build and save the item index of a List yaml file
+
+    Args:
+        yfile (str): Path of the yaml file
+        ydata (dict): Data loaded from the yaml file
+
+    Returns:
+        list: Item index, None if ydata is not a list or the items
+              in the file could not be mapped to the loaded items
+    """
+    items = dget(ydata, ["items"])
+    if not isinstance(items, list) or not items:
+        return None
+
+    try:
+        stamp = cache.file_stamp(yfile)
+        with vfs.open(yfile, "rb") as y_f:
+            ranges = _item_ranges(y_f.read())
+    except OSError as e:
+        lg.debug("Unable to index {}: {}".format(yfile, e))
+        return None
+
+    if len(ranges) != len(items):
+        # Indented list or a recovered (truncated) yaml
+        lg.debug("Not indexing {}: {} items loaded, {} found".format(
+            yfile, len(items), len(ranges)))
+        return None
+
+    index = [
+        {
+            "name": dget(item, ["metadata", "name"]),
+            "kind": dget(item, ["kind"]),
+            "range": rng
+        }
+        for item, rng in zip(items, ranges)
+    ]
+    cache.dump("item_index", abspath(yfile), stamp, index)
+    cache.dump("label_index", abspath(yfile), stamp, _label_index(items))
+    cache.dump("field_index", abspath(yfile), stamp, _field_index(items))
+    lg.debug("Indexed {} items in {}".format(len(index), yfile))
+    return index
+
+
+def get_index(yfile):
+    """Get the (up to date) item index of a yaml file
+
+    Args:
+        yfile (str): Path of the yaml file
+
+    Returns:
+        list: Item index or None if its not available or stale
+    """
+    try:
+        stamp = cache.file_stamp(yfile)
+    except OSError:
+        return None
+    index = cache.load("item_index", abspath(yfile), stamp)
+    if index is cache.MISS:
+        return None
+    return index
+
+
+def _get_inverted(section, yfile):
+    """Get the (up to date) label or field index of a yaml file"""
+    try:
+        stamp = cache.file_stamp(yfile)
+    except OSError:
+        return None
+    inverted = cache.load(section, abspath(yfile), stamp)
+    if inverted is cache.MISS:
+        return None
+    return inverted
+
+
+def select_labels(yfile, reqs, count):
+    """Positions of the items that match a label selector (using the label index)
+
+    Args:
+        yfile (str): Path of the yaml file
+        reqs (list[tuple]): Parsed label selector (see omg.utils.selector)
+        count (int): Number of items in the item index
+
+    Returns:
+        set[int]: Positions of the matching items, None if the label index
+                  is not available or stale
+    """
+    labels = _get_inverted("label_index", yfile)
+    if labels is None:
+        return None
+
+    selected = set(range(count))
+    for key, op, values in reqs:
+        by_value = labels.get(key, {})
+        if op in ("=", "in", "!=", "notin"):
+            matched = set(i for v in values for i in by_value.get(v, []))
+        else:
+            matched = set(i for pos in by_value.values() for i in pos)
+        if op in ("=", "in", "exists"):
+            selected &= matched
+        else:
+            selected -= matched
+    return selected
+
+
+def select_fields(yfile, reqs, count):
+    """Positions of the items that match a field selector (using the field index)
+
+    Only the requirements on INDEXED_FIELDS are checked, the selected items
+    still have to be matched against the others.
+
+    Args:
+        yfile (str): Path of the yaml file
+        reqs (tuple[tuple]): Parsed field selector (see omg.utils.selector)
+        count (int): Number of items in the item index
+
+    Returns:
+        set[int]: Positions of the (possibly) matching items, None if the
+                  field index is not available or stale
+    """
+    fields = _get_inverted("field_index", yfile)
+    if fields is None:
+        return None
+
+    selected = set(range(count))
+    for field, op, value in reqs:
+        if field not in fields:
+            continue
+        matched = fields[field].get(value, [])
+        if op == "=":
+            selected &= set(matched)
+        else:
+            selected -= set(matched)
+    return selected
+
+
+def load_items(yfile, entries):
+    """Parse specific items of a List yaml file
+
+    Args:
+        yfile (str): Path of the yaml file
+        entries (list[dict]): Index entries of the items to load
+
+    Returns:
+        list[dict]: Loaded items (in the order of entries)
+    """
+    items = []
+    with vfs.open(yfile, "rb") as y_f:
+        for entry in entries:
+            start, end = entry["range"]
+            y_f.seek(start)
+            items.extend(yaml.load(y_f.read(end - start), Loader=SafeLoader))
+    lg.debug("Loaded {} items from {} using item index".format(len(items), yfile))
+    return items
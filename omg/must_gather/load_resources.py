@@ -1,12 +1,67 @@
 """ load_resources.py """
 
-from os.path import getmtime
+from os.path import abspath
 from loguru import logger as lg
 
 from omg.must_gather.locate_yamls import locate_yamls
 from omg.must_gather.exceptions import InvalidResource
-from omg.utils.load_yaml import load_yaml
+from omg.must_gather import item_index
+from omg.utils.load_yaml import load_yaml, load_yaml_skipped, warn_skipped
 from omg.utils.dget import dget
+from omg.utils.selector import match_labels, compile_field_selector
+from omg.utils import cache
+from omg.utils.lru import LRU
+from omg.utils.vfs import getmtime
+from omg.utils.pool import map_ordered
+from omg.utils.profile import timed
+
+
+# Bumped when the layout of the "yaml" cache entries changes
+YAML_CACHE_VERSION = 2
+
+# Selections of up to INDEX_SELECT_ITEMS items, or up to INDEX_SELECT_FRACTION of
+# the items of a yaml, are parsed item by item (using the item index). Parsing
+# an item from the yaml costs about ten times as much as taking it from the
+# (cached) full load, so larger selections are filtered from the full load.
+INDEX_SELECT_ITEMS = 10
+INDEX_SELECT_FRACTION = 0.05
+
+# In-memory LRU of the resources loaded by load_res, see enable_res_cache()
+_res_cache = None
+
+
+def enable_res_cache(maxsize):
+    """Keep the resources loaded by load_res in memory
+
+    This is meant for long running processes (omg serve, omg shell), where
+    the same resources are requested again and again. Up to maxsize
+    load_res results are kept, and served as long as the located yaml
+    files are unchanged (same size and mtime).
+
+    Args:
+        maxsize (int): Maximum number of load_res results to keep
+    """
+    global _res_cache
+    _res_cache = LRU(maxsize)
+
+
+def disable_res_cache():
+    global _res_cache
+    _res_cache = None
+
+
+def _yamls_stamp(yamls):
+    """Stamp of the located yamls, to validate in-memory cached resources"""
+    stamp = []
+    for y in yamls:
+        if type(y) is dict:
+            stamp.append(tuple(sorted(y.items())))
+            continue
+        try:
+            stamp.append((y, cache.file_stamp(y)))
+        except OSError:
+            stamp.append((y, None))
+    return tuple(stamp)
 
 
 def _is_valid_k8_res(res):
@@ -16,7 +71,73 @@ def _is_valid_k8_res(res):
     return False
 
 
-def load_res_from_yaml(yfile, rdef=None):
+def _load_ydata(yfile, index=False):
+    """Load yaml file via the persistent parse cache
+
+    Parsed data is cached keyed by the absolute path of the yaml file,
+    and served only if the size and mtime of the file are unchanged.
+    When a List yaml is parsed, its item index is built as well.
+    For broken yamls, the lines skipped to load them are cached too,
+    so the warning about them is repeated when served from cache.
+
+    Args:
+        yfile (str): Path to a yaml file.
+        index (bool): Build the item index even if data came from cache.
+
+    Returns:
+        (str|list|dict): Python object loaded from yaml
+    """
+    key = abspath(yfile)
+    try:
+        stamp = cache.file_stamp(yfile)
+    except OSError:
+        # let load_yaml handle/report the missing file
+        return load_yaml(yfile)
+
+    stamp = (YAML_CACHE_VERSION,) + stamp
+    entry = cache.load("yaml", key, stamp)
+    if entry is cache.MISS:
+        ydata, skipped = load_yaml_skipped(yfile)
+        cache.dump("yaml", key, stamp, (ydata, skipped))
+        index = True
+    else:
+        ydata, skipped = entry
+        if skipped:
+            warn_skipped(yfile, skipped)
+    if index:
+        item_index.build_index(yfile, ydata)
+    return ydata
+
+
+def _select_indexed(yfile, index, kind, names, selector, field_selector):
+    """Entries of the item index that match kind, names, label and field selectors
+
+    The field selector is only matched for the fields in the field index.
+    Returns None if the label/field index (needed for the selectors) is not
+    available, or if neither names nor the indexes narrow down the items.
+    """
+    selected = None
+    if selector:
+        selected = item_index.select_labels(yfile, selector, len(index))
+        if selected is None:
+            return None
+    if field_selector and any(f in item_index.INDEXED_FIELDS for f, _, _ in field_selector):
+        f_selected = item_index.select_fields(yfile, field_selector, len(index))
+        if f_selected is None:
+            return None
+        selected = f_selected if selected is None else selected & f_selected
+    if selected is None and not names:
+        return None
+    entries = [
+        e for i, e in enumerate(index)
+        if (not names or e["name"] in names)
+        and (kind is None or e["kind"] == kind)
+        and (selected is None or i in selected)
+    ]
+    return entries
+
+
+def load_res_from_yaml(yfile, rdef=None, names=None, selector=None, field_selector=None):
     """Load k8 resources from a single yaml file
 
     The yaml file is expected to be a dict when loaded with yaml.load
@@ -28,17 +149,59 @@ def load_res_from_yaml(yfile, rdef=None):
                               this can be used to filter a specific one.
                               Generally must-gather, yamls only have one type
                               per file, this is just as a precaution.
+
+        names (list[str], optional): Resource names that the caller is interested in.
+                                     If the item index of the yaml is available (and
+                                     only a few items match, see INDEX_SELECT_ITEMS),
+                                     only the matching items are parsed and returned.
+                                     Otherwise all resources are returned.
+
+        selector (list[tuple], optional): Parsed label selector (see omg.utils.selector).
+                                          Only the resources with matching labels are
+                                          returned. If the label index of the yaml is
+                                          available, only the matching items are parsed
+                                          (if only a few items match).
+
+        field_selector (tuple[tuple], optional): Parsed field selector (see omg.utils.selector).
+                                                 Only the matching resources are returned.
+                                                 The field index is used like the label index.
     Return:
-        list[dict]: list of dictionary [ {'res': <>, 'yfile_ts': <>, rdef}, ...]
+        list[dict]: list of dictionary [ {'res': <>, 'yfile_ts': <>, 'yfile': <>, rdef}, ...]
                         res:       k8 resource
                         yfile_ts:   timestamp of the yaml file from
                                     which the resource was loaded
                                     (used for age calculation)
+                        yfile:      yaml file from which the resource was loaded
+                                    (used to pass the yaml through as is, see o_raw)
                         rdef:       resrouce definition of the resource
     """
     lg.debug("FUNC_INIT: {}".format(locals()))
 
-    ydata = load_yaml(yfile)
+    kind = dget(rdef, ["kind"])
+
+    match_fields = compile_field_selector(field_selector) if field_selector else None
+
+    index = None
+    if names or selector or field_selector:
+        index = item_index.get_index(yfile)
+        entries = None
+        if index is not None:
+            entries = _select_indexed(yfile, index, kind, names, selector, field_selector)
+        if entries is not None and len(entries) > max(
+                INDEX_SELECT_ITEMS, INDEX_SELECT_FRACTION * len(index)):
+            lg.debug("{} of {} items selected, loading all".format(len(entries), len(index)))
+            entries = None
+        if entries is not None:
+            items = item_index.load_items(yfile, entries)
+            yfile_ts = getmtime(yfile)
+            return [
+                {"res": r, "yfile_ts": yfile_ts, "yfile": yfile, "rdef": rdef}
+                for r in items
+                if match_fields is None or match_fields(r)
+            ]
+
+    # No item index for name/label/field lookup, index it for the next time
+    ydata = _load_ydata(yfile, index=bool(names or selector or field_selector) and index is None)
 
     if not _is_valid_k8_res(ydata):
         raise InvalidResource(
@@ -49,8 +212,6 @@ def load_res_from_yaml(yfile, rdef=None):
     yfile_ts = getmtime(yfile)
     lg.debug("Yaml file's timestamp: {}".format(yfile_ts))
 
-    kind = dget(rdef, ["kind"])
-
     res = []
     # List in yaml (kind: List)
     if "items" in ydata:
@@ -60,7 +221,7 @@ def load_res_from_yaml(yfile, rdef=None):
         if ydata["items"] is not None and len(ydata["items"]) > 0:
             res.extend(
                 [
-                    {"res": r, "yfile_ts": yfile_ts, "rdef": rdef}
+                    {"res": r, "yfile_ts": yfile_ts, "yfile": yfile, "rdef": rdef}
                     for r in ydata["items"]
                     if kind is None or ("kind" in r and r["kind"] == kind)
                 ])
@@ -74,20 +235,45 @@ def load_res_from_yaml(yfile, rdef=None):
         lg.debug("ydata.keys(): {}".format(ydata.keys()))
 
         if kind is None or ("kind" in ydata and ydata["kind"] == kind):
-            res.extend([{"res": ydata, "yfile_ts": yfile_ts, "rdef": rdef}])
+            res.extend([{"res": ydata, "yfile_ts": yfile_ts, "yfile": yfile, "rdef": rdef}])
         else:
             lg.warning("Yaml file {} didnt contain kind {}".format(yfile, kind))
     else:
         raise InvalidResource(
             "Invalid yaml file {}. Didn't get 'items' or 'metadata'".format(yfile))
 
+    if selector:
+        res = [
+            r for r in res
+            if match_labels(selector, dget(r, ["res", "metadata", "labels"]))
+        ]
+    if match_fields:
+        res = [r for r in res if match_fields(r["res"])]
+
     lg.debug("resources loaded length: {}".format(len(res)))
     lg.trace("res: {}".format(res))
 
     return res
 
 
-def load_res(path, r_type, r_name=None, ns=None):
+def _load_res_from_yaml_worker(args):
+    """load_res_from_yaml wrapper that can be used in worker processes
+
+    Args:
+        args (tuple): (yfile, rdef, names, selector, field_selector)
+
+    Returns:
+        tuple: (resources, None) or (None, InvalidResource) on failure
+    """
+    yfile, rdef, names, selector, field_selector = args
+    try:
+        return load_res_from_yaml(yfile, rdef, names, selector, field_selector), None
+    except InvalidResource as e:
+        return None, e
+
+
+@timed("load_res")
+def load_res(path, r_type, r_name=None, ns=None, selector=None, field_selector=None):
     """Load specific resource type from a must-gather path
 
     This function first calls locate yamls to locate the yamls of the
@@ -108,12 +294,20 @@ def load_res(path, r_type, r_name=None, ns=None):
                   '_all' would mean all namespaces.
                   Ignored for cluster scoped resource types.
 
+        selector (list[tuple], optional): Parsed label selector (see omg.utils.selector)
+                                          to filter the resources by labels.
+
+        field_selector (tuple[tuple], optional): Parsed field selector (see omg.utils.selector)
+                                                 to filter the resources by fields.
+
     Returns:
-        list[dict]: list of dictionary [ {'res': <>, 'yfile_ts': <>, rdef}, ...]
+        list[dict]: list of dictionary [ {'res': <>, 'yfile_ts': <>, 'yfile': <>, rdef}, ...]
                         res:       k8 resource
                         yfile_ts:   timestamp of the yaml file from
                                     which the resource was loaded
                                     (used for age calculation)
+                        yfile:      yaml file from which the resource was loaded
+                                    (used to pass the yaml through as is, see o_raw)
                         rdef:       resrouce definition of the resource
     """
     lg.debug("FUNC_INIT: {}".format(locals()))
@@ -122,6 +316,25 @@ def load_res(path, r_type, r_name=None, ns=None):
 
     lg.debug("Found {} yamls".format(len(yamls)))
 
+    if _res_cache is not None:
+        key = (
+            path, r_type, ns, tuple(r_name) if r_name else None,
+            tuple(selector) if selector else None, field_selector
+        )
+        stamp = _yamls_stamp(yamls)
+        cached = _res_cache.get(key)
+        if cached is not None and cached[0] == stamp:
+            lg.debug("Resources served from memory: {}".format(key))
+            return list(cached[1])
+
+    # Parse the yamls (concurrently, if -j/--jobs > 1)
+    # Partial namespace directories with missing yaml are handled below
+    loaded = map_ordered(
+        _load_res_from_yaml_worker,
+        [(y, rdef, r_name, selector, field_selector) for y in yamls if type(y) is not dict]
+    )
+    loaded.reverse()
+
     # Load resources from these yamls and save in res
     # after filtering names if r_name is set
     res = []
@@ -152,11 +365,16 @@ def load_res(path, r_type, r_name=None, ns=None):
                     }
                 }
             }]
+            if selector and not match_labels(selector, None):
+                continue
+            if field_selector and not compile_field_selector(field_selector)(res_yd[0]["res"]):
+                continue
+        elif type(y) is dict:
+            continue
         else:
-            try:
-                res_yd = load_res_from_yaml(y, rdef)
-            except InvalidResource as e:
-                lg.warning(e)
+            res_yd, err = loaded.pop()
+            if err:
+                lg.warning(err)
                 continue
 
         if not r_name:
@@ -184,4 +402,53 @@ def load_res(path, r_type, r_name=None, ns=None):
 
         lg.info("{}/{} from yaml file: {}".format(matched, matched+not_matched, y))
 
+    if _res_cache is not None:
+        _res_cache.put(key, (stamp, list(res)))
     return res
+
+
+def load_res_names(path, r_type, ns=None):
+    """Load names of a specific resource type from a must-gather path
+
+    Names are taken from the item index of the yamls where available,
+    so the resources don't have to be parsed at all.
+
+    Args:
+        path (str): Absolute must-gather path
+
+        r_type (str): Resource type e.g, pod, node.
+
+        ns (str): Namespace if the the object is namespace scoped.
+                  '_all' would mean all namespaces.
+                  Ignored for cluster scoped resource types.
+
+    Returns:
+        list[str]: Names of the resources
+    """
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    rdef, yamls = locate_yamls(path, r_type, ns=ns)
+    kind = dget(rdef, ["kind"])
+
+    names = []
+    for y in yamls:
+        if type(y) is dict:
+            names.append(dget(y, ["yaml_missing"]))
+            continue
+        index = item_index.get_index(y)
+        if index is not None:
+            names.extend([
+                e["name"] for e in index
+                if e["name"] and (kind is None or e["kind"] == kind)
+            ])
+            continue
+        try:
+            res_yd = load_res_from_yaml(y, rdef)
+        except InvalidResource as e:
+            lg.warning(e)
+            continue
+        for r in res_yd:
+            name = dget(r, ["res", "metadata", "name"])
+            if name:
+                names.append(name)
+    return names
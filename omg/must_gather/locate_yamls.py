@@ -15,12 +15,18 @@ yaml files are located calculated as per following pattern:
                 [plural.yaml | plural/*.yaml]
 
 _detect_yamls "detects" if plural.yaml is present or plural/*.yaml
+
+If the layout index of the must-gather (see mg_index.py) is available,
+yamls are located from the index, and the filesystem is only looked at
+for the directories that changed since the index was built.
 """
 
-from os.path import join, isdir, isfile
-from os import listdir
+from os.path import join
 from loguru import logger as lg
+from omg.utils.vfs import isdir, isfile, listdir
+from omg.utils.profile import timed
 from omg.must_gather.get_rdef import get_rdef
+from omg.must_gather.mg_index import get_index, lookup, fresh
 from omg.must_gather.exceptions import UnkownResourceType, NameSpaceRequired
 
 
@@ -78,6 +84,31 @@ def locate_project(path, tell):
     """
     lg.debug("FUNC_INIT: {}".format(locals()))
     result = []
+
+    index = get_index(path)
+    if index is not None:
+        lg.debug("Looking for projects in layout index of {}".format(path))
+        p_nss = join(path, "namespaces")
+        for proj, proj_idx in index["namespaces"].items():
+            if tell == "names":
+                result.append(proj)
+            elif tell == "paths":
+                result.append(join(p_nss, proj))
+            elif tell == "yamls":
+                p_nss_proj = join(p_nss, proj)
+                if not fresh(index, [p_nss_proj]):
+                    has_yaml = isfile(join(p_nss_proj, proj+".yaml"))
+                else:
+                    has_yaml = proj_idx["yaml"]
+                if has_yaml:
+                    result.append(join(p_nss, proj, proj+".yaml"))
+                else:
+                    result.append({"yaml_missing": proj})
+            else:
+                raise ValueError("Invalid arg(tell): {}".format(tell))
+        lg.trace("result: {}".format(result))
+        return result
+
     lg.debug("Looking for projects in {}".format(path))
     p_nss = join(path, "namespaces")
     if isdir(p_nss):
@@ -105,6 +136,7 @@ def locate_project(path, tell):
     return result
 
 
+@timed("locate_yamls")
 def locate_yamls(path, r_type, ns=None):
     """Find yaml for a particular resource type in paths.
 
@@ -145,11 +177,21 @@ def locate_yamls(path, r_type, ns=None):
         group = rdef["group"]
         scope = rdef["scope"]
 
+        index = get_index(path)
+
         if scope == "Namespaced":
             if not ns:
                 raise NameSpaceRequired(
                     "{} is Namespaced but ns/project is not set".format(r_type))
-            if ns == "_all":  # all namespaces
+            if index is not None:
+                nss = list(index["namespaces"]) if ns == "_all" else [ns]
+                for ns_name in nss:
+                    ymls = lookup(index, path, ns_name, group, plural)
+                    if ymls is None:
+                        ymls = _detect_yamls(join(path, "namespaces", ns_name, group), plural)
+                    if ymls:
+                        yaml_paths.extend(ymls)
+            elif ns == "_all":  # all namespaces
                 all_proj_paths = locate_project(path, tell="paths")
                 for app in all_proj_paths:
                     ymls = _detect_yamls(join(app, group), plural)
@@ -159,6 +201,13 @@ def locate_yamls(path, r_type, ns=None):
                 ymls = _detect_yamls(join(path, "namespaces", ns, group), plural)
                 if ymls:
                     yaml_paths.extend(ymls)
+        elif index is not None:
+            # scope == "Cluster"
+            ymls = lookup(index, path, None, group, plural)
+            if ymls is None:
+                ymls = _detect_yamls(join(path, "cluster-scoped-resources", group), plural)
+            if ymls:
+                yaml_paths.extend(ymls)
         else:
             # scope == "Cluster"
             ymls = _detect_yamls(join(path, "cluster-scoped-resources", group), plural)
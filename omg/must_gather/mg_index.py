@@ -0,0 +1,238 @@
+""" mg_index.py
+
+Layout index (manifest) of a must-gather path.
+
+Locating yamls of a resource type requires isdir/isfile/listdir calls
+on every invocation, which adds up quickly with -A and on slow (NFS)
+mounts. Instead, we walk the must-gather once (at `omg use` time) and
+save every namespace -> group -> plural -> yaml file mapping in the
+persistent cache (see omg.utils.cache).
+
+The index looks like:
+
+    {
+        "namespaces": {
+            <ns>: {
+                "yaml": <ns>.yaml is present (bool),
+                "groups": { <group>: { <plural>: [yaml paths] } }
+            }
+        },
+        "cluster": { <group>: { <plural>: [yaml paths] } },
+        "dirs": { <namespace, group or plural dir>: mtime_ns }
+    }
+
+The index is stamped with the mtime of the must-gather path and its
+namespaces/cluster-scoped-resources directories. If any of these change
+(e.g, a namespace is added), the index is stale and is not used. These
+are checked once per process, below them the index is trusted (run
+`omg use` again after adding files to a must-gather).
+
+Long running processes (omg serve/shell) see set_check_interval(): the
+root directories are checked again every few seconds, and so are the
+directories of every lookup (see lookup()). If the mtime of a directory
+differs from the one in "dirs", the filesystem is used for that lookup.
+"""
+
+import time
+from os.path import join
+from loguru import logger as lg
+from omg.utils.vfs import isdir, isfile, listdir, stat
+from omg.utils import cache
+
+# Bumped when the layout of the index changes, so older cached indexes are not used
+INDEX_VERSION = 2
+
+# Seconds between checks of the must-gather dirs in long running processes
+CHECK_INTERVAL = 2
+
+# Seconds between checks, None if the dirs are checked only once (see set_check_interval)
+_check_interval = None
+
+# Process wide memo of loaded indexes {path: (time checked, stamp, index)}
+_indexes = {}
+
+# mtimes of the dirs checked by lookups {dir: (time checked, mtime)}
+_checked = {}
+
+
+def set_check_interval(seconds=CHECK_INTERVAL):
+    """Check the must-gather dirs again every `seconds` (long running processes)
+
+    Args:
+        seconds (float): Seconds between checks, None to check the root dirs
+                         only once and trust the index below them (the default)
+    """
+    global _check_interval
+    _check_interval = seconds
+    _checked.clear()
+
+
+def _expired(checked):
+    return _check_interval is not None and time.monotonic() - checked >= _check_interval
+
+
+def _mtime(d):
+    try:
+        return stat(d).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _checked_mtime(d):
+    """mtime of a dir, stat-ed at most once per check interval"""
+    if d not in _checked or _expired(_checked[d][0]):
+        _checked[d] = (time.monotonic(), _mtime(d))
+    return _checked[d][1]
+
+
+def _stamp(path):
+    """mtime of the must-gather root dirs, used to detect stale index"""
+    return (INDEX_VERSION,) + tuple(
+        _mtime(d)
+        for d in (path, join(path, "namespaces"), join(path, "cluster-scoped-resources"))
+    )
+
+
+def _index_groups(gpath, dirs):
+    """Index plural.yaml and plural/*.yaml in every group dir under gpath
+
+    plural.yaml is given priority over plural/*.yaml (same as _detect_yamls)
+    """
+    dirs[gpath] = _mtime(gpath)
+    groups = {}
+    for group in listdir(gpath):
+        p_group = join(gpath, group)
+        if not isdir(p_group):
+            continue
+        dirs[p_group] = _mtime(p_group)
+        plurals = {}
+        entries = listdir(p_group)
+        for e in entries:
+            p_e = join(p_group, e)
+            if e.endswith(".yaml") and isfile(p_e):
+                plurals[e[:-len(".yaml")]] = [p_e]
+        for e in entries:
+            p_e = join(p_group, e)
+            if e not in plurals and isdir(p_e):
+                dirs[p_e] = _mtime(p_e)
+                plurals[e] = [join(p_e, y) for y in listdir(p_e) if y.endswith(".yaml")]
+        groups[group] = plurals
+    return groups
+
+
+def fresh(index, dirs):
+    """True if the directories are unchanged since the index was built
+
+    Always True unless a check interval is set (see set_check_interval).
+    """
+    if _check_interval is None:
+        return True
+    return all(index["dirs"].get(d) == _checked_mtime(d) for d in dirs)
+
+
+def lookup(index, path, ns, group, plural):
+    """Yamls of group/plural in a namespace (or cluster scoped) from the index
+
+    Args:
+        index (dict): Layout index of path
+        path (str): Absolute must-gather path
+        ns (str): Namespace, None for cluster scoped resources
+        group (str): API group
+        plural (str): Plural name of the resource type
+
+    Returns:
+        list[str]: Yaml paths, None if the directories changed since the
+                   index was built (the filesystem has to be used, only
+                   checked if a check interval is set)
+    """
+    if ns is None:
+        gpath = join(path, "cluster-scoped-resources")
+        groups = index["cluster"]
+    else:
+        if ns not in index["namespaces"]:
+            # New namespaces make the whole index stale
+            return []
+        gpath = join(path, "namespaces", ns)
+        groups = index["namespaces"][ns]["groups"]
+    check = [gpath]
+    if group in groups:
+        check.append(join(gpath, group))
+        if join(gpath, group, plural) in index["dirs"]:
+            check.append(join(gpath, group, plural))
+    if not fresh(index, check):
+        lg.debug("Layout index of {} is stale, using filesystem".format(gpath))
+        return None
+    return list(groups.get(group, {}).get(plural) or [])
+
+
+def build_index(path):
+    """Walk a must-gather path and build its layout index
+
+    Args:
+        path (str): Absolute must-gather path
+
+    Returns:
+        dict: Layout index of the must-gather
+    """
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    index = {"namespaces": {}, "cluster": {}, "dirs": {}}
+
+    p_nss = join(path, "namespaces")
+    if isdir(p_nss):
+        for ns in listdir(p_nss):
+            p_ns = join(p_nss, ns)
+            if isdir(p_ns):
+                index["namespaces"][ns] = {
+                    "yaml": isfile(join(p_ns, ns + ".yaml")),
+                    "groups": _index_groups(p_ns, index["dirs"])
+                }
+
+    p_csr = join(path, "cluster-scoped-resources")
+    if isdir(p_csr):
+        index["cluster"] = _index_groups(p_csr, index["dirs"])
+
+    lg.debug("Indexed {} namespaces and {} directories in {}".format(
+        len(index["namespaces"]), len(index["dirs"]), path))
+    return index
+
+
+def save_index(path):
+    """Build the layout index of a must-gather path and save it in cache
+
+    Args:
+        path (str): Absolute must-gather path
+    """
+    stamp = _stamp(path)
+    index = build_index(path)
+    cache.dump("mg_index", path, stamp, index)
+    _indexes[path] = (time.monotonic(), stamp, index)
+    _checked.clear()
+
+
+def get_index(path):
+    """Get the (up to date) layout index of a must-gather path
+
+    The index is loaded once per process. The must-gather root dirs are
+    checked when it is loaded, and again after the check interval in long
+    running processes (see set_check_interval), where the index is dropped
+    if they changed.
+
+    Args:
+        path (str): Absolute must-gather path
+
+    Returns:
+        dict: Layout index or None if its not available or stale
+    """
+    if path in _indexes and not _expired(_indexes[path][0]):
+        return _indexes[path][2]
+    stamp = _stamp(path)
+    if path not in _indexes or _indexes[path][1] != stamp:
+        index = cache.load("mg_index", path, stamp)
+        if index is cache.MISS:
+            lg.debug("No valid layout index for {}, using filesystem".format(path))
+            index = None
+    else:
+        index = _indexes[path][2]
+    _indexes[path] = (time.monotonic(), stamp, index)
+    return index
@@ -1,13 +1,16 @@
 import os
 from loguru import logger as lg
 from omg.must_gather.exceptions import NoValidMgFound
+from omg.utils import vfs
+from omg.utils.profile import timed
 
 
+@timed("scan_mg")
 def scan_mg(tdirs):
     """Scan directories for valid must-gather/inspect directories
 
     Args:
-        tdirs (tuple[str]): Non-empty tuple of directory paths to scan
+        tdirs (tuple[str]): Non-empty tuple of directory (or archive) paths to scan
 
     Returns:
         list: List of valid (absolute) must-gather/inspect directories
@@ -17,13 +20,13 @@ def scan_mg(tdirs):
     valid_dirs = []
     for tdir in tdirs:
         vdirs = []
-        if os.path.isdir(tdir):
+        if vfs.isdir(tdir):
             scan_q = [tdir]
             while len(scan_q) > 0:
                 lg.debug('scan_q: ' + str(scan_q))
                 wdir = scan_q.pop()
-                subdirs = [d for d in os.listdir(wdir)
-                           if os.path.isdir(os.path.join(wdir, d))]
+                subdirs = [d for d in vfs.listdir(wdir)
+                           if vfs.isdir(os.path.join(wdir, d))]
                 if ("cluster-scoped-resources" in subdirs or "namespaces" in subdirs):
                     lg.debug('Valid dir found: ' + str(wdir))
                     vdirs.append(os.path.abspath(wdir))
@@ -41,7 +44,7 @@ def scan_mg(tdirs):
                         scan_q.append(os.path.join(wdir, sd))
 
                     # if namespaces/all/namespaces exists we will mark it valid as well
-                    if os.path.isdir(os.path.join(wdir, "namespaces", "all", "namespaces")):
+                    if vfs.isdir(os.path.join(wdir, "namespaces", "all", "namespaces")):
                         vdirs.append(os.path.abspath(os.path.join(wdir, "namespaces", "all")))
 
                 else:
@@ -0,0 +1,139 @@
+""" client.py
+
+Forward omg commands to the omg serve daemon (see omg.serve.server).
+
+This module is imported by every omg invocation (see omg.cli.main),
+so it only uses the standard library and imports socket/json only if a
+daemon socket exists.
+
+The stdout and stderr file descriptors of the client are passed to the
+daemon along with the command (SCM_RIGHTS), so the daemon writes the
+output directly to the terminal/pipe of the client. The client then
+waits for the exit code of the command. If the client goes away (e.g,
+Ctrl-C) the connection is closed, which stops the command in the daemon.
+"""
+
+import os
+import sys
+import tempfile
+
+# Commands that are forwarded to the daemon
+FORWARDED = ("get", "logs", "projects", "project", "events")
+
+# Options of the main omg group that take a value
+_GROUP_OPTS = ("-l", "--loglevel", "-P", "--path", "-n", "--namespace", "-j", "--jobs",
+               "--profile-format", "--profile-output")
+
+# Environment variables that are passed on to the daemon
+_ENV = ("_OMG_COMPLETE", "COMP_WORDS", "COMP_CWORD", "COLUMNS", "NO_COLOR")
+
+# Maximum size of a request
+MAX_REQUEST = 1024 * 1024
+
+
+def socket_path():
+    """Path of the (per user) daemon socket, $OMG_SOCKET if set"""
+    return os.getenv("OMG_SOCKET") or os.path.join(
+        os.getenv("XDG_RUNTIME_DIR") or tempfile.gettempdir(),
+        "omg-{}.sock".format(os.getuid())
+    )
+
+
+def _subcommand(argv):
+    """First (sub)command in argv, skipping the options of the omg group"""
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in _GROUP_OPTS:
+            skip = True
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def _connect(path):
+    """Connect to the daemon socket, None if it is not running (or not ours)"""
+    try:
+        if os.stat(path).st_uid != os.getuid():
+            return None
+    except OSError:
+        return None
+
+    import socket
+    if not hasattr(socket, "send_fds"):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        # Stale socket
+        sock.close()
+        return None
+    return sock
+
+
+def request(sock, req, fds=()):
+    """Send a request (with file descriptors) and wait for the response
+
+    Returns:
+        dict: Response, None if the connection was closed without one
+    """
+    import json
+    import socket
+    socket.send_fds(sock, [json.dumps(req).encode() + b"\n"], list(fds))
+    resp = b""
+    while not resp.endswith(b"\n"):
+        data = sock.recv(4096)
+        if not data:
+            return None
+        resp += data
+    return json.loads(resp)
+
+
+def forward(argv):
+    """Run an omg command in the daemon, if it is running
+
+    Args:
+        argv (list[str]): omg arguments e.g, ["get", "pods", "-A"]
+
+    Returns:
+        int: Exit code of the command, None if it was not forwarded
+    """
+    if os.getenv("OMG_NO_SERVE"):
+        return None
+    if "_OMG_COMPLETE" not in os.environ and _subcommand(argv) not in FORWARDED:
+        return None
+
+    sock = _connect(socket_path())
+    if sock is None:
+        return None
+
+    env = {k: v for k, v in os.environ.items() if k.startswith("OMG") or k in _ENV}
+    req = {"argv": argv, "cwd": os.getcwd(), "env": env}
+    with sock:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            resp = request(sock, req, (sys.stdout.fileno(), sys.stderr.fileno()))
+        except KeyboardInterrupt:
+            # Closing the connection stops the command in the daemon
+            return 130
+    if resp is None:
+        sys.stderr.write("omg serve: connection closed before the command finished\n")
+        return 1
+    return resp["rc"]
+
+
+def stop():
+    """Stop the daemon
+
+    Returns:
+        bool: True if the daemon was running
+    """
+    sock = _connect(socket_path())
+    if sock is None:
+        return False
+    with sock:
+        request(sock, {"stop": True})
+    return True
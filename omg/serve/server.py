@@ -0,0 +1,294 @@
+""" server.py
+
+omg serve: Daemon that runs omg commands, keeping state in memory.
+
+Every omg invocation has to start python, import omg, load the config and
+(at least) load the parse cache of the yamls it needs. During an incident,
+hundreds of commands are run against the same must-gather. The daemon
+keeps the imported modules, resource definitions, config, must-gather
+indexes and the resources loaded by get commands (an LRU of load_res
+results, see enable_res_cache) in memory.
+
+The daemon loads what a command needs (in the cwd and environment of the
+client), then runs the command in a forked child that shares all of it
+(copy-on-write). So resources are loaded once by the daemon, while the
+output, which can take as long as the client takes to read it, is written
+by the child.
+
+The daemon listens on a per user unix socket (see client.socket_path).
+Commands (see client.FORWARDED) and shell completions are forwarded to
+it by omg.cli.main, and run with the stdout/stderr of the client. A slow
+or paused client (e.g, `omg logs <pod> | less`) only holds up its own
+child, which is stopped when the client hangs up (e.g, on Ctrl-C).
+If the daemon is not running, commands run directly as usual.
+"""
+
+import os
+import sys
+import json
+import socket
+import struct
+import threading
+import traceback
+from contextlib import contextmanager, nullcontext
+from importlib import import_module
+from loguru import logger as lg
+from omg.config import config, logging
+from omg.must_gather import mg_index
+from omg.must_gather.load_resources import enable_res_cache
+from omg.serve.client import socket_path, _connect, _subcommand, MAX_REQUEST, _ENV
+
+# Modules of the forwarded commands, imported once by the daemon
+_PRELOAD = (
+    "omg.get.get", "omg.get.complete", "omg.log.log", "omg.log.complete",
+    "omg.project.project", "omg.project.projects", "omg.project.complete",
+    "omg.events.timeline",
+)
+
+
+def _peer_uid(conn):
+    """uid of the process on the other end of the socket (Linux only), None if unknown"""
+    try:
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    except (AttributeError, OSError):
+        return None
+    return struct.unpack("3i", creds)[1]
+
+
+def _recv_request(conn):
+    """Receive a request and the file descriptors passed with it"""
+    msg, fds, _, _ = socket.recv_fds(conn, MAX_REQUEST, 2)
+    while msg and not msg.endswith(b"\n") and len(msg) < MAX_REQUEST:
+        data = conn.recv(MAX_REQUEST)
+        if not data:
+            break
+        msg += data
+    return json.loads(msg), fds
+
+
+def _set_env(env):
+    """Set the environment of the client (OMG* and completion variables)"""
+    for k in list(os.environ):
+        if (k.startswith("OMG") or k in _ENV) and k not in env:
+            del os.environ[k]
+    os.environ.update(env)
+
+
+@contextmanager
+def _client_env(req):
+    """Run in the cwd and environment of the client"""
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    try:
+        os.chdir(req["cwd"])
+        _set_env(req["env"])
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+
+
+def _run(req, fds):
+    """Run an omg command with the stdout/stderr of the client
+
+    Returns:
+        int: Exit code
+    """
+    from omg.cli import cli, run
+
+    saved_loglevel = logging.current_loglevel
+    saved_out, saved_err = sys.stdout, sys.stderr
+    sys.stdout = open(fds[0], "w", closefd=True)
+    sys.stderr = open(fds[1], "w", closefd=True)
+    rc = 0
+    try:
+        with _client_env(req):
+            instruction = os.getenv("_OMG_COMPLETE")
+            if instruction:
+                # cli.main() would exit the process (os._exit) after completing
+                from click.shell_completion import shell_complete
+                config.reset_options()
+                rc = shell_complete(cli, {}, "omg", "_OMG_COMPLETE", instruction)
+            else:
+                rc = run(req["argv"])
+    except BrokenPipeError:
+        # The client (or the reader of its output) is gone
+        rc = 1
+    except Exception:
+        traceback.print_exc()
+        rc = 1
+    finally:
+        for f in (sys.stdout, sys.stderr):
+            try:
+                f.close()
+            except OSError:
+                pass
+        sys.stdout, sys.stderr = saved_out, saved_err
+        # Commands setup logging to the stderr of the client
+        logging.setup_logging(saved_loglevel)
+    return rc
+
+
+def _watch_hangup(conn):
+    """Exit (the child) if the client closes the connection before the command is done"""
+    try:
+        data = conn.recv(1)
+    except OSError:
+        data = b""
+    if not data:
+        os._exit(1)
+
+
+def _child(server, conn, req, fds):
+    """Run a request in the forked child and exit"""
+    rc = 1
+    try:
+        server.close()
+        threading.Thread(target=_watch_hangup, args=(conn,), daemon=True).start()
+        rc = _run(req, fds)
+        conn.sendall(json.dumps({"rc": rc}).encode() + b"\n")
+    except BaseException:
+        pass
+    finally:
+        os._exit(rc)
+
+
+def _preload(argv):
+    """Load the resources of a get command into the in-memory LRU (see enable_res_cache)
+
+    The arguments are parsed like the command would, and the same load_res
+    calls are made, so that the command finds its resources in memory.
+    """
+    from omg.cli import cli, _configure
+    from omg.get import get
+
+    with cli.make_context("omg", list(argv), resilient_parsing=True) as ctx:
+        name, cmd, args = cli.resolve_command(ctx, ctx.protected_args + ctx.args)
+        sub = cmd.make_context(name, args, parent=ctx, resilient_parsing=True)
+        for params in (ctx.params, sub.params):
+            _configure(
+                path=params.get("path"), namespace=params.get("namespace"),
+                all_namespaces=params.get("all_namespaces"), jobs=params.get("jobs"))
+        get.load(sub.params.get("objects") or (), sub.params.get("selector"),
+                 sub.params.get("field_selector"))
+
+
+def _warm(req=None):
+    """Load what a request needs in the daemon, for the children to share
+
+    The config and must-gather indexes (and the resources of get commands)
+    are loaded in the cwd and environment of the client. Errors are left
+    for the command to report.
+
+    Args:
+        req (dict, optional): Request, the config of the daemon is loaded if None
+    """
+    lg.disable("omg")
+    try:
+        with _client_env(req) if req else nullcontext():
+            cfg = config.get()
+            for path in cfg["paths"]:
+                mg_index.get_index(path)
+            if req and _subcommand(req["argv"]) == "get":
+                _preload(req["argv"])
+    except (Exception, SystemExit):
+        pass
+    finally:
+        config.reset_options()
+        lg.enable("omg")
+
+
+def _reap():
+    """Reap the children that are done"""
+    while True:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+
+
+def _handle(server, conn):
+    """Handle a client connection
+
+    Returns:
+        bool: True if the daemon should stop
+    """
+    uid = _peer_uid(conn)
+    if uid is not None and uid != os.getuid():
+        lg.warning("Rejected connection from uid {}".format(uid))
+        return False
+
+    req, fds = _recv_request(conn)
+    stop = bool(req.get("stop"))
+    if stop or len(fds) != 2:
+        for fd in fds:
+            os.close(fd)
+        conn.sendall(json.dumps({"rc": 0 if stop else 2}).encode() + b"\n")
+        return stop
+
+    lg.info("Running: omg {}".format(" ".join(req["argv"])))
+    _warm(req)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if os.fork() == 0:
+        _child(server, conn, req, fds)
+    for fd in fds:
+        os.close(fd)
+    return False
+
+
+def serve(path=None, cache_size=128):
+    """Run the daemon (in the foreground) until it is stopped
+
+    Args:
+        path (str, optional): Socket path, see client.socket_path
+        cache_size (int, optional): Loaded resource lists to keep in memory
+    """
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    path = path or socket_path()
+    if os.path.exists(path):
+        sock = _connect(path)
+        if sock is not None:
+            sock.close()
+            lg.error("omg serve is already running on {}".format(path))
+            raise SystemExit(1)
+        os.unlink(path)
+
+    for module in _PRELOAD:
+        import_module(module)
+    enable_res_cache(cache_size)
+    mg_index.set_check_interval()
+    _warm()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen()
+    lg.success("omg serve listening on {}".format(path))
+
+    try:
+        while True:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    if _handle(server, conn):
+                        break
+                except (OSError, ValueError) as e:
+                    lg.warning("Request failed: {}".format(e))
+            _reap()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    lg.success("omg serve stopped")
@@ -0,0 +1,150 @@
+""" shell.py
+
+omg shell: Interactive shell that runs omg commands in the same process.
+
+The config, resource definitions, must-gather indexes and the resources
+loaded by previous commands are kept in memory, so repeating a command
+(e.g, `get pods -A`) doesn't load anything again. Loaded resources are
+kept in an LRU over (path, r_type, ns, ...) entries (see enable_res_cache),
+so the memory used stays bounded.
+
+Commands are the same as the omg subcommands, without the `omg` prefix:
+
+    omg> get pods -A
+    omg> logs -n openshift-etcd etcd-master-0 -c etcd --tail 10
+    omg> machine-config compare rendered-master-a rendered-master-b
+"""
+
+import os
+import shlex
+from loguru import logger as lg
+from omg.must_gather import mg_index
+from omg.must_gather.load_resources import enable_res_cache, disable_res_cache
+
+try:
+    import readline
+except ImportError:
+    readline = None
+
+HISTORY_FILE = os.path.join(os.getenv("HOME") or "", ".omg_history")
+
+PROMPT = "omg> "
+
+# Commands that can't be run inside the shell
+_NOT_IN_SHELL = ("shell", "serve", "completion")
+
+
+def _completer(text, state):
+    """readline completer that uses the shell completion of the omg commands"""
+    from click.shell_completion import ShellComplete
+    from omg.cli import cli
+
+    if state == 0:
+        line = readline.get_line_buffer()[:readline.get_endidx()]
+        try:
+            args = shlex.split(line)
+        except ValueError:
+            args = line.split()
+        if args and not line.endswith(" "):
+            args = args[:-1]
+        try:
+            comp = ShellComplete(cli, {}, "omg", "_OMG_COMPLETE")
+            _completer.matches = [c.value for c in comp.get_completions(args, text)]
+        except Exception as e:
+            lg.debug("completion failed: {}".format(e))
+            _completer.matches = []
+    if state < len(_completer.matches):
+        return _completer.matches[state]
+    return None
+
+
+def _setup_readline():
+    if readline is None:
+        return
+    readline.set_completer(_completer)
+    readline.set_completer_delims(" \t\n")
+    readline.parse_and_bind("tab: complete")
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+
+
+def _save_history():
+    if readline is None:
+        return
+    try:
+        readline.write_history_file(HISTORY_FILE)
+    except OSError as e:
+        lg.debug("Unable to save history: {}".format(e))
+
+
+def run_line(line):
+    """Run a line of input
+
+    Args:
+        line (str): omg command without `omg` e.g, "get pods -A"
+
+    Returns:
+        bool: False if the shell should exit
+    """
+    from omg.cli import run
+
+    try:
+        argv = shlex.split(line)
+    except ValueError as e:
+        lg.error(e)
+        return True
+    if argv and argv[0] == "omg":
+        argv = argv[1:]
+    if not argv:
+        return True
+    if argv[0] in ("exit", "quit"):
+        return False
+    if argv[0] == "help":
+        argv = ["--help"]
+    if argv[0] in _NOT_IN_SHELL:
+        lg.error("{} can not be used in omg shell".format(argv[0]))
+        return True
+
+    try:
+        run(argv)
+    except KeyboardInterrupt:
+        print()
+    except Exception as e:
+        # A failing command doesn't end the shell (and what it keeps in memory)
+        lg.error("{}: {}".format(type(e).__name__, e))
+        lg.opt(exception=True).debug("Command failed: {}".format(line))
+    return True
+
+
+def cmd(cache_size, read=input):
+    """Run the shell until exit/quit or EOF
+
+    Args:
+        cache_size (int): Number of load_res results to keep in memory
+        read (callable): Function that reads a line of input (given the prompt)
+    """
+    lg.debug("FUNC_INIT: {}".format(locals()))
+
+    enable_res_cache(cache_size)
+    mg_index.set_check_interval()
+    if read is input:
+        _setup_readline()
+    try:
+        while True:
+            try:
+                line = read(PROMPT)
+            except EOFError:
+                print()
+                break
+            except KeyboardInterrupt:
+                print()
+                continue
+            if not run_line(line):
+                break
+    finally:
+        disable_res_cache()
+        mg_index.set_check_interval(None)
+        if read is input:
+            _save_history()
@@ -4,14 +4,15 @@ from omg.config import config
 from omg.must_gather.exceptions import NoValidMgFound
 from omg.use.show_mg_info import show_mg_info
 from omg.must_gather.scan_mg import scan_mg
+from omg.must_gather.mg_index import save_index
 
 
 def cmd(mg_paths=None, cwd=False, cfile=None):
     """Landing function for `omg use`
 
     Args:
-        mg_paths (string, optional): Path to extracted must-gather.
-                                     Defaults to None.
+        mg_paths (string, optional): Path to extracted must-gather
+                                     or must-gather archive. Defaults to None.
         cwd (bool, optional): --cwd flag.
                               Defaults to False.
 
@@ -44,6 +45,13 @@ def cmd(mg_paths=None, cwd=False, cfile=None):
             lg.error(e)
             return 1
 
+        # Build the layout index of all discovered paths
+        for path in valid_mg_paths:
+            try:
+                save_index(path)
+            except Exception as e:
+                lg.warning("Failed indexing {}: {}".format(path, e))
+
         # Foce re-generate rdefs for all discovered paths
         for path in valid_mg_paths:
             try:
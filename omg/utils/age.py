@@ -1,8 +1,84 @@
+import re
 from datetime import datetime
+from functools import lru_cache
 from dateutil.parser import parse
 from dateutil.relativedelta import relativedelta
 from loguru import logger as lg
 
+# Strict RFC3339 timestamp e.g, 2020-06-04T22:10:41Z or 2020-06-04T22:10:41.123456+05:30
+# This is what kubernetes/openshift use, anything else is parsed by dateutil
+_rfc3339_re = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})[Tt ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?(?:[Zz]|[+-]\d{2}:?\d{2})?$")
+
+
+@lru_cache(maxsize=65536)
+def _parse_iso(ts):
+    """Parse an iso-8601 timestamp, ignoring the timezone (same as parse(ts, ignoretz=True))"""
+    m = _rfc3339_re.match(ts)
+    if m:
+        year, month, day, hour, minute, second, frac = m.groups()
+        try:
+            return datetime(
+                int(year), int(month), int(day), int(hour), int(minute), int(second),
+                int(frac[:6].ljust(6, "0")) if frac else 0)
+        except ValueError:
+            pass
+    return parse(ts, ignoretz=True)
+
+
+def to_datetime(ts, ts_type="iso"):
+    """Convert a timestamp to a (naive) datetime, the timezone is ignored
+
+    Args:
+        ts (str|datetime|float): Timestamp
+        ts_type (str, optional): "iso" (iso-8601) or "epoch". Defaults to "iso".
+
+    Returns:
+        datetime: Converted timestamp
+    """
+    if ts_type == "iso":
+        if isinstance(ts, datetime):
+            return ts.replace(tzinfo=None)
+        return _parse_iso(ts)
+    elif ts_type == "epoch":
+        return datetime.utcfromtimestamp(ts)
+
+
+@lru_cache(maxsize=65536)
+def _age(ts1, ts2, ts1_type, ts2_type):
+    try:
+        dt1 = to_datetime(ts1, ts1_type)
+        dt2 = to_datetime(ts2, ts2_type)
+        delta = dt2 - dt1
+        if delta.days == 0:
+            # Less than a day, timedelta gives the same hours/minutes/seconds
+            # as relativedelta, without its (expensive) normalization
+            hours, rem = divmod(delta.seconds, 3600)
+            minutes, seconds = divmod(rem, 60)
+            days = 0
+        else:
+            rd = relativedelta(dt2, dt1)
+            hours, minutes, seconds = rd.hours, rd.minutes, rd.seconds
+            days = 0
+            if rd.days > 0 or rd.months > 0 or rd.years > 0:
+                days = int(rd.years * 365) + int(rd.months * 30) + int(rd.days)
+    except Exception as e:
+        lg.debug("error parsing timestamps: {}".format(e))
+        return "Unknown"
+
+    if days:
+        return str(days) + "d"
+    elif hours > 9:
+        return str(hours) + "h"
+    elif hours > 0 and hours < 10:
+        return str(hours) + "h" + str(minutes) + "m"
+    elif minutes > 9:
+        return str(minutes) + "m"
+    elif minutes > 0 and minutes < 10:
+        return str(minutes) + "m" + str(seconds) + "s"
+    else:
+        return str(seconds) + "s"
+
 
 def age(ts1, ts2, ts1_type="iso", ts2_type="epoch"):
     """Calculate age of the objects
@@ -14,6 +90,8 @@ def age(ts1, ts2, ts1_type="iso", ts2_type="epoch"):
     By default, ts1 is considered in iso-8601 e.g: '2020-06-04T22:10:41Z'
     and ts2 is considered in unix/epoch format e.g: 1590912494.0 (returned by os.path.getmtime)
 
+    Results are memoized, as the same timestamps repeat a lot in a table
+    (e.g, all resources from a yaml file share the same yaml timestamp).
 
     Args:
         ts1 (str): First timestamp
@@ -26,35 +104,32 @@ def age(ts1, ts2, ts1_type="iso", ts2_type="epoch"):
                 Biggest unit is days (d) and smallest is (s)
     """
     try:
-        if ts1_type == "iso":
-            if isinstance(ts1, datetime):
-                ts1 = ts1.isoformat()
-            dt1 = parse(ts1, ignoretz=True)
-        elif ts1_type == "epoch":
-            dt1 = datetime.utcfromtimestamp(ts1)
-
-        if ts2_type == "iso":
-            if isinstance(ts2, datetime):
-                ts2 = ts2.isoformat()
-            dt2 = parse(ts2, ignoretz=True)
-        elif ts2_type == "epoch":
-            dt2 = datetime.utcfromtimestamp(ts2)
-
-        rd = relativedelta(dt2, dt1)
-    except Exception as e:
-        lg.debug("error parsing timestamps: {}".format(e))
-        return "Unknown"
+        return _age(ts1, ts2, ts1_type, ts2_type)
+    except TypeError:
+        # unhashable timestamp, can't be memoized
+        return _age.__wrapped__(ts1, ts2, ts1_type, ts2_type)
 
-    if rd.days > 0 or rd.months > 0 or rd.years > 0:
-        days = int(rd.years * 365) + int(rd.months * 30) + int(rd.days)
-        return str(days) + "d"
-    elif rd.hours > 9:
-        return str(rd.hours) + "h"
-    elif rd.hours > 0 and rd.hours < 10:
-        return str(rd.hours) + "h" + str(rd.minutes) + "m"
-    elif rd.minutes > 9:
-        return str(rd.minutes) + "m"
-    elif rd.minutes > 0 and rd.minutes < 10:
-        return str(rd.minutes) + "m" + str(rd.seconds) + "s"
-    else:
-        return str(rd.seconds) + "s"
+
+def ages(ts1s, ts2s, ts1_type="iso", ts2_type="epoch"):
+    """Calculate ages of a whole (table) column at once
+
+    Args:
+        ts1s (list): First timestamps
+        ts2s (list): Second timestamps (same length as ts1s)
+        ts1_type (str, optional): Type of fist timestamps. Defaults to "iso".
+        ts2_type (str, optional): Type of second timestamps. Defaults to "epoch".
+
+    Returns:
+        list[str]: Human readable ages, one for each (ts1, ts2) pair
+    """
+    memo = {}
+    out = []
+    for pair in zip(ts1s, ts2s):
+        try:
+            out.append(memo[pair])
+        except KeyError:
+            memo[pair] = age(pair[0], pair[1], ts1_type, ts2_type)
+            out.append(memo[pair])
+        except TypeError:
+            out.append(age(pair[0], pair[1], ts1_type, ts2_type))
+    return out
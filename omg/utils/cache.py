@@ -0,0 +1,126 @@
+""" cache.py
+
+Persistent on-disk cache used to avoid re-doing expensive work
+(e.g, yaml parsing) across omg invocations.
+
+Objects are pickled under the cache directory, which defaults to
+~/.cache/omg and can be changed with env['OMG_CACHE_DIR'].
+Setting env['OMG_NO_CACHE'] disables the cache altogether.
+
+Every entry is stored together with its key and a "stamp". The stamp
+describes the state of whatever the entry was derived from, for example
+the (size, mtime) of a yaml file. An entry is only served if both key
+and stamp match, hence stale entries are never returned.
+"""
+
+import os
+import pickle
+import hashlib
+import tempfile
+from loguru import logger as lg
+from omg.utils import vfs
+
+# Returned by load() when there is no (valid) cache entry.
+# We can't use None for this, as None is a valid cached value.
+MISS = object()
+
+
+def enabled():
+    return not os.getenv("OMG_NO_CACHE")
+
+
+def cache_dir(*subdirs):
+    """Path of the omg cache directory (or a sub directory inside it)
+
+    Returns:
+        str: Absolute path of the cache directory
+    """
+    base = os.getenv("OMG_CACHE_DIR")
+    if not base:
+        xdg_cache = os.getenv("XDG_CACHE_HOME") or os.path.join(
+            os.getenv("HOME") or "/tmp/", ".cache")
+        base = os.path.join(xdg_cache, "omg")
+    return os.path.abspath(os.path.join(base, *subdirs))
+
+
+def file_stamp(fpath):
+    """Stamp of a file to detect if it has changed
+
+    Args:
+        fpath (str): File path (can be inside an archive, see vfs.py)
+
+    Returns:
+        tuple: (size, mtime_ns) of the file
+    """
+    st = vfs.stat(fpath)
+    return (st.st_size, st.st_mtime_ns)
+
+
+def _entry_path(section, key):
+    digest = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir(section), digest[:2], digest + ".pickle")
+
+
+def load(section, key, stamp):
+    """Load an entry from the cache
+
+    Args:
+        section (str): Cache section (sub directory) e.g, "yaml"
+        key (str): Key of the entry e.g, path of a yaml file
+        stamp (any): Stamp that the cached entry must match
+
+    Returns:
+        any: Cached object or MISS if the entry is absent or stale
+    """
+    if not enabled():
+        return MISS
+
+    epath = _entry_path(section, key)
+    try:
+        with open(epath, "rb") as e_f:
+            c_key, c_stamp, obj = pickle.load(e_f)
+    except FileNotFoundError:
+        lg.debug("cache miss ({}): {}".format(section, key))
+        return MISS
+    except Exception as e:
+        lg.debug("unable to load cache entry {}: {}".format(epath, e))
+        return MISS
+
+    if c_key != key or c_stamp != stamp:
+        lg.debug("stale cache entry ({}): {}".format(section, key))
+        return MISS
+
+    lg.debug("cache hit ({}): {}".format(section, key))
+    return obj
+
+
+def dump(section, key, stamp, obj):
+    """Save an entry in the cache
+
+    The entry is written to a temporary file first, and then moved
+    in place, so concurrent omg processes never see partial entries.
+    Failures are logged and ignored, cache is only an optimization.
+
+    Args:
+        section (str): Cache section (sub directory) e.g, "yaml"
+        key (str): Key of the entry e.g, path of a yaml file
+        stamp (any): Stamp of the entry
+        obj (any): Object to cache (must be picklable)
+    """
+    if not enabled():
+        return
+
+    epath = _entry_path(section, key)
+    try:
+        os.makedirs(os.path.dirname(epath), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(epath), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as t_f:
+                pickle.dump((key, stamp, obj), t_f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, epath)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        lg.debug("cache entry saved ({}): {}".format(section, key))
+    except Exception as e:
+        lg.debug("unable to save cache entry {}: {}".format(epath, e))
@@ -1,10 +1,11 @@
 import json
 from loguru import logger as lg
+from omg.utils import vfs
 
 
 def load_json(jfile):
     try:
-        with open(jfile, "r") as j_f:
+        with vfs.open(jfile, "r") as j_f:
             j_d = j_f.read()
             j_data = json.loads(j_d)
             return j_data
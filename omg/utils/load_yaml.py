@@ -1,8 +1,11 @@
 """ load_resources_from_yaml.py """
 
+import re
 import yaml
 import os
 from loguru import logger as lg
+from omg.utils import cache, vfs
+from omg.utils.profile import timed
 
 try:
     from yaml import CSafeLoader as SafeLoader
@@ -11,47 +14,139 @@ except ImportError:
     from yaml import SafeLoader
 
 
-def load_yaml(yfile):
-    """Load yaml file and return python object
+# Start of top level list items e.g, "- apiVersion: v1" under "items:"
+_list_item_re = re.compile(r"^- ", re.M)
+
+
+def _parses(y_d):
+    """Try loading yaml string
+
+    Returns:
+        tuple: (True, data) if loaded or (False, None) if parsing failed
+    """
+    try:
+        return True, yaml.load(y_d, Loader=SafeLoader)
+    except yaml.YAMLError:
+        return False, None
+
+
+def _bisect_cut(y_d, cuts):
+    """Binary search the last cut point at which the yaml string loads
+
+    We assume that if y_d[:cuts[i]] loads, y_d[:cuts[j]] loads as well for j < i,
+    which is true for files that are broken at one place (e.g, truncated).
+    This needs log2(len(cuts)) parse attempts.
+
+    Args:
+        y_d (str): yaml string that fails to load
+        cuts (list[int]): Sorted offsets to try cutting y_d at
+
+    Returns:
+        tuple: (cut, data) or (None, None) if none of the cuts load
+    """
+    good, good_data = None, None
+    lo, hi = 0, len(cuts) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        ok, data = _parses(y_d[:cuts[mid]])
+        if ok:
+            good, good_data = cuts[mid], data
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return good, good_data
+
+
+def _recover(y_d, err):
+    """Find the longest loadable part of a broken (truncated) yaml string
+
+    For lists (kind: List), we cut at the start of list items, so that
+    loading resumes at the last complete item. Otherwise (or if that
+    doesn't work) we cut at line endings.
+
+    The position where the parser failed is tried first, which generally
+    is the point of truncation. If that doesn't load, we bisect.
+
+    Args:
+        y_d (str): yaml string that fails to load
+        err (yaml.MarkedYAMLError): Error raised when loading y_d
+
+    Returns:
+        tuple: (cut, data) or (None, None) if nothing could be loaded
+    """
+    err_mark = getattr(err, "problem_mark", None)
+    err_idx = err_mark.index if err_mark else len(y_d)
+
+    item_cuts = [
+        m.start() for m in _list_item_re.finditer(y_d, 0, err_idx) if m.start() > 0]
+    if item_cuts:
+        ok, data = _parses(y_d[:item_cuts[-1]])
+        if ok:
+            return item_cuts[-1], data
+    cut, data = _bisect_cut(y_d, item_cuts[:-1])
+    if cut is None:
+        # We don't try a cut that leaves less than 2 lines
+        line_cuts = [m.start() for m in re.finditer("\n", y_d)][1:]
+        cut, data = _bisect_cut(y_d, line_cuts)
+    return cut, data
+
+
+def warn_skipped(yfile, skipped):
+    """Warn about the lines skipped to load a broken yaml file
+
+    Args:
+        yfile (str): Yaml file path
+        skipped (tuple): (lines skipped, lines total), see load_yaml_skipped
+    """
+    lg.warning("Skipped " +
+               str(skipped[0]) + "/" + str(skipped[1]) +
+               " lines from the end of " + yfile +
+               " to the load the yaml file properly")
+
+
+@timed("load_yaml", detail_arg=True)
+def load_yaml_skipped(yfile):
+    """Load yaml file, and tell how many lines were skipped to load it
+
+    Same as load_yaml, for callers that cache the loaded data and need
+    to repeat the warning about skipped lines (see warn_skipped).
 
     Args:
         yfile (str): Yaml file path
 
     Returns:
-        (str|list|dict): Python object loaded from yaml
+        tuple: (python object loaded from yaml,
+                (lines skipped, lines total) or None if nothing was skipped)
     """
     lg.debug("yfile: {}".format(yfile))
 
-    if not os.path.isfile(yfile):
+    if not vfs.isfile(yfile):
         raise Exception("File not found: {}".format(yfile))
 
     ydata = None
-    with open(yfile, "r") as y_f:
+    skipped = None
+    with vfs.open(yfile, "r") as y_f:
         lg.debug("Opened yaml file: " + yfile)
         y_d = y_f.read()
         try:
             ydata = yaml.load(y_d, Loader=SafeLoader)
-        except (yaml.scanner.ScannerError, yaml.parser.ParserError):
+        except (yaml.scanner.ScannerError, yaml.parser.ParserError) as e:
             # yaml load/parse failed
             # try skipping lines from the bottom
             # Until we are able to load the yaml file
-            # We will try until > 1 lines are left
-            lines_total = y_d.count("\n")
-            lines_skipped = 0
-            while y_d.count("\n") > 1:
-                # skip last line
-                y_d = y_d[:y_d.rfind("\n")]
-                lines_skipped += 1
-                try:
-                    ydata = yaml.load(y_d, Loader=SafeLoader)
-                except (yaml.scanner.ScannerError, yaml.parser.ParserError):
-                    pass
-                else:
-                    lg.warning("Skipped " +
-                               str(lines_skipped) + "/" + str(lines_total) +
-                               " lines from the end of " + yfile +
-                               " to the load the yaml file properly")
-                    break
+            key = os.path.abspath(yfile)
+            stamp = cache.file_stamp(yfile)
+            cut = cache.load("yaml_cut", key, stamp)
+            if cut is not cache.MISS:
+                lg.debug("Using cached cut point {} for {}".format(cut, yfile))
+                ok, ydata = _parses(y_d[:cut])
+            if cut is cache.MISS or not ok:
+                cut, ydata = _recover(y_d, e)
+                if cut is not None:
+                    cache.dump("yaml_cut", key, stamp, cut)
+            if cut is not None:
+                skipped = (y_d.count("\n", cut), y_d.count("\n"))
+                warn_skipped(yfile, skipped)
 
     lg.debug("yaml file loaded in ydata. type: " + str(type(ydata)))
     lg.trace("ydata: " + str(ydata))
@@ -59,4 +154,20 @@ def load_yaml(yfile):
     # if not ydata:
     #     raise Exception("Unable to load yaml file: {}".format(yfile))
 
-    return ydata
+    return ydata, skipped
+
+
+def load_yaml(yfile):
+    """Load yaml file and return python object
+
+    If the yaml file is broken (e.g, truncated), we load as much as we can
+    from the start of the file. The cut point is cached so the search for it
+    is not repeated for the same file.
+
+    Args:
+        yfile (str): Yaml file path
+
+    Returns:
+        (str|list|dict): Python object loaded from yaml
+    """
+    return load_yaml_skipped(yfile)[0]
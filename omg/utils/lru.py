@@ -0,0 +1,57 @@
+""" lru.py
+
+Small in-memory LRU mapping, for state that is kept across commands by
+long running omg processes (omg serve, omg shell).
+
+It is used from the threads that load resources concurrently (see
+omg.utils.pool.map_threads), so every access holds a lock.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRU:
+    """Mapping that holds at most maxsize entries, dropping the least recently used"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        """Get the value of key (and mark it as recently used)"""
+        with self._lock:
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                return default
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Set the value of key, dropping the least recently used entries if needed"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._entries.pop(key, default)
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,124 @@
+""" pool.py
+
+Worker pools used to load resources concurrently.
+
+yaml parsing (even with CSafeLoader) holds the GIL, so threads don't
+help here and we use worker processes instead. The number of workers
+is taken from -j/--jobs or env['OMG_JOBS'] (0 means one per cpu).
+With 1 job (the default) yamls are parsed serially in the current process.
+
+Independent loads (e.g, of multiple paths and resource types) are fanned
+out on threads, as they mostly wait on the filesystem, the cache or the
+process pool.
+"""
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from loguru import logger as lg
+from omg.config import config, logging
+from omg.utils import profile
+
+# Max threads used by map_threads
+IO_THREADS = 8
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _forget_executor():
+    # The workers of the executor belong to the parent (e.g, omg serve children)
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_executor)
+
+
+def get_jobs():
+    """Resolve the number of parallel jobs
+
+    Returns:
+        int: Number of worker processes to use (>= 1)
+    """
+    jobs = config.jobs
+    if jobs is None:
+        env_jobs = os.getenv("OMG_JOBS")
+        try:
+            jobs = int(env_jobs) if env_jobs else 1
+        except ValueError:
+            lg.warning("Invalid OMG_JOBS: {}, ignoring".format(env_jobs))
+            jobs = 1
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return jobs
+
+
+def _init_worker(loglevel):
+    logging.setup_logging(loglevel)
+
+
+def get_executor():
+    """Get the (process wide) process pool executor
+
+    Returns:
+        ProcessPoolExecutor: Executor with get_jobs() workers
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            jobs = get_jobs()
+            lg.debug("Starting process pool with {} workers".format(jobs))
+            _executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=_init_worker,
+                initargs=(logging.current_loglevel,))
+    return _executor
+
+
+def map_ordered(fn, items):
+    """Call fn for every item, in parallel if more than 1 job is set
+
+    fn must be a picklable (module level) function.
+
+    Args:
+        fn (callable): Function to call
+        items (list): Arguments to call fn with (one per call)
+
+    Returns:
+        list: Results of fn, in the same order as items
+    """
+    items = list(items)
+    if get_jobs() <= 1 or len(items) <= 1:
+        return [fn(i) for i in items]
+    if profile.enabled:
+        # Bring back the stages timed in the workers
+        results = []
+        for result, events in get_executor().map(
+                profile.call_recorded, [(fn, i) for i in items]):
+            profile.add_events(events)
+            results.append(result)
+        return results
+    return list(get_executor().map(fn, items))
+
+
+def map_threads(fn, items):
+    """Call fn for every item on a thread pool
+
+    Exceptions raised by fn are re-raised in the calling thread,
+    for the first failing item (in the order of items).
+
+    Args:
+        fn (callable): Function to call
+        items (list): Arguments to call fn with (one per call)
+
+    Returns:
+        list: Results of fn, in the same order as items
+    """
+    items = list(items)
+    if len(items) <= 1:
+        return [fn(i) for i in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), IO_THREADS)) as t_ex:
+        futures = [t_ex.submit(fn, i) for i in items]
+        return [f.result() for f in futures]
@@ -0,0 +1,234 @@
+""" profile.py
+
+Per-stage timing instrumentation (omg --profile, or env['OMG_PROFILE']).
+
+The stages of a command are timed with the stage() context manager or the
+timed() decorator (which do nothing unless profiling is started):
+
+    config        config.get
+    scan_mg       scanning paths for must-gathers
+    locate_yamls  locating the yamls of a resource type
+    load_yaml     parsing a yaml file (the file is recorded, cache hits are not parses)
+    load_res      loading the resources of a type (includes locate_yamls and load_yaml)
+    build_table   building the rows of a table
+    output        rendering (tables, yaml/json, logs)
+
+Stages nest, so the time of a stage includes the stages it calls. Timings
+recorded in worker processes (-j/--jobs) are sent back with the results
+(see omg.utils.pool.map_ordered).
+
+At the end of the command report() prints a per-stage summary and the
+slowest yaml parses on stderr, as text or as JSON (OMG_PROFILE=json or
+--profile-format json). Optionally, a Chrome trace-event file (.json, open
+it in chrome://tracing or https://ui.perfetto.dev) or a cProfile stats file
+(any other extension, open it with pstats or snakeviz) is written.
+"""
+
+import os
+import sys
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+
+# Number of slowest yaml parses reported (unless env['OMG_PROFILE_TOP'] is set)
+TOP_YAMLS = 10
+
+enabled = False
+
+# Recorded stages: (stage, detail, start, duration, pid, tid)
+_events = []
+_started = None
+_settings = {}
+_profiler = None
+
+
+def requested(flag=False, fmt=None, output=None):
+    """True if profiling is requested with the options or env['OMG_PROFILE']"""
+    return bool(flag or fmt or output or os.getenv("OMG_PROFILE", "0") not in ("", "0"))
+
+
+def start(fmt=None, output=None):
+    """Start recording (previously recorded stages are dropped)
+
+    Args:
+        fmt (str, optional): Summary format, text or json.
+                             Defaults to json if env['OMG_PROFILE'] is json, text otherwise.
+        output (str, optional): Trace (.json) or cProfile file to write on report().
+                                Defaults to env['OMG_PROFILE_OUTPUT'].
+    """
+    global enabled, _started, _profiler
+    if fmt is None:
+        fmt = "json" if os.getenv("OMG_PROFILE") == "json" else "text"
+    output = output or os.getenv("OMG_PROFILE_OUTPUT")
+    _settings.update(fmt=fmt, output=output)
+    del _events[:]
+    _profiler = None
+    if output and not output.endswith(".json"):
+        import cProfile
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    _started = time.perf_counter()
+    enabled = True
+
+
+def stop():
+    """Stop recording
+
+    Returns:
+        float: Seconds since start()
+    """
+    global enabled
+    if _profiler is not None:
+        _profiler.disable()
+    enabled = False
+    return time.perf_counter() - _started
+
+
+@contextmanager
+def stage(name, detail=None):
+    """Time the enclosed block as a stage (if profiling is started)
+
+    Args:
+        name (str): Stage name
+        detail (str, optional): e.g, the yaml file that is parsed
+    """
+    if not enabled:
+        yield
+        return
+    t_start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _events.append((
+            name, detail, t_start, time.perf_counter() - t_start,
+            os.getpid(), threading.get_ident()
+        ))
+
+
+def timed(name, detail_arg=False):
+    """Decorator that times every call of a function as a stage
+
+    Args:
+        name (str): Stage name
+        detail_arg (bool): Record the first argument of the call as detail
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            with stage(name, str(args[0]) if detail_arg and args else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def call_recorded(args):
+    """Call fn(item) in a worker process, recording its stages
+
+    Args:
+        args (tuple): (fn, item)
+
+    Returns:
+        tuple: (result of fn, recorded stages), see add_events()
+    """
+    global enabled
+    fn, item = args
+    del _events[:]
+    enabled = True
+    try:
+        return fn(item), list(_events)
+    finally:
+        enabled = False
+        del _events[:]
+
+
+def add_events(events):
+    """Add the stages recorded in a worker process"""
+    _events.extend(events)
+
+
+def _top_yamls():
+    try:
+        return int(os.getenv("OMG_PROFILE_TOP") or TOP_YAMLS)
+    except ValueError:
+        return TOP_YAMLS
+
+
+def summary(total=None):
+    """Summary of the recorded stages
+
+    Args:
+        total (float, optional): Total seconds of the command
+
+    Returns:
+        dict: {"total": seconds, "stages": {stage: {"calls", "total", "max"}},
+               "slowest_yamls": [{"yfile", "seconds"}, ...]}
+    """
+    stages = {}
+    for name, _, _, duration, _, _ in _events:
+        s = stages.setdefault(name, {"calls": 0, "total": 0.0, "max": 0.0})
+        s["calls"] += 1
+        s["total"] += duration
+        s["max"] = max(s["max"], duration)
+    parses = sorted(
+        (e for e in _events if e[0] == "load_yaml"), key=lambda e: e[3], reverse=True)
+    return {
+        "total": total,
+        "stages": stages,
+        "slowest_yamls": [{"yfile": e[1], "seconds": e[3]} for e in parses[:_top_yamls()]],
+    }
+
+
+def format_summary(summ):
+    """Text version of summary()"""
+    lines = ["{:<14}{:>8}{:>12}{:>12}".format("STAGE", "CALLS", "TOTAL(s)", "MAX(s)")]
+    for name, s in sorted(summ["stages"].items(), key=lambda i: i[1]["total"], reverse=True):
+        lines.append("{:<14}{:>8}{:>12.4f}{:>12.4f}".format(
+            name, s["calls"], s["total"], s["max"]))
+    if summ["total"] is not None:
+        lines.append("{:<14}{:>8}{:>12.4f}".format("(command)", "", summ["total"]))
+    if summ["slowest_yamls"]:
+        lines.append("")
+        lines.append("Slowest yaml parses:")
+        for p in summ["slowest_yamls"]:
+            lines.append("{:>10.4f}s  {}".format(p["seconds"], p["yfile"]))
+    return "\n".join(lines)
+
+
+def trace_events():
+    """Recorded stages as Chrome trace events (complete events, times in us)"""
+    return [
+        {
+            "name": name, "cat": "omg", "ph": "X",
+            "ts": round((t_start - _started) * 1e6, 1), "dur": round(duration * 1e6, 1),
+            "pid": pid, "tid": tid,
+            "args": {"detail": detail} if detail else {},
+        }
+        for name, detail, t_start, duration, pid, tid in _events
+    ]
+
+
+def write_output(output, summ):
+    """Write the trace (.json) or cProfile stats file"""
+    if output.endswith(".json"):
+        import json
+        with open(output, "w") as t_f:
+            json.dump({"traceEvents": trace_events(), "otherData": summ}, t_f)
+    elif _profiler is not None:
+        _profiler.dump_stats(output)
+
+
+def report():
+    """Stop recording, print the summary on stderr and write the output file (if set)"""
+    if not enabled:
+        return
+    summ = summary(stop())
+    if _settings["fmt"] == "json":
+        import json
+        print(json.dumps(summ), file=sys.stderr)
+    else:
+        print(format_summary(summ), file=sys.stderr)
+    if _settings["output"]:
+        write_output(_settings["output"], summ)
@@ -0,0 +1,177 @@
+""" selector.py
+
+Kubernetes label selectors (-l/--selector) e.g:
+
+    app=nginx,tier!=frontend
+    env in (prod,staging),!canary
+    release
+
+A selector is parsed into a list of requirements (key, operator, values),
+and matches a set of labels if all of its requirements match.
+
+Field selectors (--field-selector) e.g:
+
+    status.phase!=Running,spec.nodeName=worker-3
+
+are parsed into requirements (field, operator, value) and compiled once
+into a predicate on resources (see compile_field_selector).
+"""
+
+import re
+from functools import lru_cache
+
+_key = r"[A-Za-z0-9][-A-Za-z0-9_./]*"
+_value = r"[-A-Za-z0-9_.]*"
+
+_set_re = re.compile(r"^({})\s+(in|notin)\s*\(\s*(.*?)\s*\)$".format(_key))
+_eq_re = re.compile(r"^({})\s*(==|=|!=)\s*({})$".format(_key, _value))
+_exists_re = re.compile(r"^(!?)\s*({})$".format(_key))
+_value_re = re.compile(r"^{}$".format(_value))
+_field_re = re.compile(r"^([A-Za-z0-9_][-A-Za-z0-9_./]*)\s*(==|=|!=)\s*(.*)$")
+
+
+def _split(selector):
+    """Split a selector at the commas that are not inside parentheses"""
+    parts, depth, cur = [], 0, ""
+    for c in selector:
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        if c == "," and depth == 0:
+            parts.append(cur)
+            cur = ""
+        else:
+            cur += c
+    parts.append(cur)
+    return [p.strip() for p in parts]
+
+
+def parse_selector(selector):
+    """Parse a label selector
+
+    Args:
+        selector (str): Label selector e.g, "app=nginx,tier!=frontend"
+
+    Returns:
+        list[tuple]: Requirements [(key, operator, values), ...]
+                     operator is one of "=", "!=", "in", "notin", "exists", "!exists"
+
+    Raises:
+        ValueError: If the selector is not valid
+    """
+    reqs = []
+    for part in _split(selector or ""):
+        if not part:
+            raise ValueError("Invalid selector: {}".format(selector))
+        m = _set_re.match(part)
+        if m:
+            values = [v.strip() for v in m.group(3).split(",")]
+            if not all(_value_re.match(v) for v in values):
+                raise ValueError("Invalid selector values: {}".format(part))
+            reqs.append((m.group(1), m.group(2), frozenset(values)))
+            continue
+        m = _eq_re.match(part)
+        if m:
+            op = "!=" if m.group(2) == "!=" else "="
+            reqs.append((m.group(1), op, frozenset([m.group(3)])))
+            continue
+        m = _exists_re.match(part)
+        if m:
+            reqs.append((m.group(2), "!exists" if m.group(1) else "exists", frozenset()))
+            continue
+        raise ValueError("Invalid selector: {}".format(part))
+    return reqs
+
+
+def match_requirement(req, labels):
+    """Check if labels (dict) match a single requirement"""
+    key, op, values = req
+    if op in ("=", "in"):
+        return key in labels and labels[key] in values
+    if op in ("!=", "notin"):
+        return key not in labels or labels[key] not in values
+    if op == "exists":
+        return key in labels
+    return key not in labels
+
+
+def match_labels(reqs, labels):
+    """Check if labels match all requirements of a (parsed) selector
+
+    Args:
+        reqs (list[tuple]): Parsed selector (see parse_selector)
+        labels (dict): Labels e.g, metadata.labels of a resource
+
+    Returns:
+        bool: True if all requirements match
+    """
+    labels = labels or {}
+    return all(match_requirement(req, labels) for req in reqs)
+
+
+def parse_field_selector(selector):
+    """Parse a field selector
+
+    Args:
+        selector (str): Field selector e.g, "status.phase!=Running,spec.nodeName=worker-3"
+
+    Returns:
+        tuple[tuple]: Requirements ((field, operator, value), ...)
+                      operator is one of "=", "!="
+
+    Raises:
+        ValueError: If the selector is not valid
+    """
+    reqs = []
+    for part in (selector or "").split(","):
+        m = _field_re.match(part.strip())
+        if not m:
+            raise ValueError("Invalid field selector: {}".format(part))
+        op = "!=" if m.group(2) == "!=" else "="
+        reqs.append((m.group(1), op, m.group(3)))
+    return tuple(reqs)
+
+
+def field_value(value):
+    """String value of a field, as field selectors compare them"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _field_getter(field):
+    """Getter of a (dotted) field e.g, status.phase"""
+    keys = tuple(field.split("."))
+
+    def get(res):
+        for key in keys:
+            if not isinstance(res, dict):
+                return None
+            res = res.get(key)
+        return res
+    return get
+
+
+@lru_cache(maxsize=None)
+def compile_field_selector(reqs):
+    """Compile a (parsed) field selector into a predicate
+
+    Args:
+        reqs (tuple[tuple]): Parsed field selector (see parse_field_selector)
+
+    Returns:
+        function: predicate(res) -> True if the resource matches all requirements
+    """
+    checks = tuple(
+        (_field_getter(field), op == "=", value) for field, op, value in reqs
+    )
+
+    def predicate(res):
+        for get, eq, value in checks:
+            if (field_value(get(res)) == value) is not eq:
+                return False
+        return True
+    return predicate
@@ -0,0 +1,308 @@
+""" vfs.py
+
+Virtual filesystem layer to read must-gathers from archives.
+
+Must-gathers can be used directly from .tar, .tar.gz, .tgz and .zip archives,
+without extracting them. Paths inside an archive are addressed as if the
+archive was a directory, for example:
+
+    /data/mg.tar.gz/must-gather.local.123/<image>/namespaces/...
+
+The functions in this module (isdir, isfile, listdir, stat, open, ...) accept
+both regular and archive paths, and behave like their os/os.path equivalents.
+
+For every archive, a member index (dirs, files and their offsets) is built
+once and saved in the omg cache. Compressed tar archives are decompressed
+once into the cache directory, to make their members seekable. Zip members
+are read directly from the zip file.
+"""
+
+import io
+import os
+import gzip
+import time
+import shutil
+import tarfile
+import zipfile
+import builtins
+from collections import namedtuple
+from loguru import logger as lg
+from omg.utils import cache
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar", ".zip")
+
+# Chunk size used when copying files (see copy_range)
+COPY_BUFSIZE = 1024 * 1024
+
+# stat result of archive members (and directories in archives)
+MemberStat = namedtuple("MemberStat", ["st_size", "st_mtime", "st_mtime_ns"])
+
+# Process wide memo of archives {archive path: _Archive}
+_archives = {}
+
+
+class _MemberReader(io.RawIOBase):
+    """Raw (binary) reader of a tar member, i.e, a byte range of a file"""
+
+    def __init__(self, fpath, offset, size):
+        self._f = builtins.open(fpath, "rb")
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = pos
+        elif whence == io.SEEK_CUR:
+            self._pos += pos
+        elif whence == io.SEEK_END:
+            self._pos = self._size + pos
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def readinto(self, b):
+        n = max(0, min(len(b), self._size - self._pos))
+        if n == 0:
+            return 0
+        self._f.seek(self._offset + self._pos)
+        data = self._f.read(n)
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        self._f.close()
+        super().close()
+
+
+class _Archive(object):
+    """Member index and reader of a single archive"""
+
+    def __init__(self, apath):
+        self.apath = apath
+        self.stat = os.stat(apath)
+        self.is_zip = apath.endswith(".zip")
+        self._zip = None
+
+        stamp = (self.stat.st_size, self.stat.st_mtime_ns)
+        index = cache.load("archive_index", apath, stamp)
+        if index is cache.MISS:
+            index = self._build_index()
+            cache.dump("archive_index", apath, stamp, index)
+        self.dirs = index["dirs"]
+        self.files = index["files"]
+        self.tar = index.get("tar")
+
+    def _seekable_tar(self):
+        """Path of an uncompressed (seekable) copy of the tar archive"""
+        if not self.apath.endswith((".tar.gz", ".tgz")):
+            return self.apath
+
+        tar_c = os.path.join(
+            cache.cache_dir("archives"),
+            "{}-{}-{}.tar".format(
+                os.path.basename(self.apath), self.stat.st_size, self.stat.st_mtime_ns))
+        if not os.path.isfile(tar_c):
+            lg.opt(colors=True).success(
+                "<e>Decompressing {} (only done once) ...</>".format(self.apath))
+            os.makedirs(os.path.dirname(tar_c), exist_ok=True)
+            tmp = tar_c + ".tmp{}".format(os.getpid())
+            with gzip.open(self.apath, "rb") as g_f, builtins.open(tmp, "wb") as t_f:
+                shutil.copyfileobj(g_f, t_f, 1024 * 1024)
+            os.replace(tmp, tar_c)
+        return tar_c
+
+    def _add(self, dirs, files, name, is_dir, entry=None):
+        parts = [p for p in name.split("/") if p and p != "."]
+        if not parts:
+            return
+        for i in range(len(parts)):
+            parent = "/".join(parts[:i])
+            child = parts[i]
+            children = dirs.setdefault(parent, [])
+            if child not in children:
+                children.append(child)
+        rel = "/".join(parts)
+        if is_dir:
+            dirs.setdefault(rel, [])
+        else:
+            files[rel] = entry
+
+    def _build_index(self):
+        lg.debug("Building member index of {}".format(self.apath))
+        dirs = {"": []}
+        files = {}
+        tar = None
+        if self.is_zip:
+            with zipfile.ZipFile(self.apath) as z_f:
+                for zi in z_f.infolist():
+                    mtime = time.mktime(zi.date_time + (0, 0, -1))
+                    self._add(dirs, files, zi.filename, zi.is_dir(),
+                              (zi.filename, zi.file_size, mtime))
+        else:
+            tar = self._seekable_tar()
+            with tarfile.open(tar, "r:") as t_f:
+                for ti in t_f:
+                    if ti.isdir():
+                        self._add(dirs, files, ti.name, True)
+                    elif ti.isfile():
+                        self._add(dirs, files, ti.name, False,
+                                  (ti.offset_data, ti.size, ti.mtime))
+        lg.debug("{} dirs and {} files in {}".format(len(dirs), len(files), self.apath))
+        return {"dirs": dirs, "files": files, "tar": tar}
+
+    def _zipfile(self):
+        # ZipFile objects can't be shared with forked (worker) processes
+        if self._zip is None or self._zip[0] != os.getpid():
+            self._zip = (os.getpid(), zipfile.ZipFile(self.apath))
+        return self._zip[1]
+
+    def stat_member(self, rel):
+        if rel in self.files:
+            _, size, mtime = self.files[rel]
+            return MemberStat(size, mtime, int(mtime * 1e9))
+        if rel in self.dirs:
+            return MemberStat(0, self.stat.st_mtime, self.stat.st_mtime_ns)
+        raise FileNotFoundError(os.path.join(self.apath, rel))
+
+    def open_member(self, rel):
+        if rel not in self.files:
+            raise FileNotFoundError(os.path.join(self.apath, rel))
+        if self.is_zip:
+            return self._zipfile().open(self.files[rel][0])
+        offset, size, _ = self.files[rel]
+        return io.BufferedReader(_MemberReader(self.tar, offset, size))
+
+
+def is_archive(path):
+    return path.endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def _resolve(path):
+    """Split path into archive and member path
+
+    Returns:
+        tuple: (_Archive, member) or (None, path) if path is not inside an archive
+    """
+    if not any(s in path for s in ARCHIVE_SUFFIXES):
+        return None, path
+    path = os.path.abspath(path)
+    parts = path.split(os.sep)
+    for i in range(2, len(parts) + 1):
+        apath = os.sep.join(parts[:i])
+        if apath in _archives or (apath.endswith(ARCHIVE_SUFFIXES) and is_archive(apath)):
+            if apath not in _archives:
+                _archives[apath] = _Archive(apath)
+            return _archives[apath], "/".join(parts[i:])
+    return None, path
+
+
+def isdir(path):
+    archive, rel = _resolve(path)
+    if archive is None:
+        return os.path.isdir(path)
+    return rel in archive.dirs
+
+
+def isfile(path):
+    archive, rel = _resolve(path)
+    if archive is None:
+        return os.path.isfile(path)
+    return rel in archive.files
+
+
+def exists(path):
+    return isdir(path) or isfile(path)
+
+
+def listdir(path):
+    archive, rel = _resolve(path)
+    if archive is None:
+        return os.listdir(path)
+    if rel not in archive.dirs:
+        raise FileNotFoundError(path)
+    return list(archive.dirs[rel])
+
+
+def stat(path):
+    archive, rel = _resolve(path)
+    if archive is None:
+        return os.stat(path)
+    return archive.stat_member(rel)
+
+
+def getmtime(path):
+    return stat(path).st_mtime
+
+
+def getsize(path):
+    return stat(path).st_size
+
+
+def open(path, mode="r"):
+    """Open a file for reading
+
+    Args:
+        path (str): Regular or archive path
+        mode (str): "r" (text) or "rb" (binary)
+
+    Returns:
+        file object: seekable file object
+    """
+    archive, rel = _resolve(path)
+    if archive is None:
+        return builtins.open(path, mode)
+    if mode not in ("r", "rb"):
+        raise ValueError("Archive members can only be opened for reading")
+    b_f = archive.open_member(rel)
+    if mode == "rb":
+        return b_f
+    return io.TextIOWrapper(b_f)
+
+
+def copy_range(path, start, end, out):
+    """Copy bytes [start, end) of a file to out
+
+    os.sendfile is used if both the file and out are regular file
+    descriptors, otherwise (e.g, archive members) the bytes are copied
+    in chunks. Either way, the file is never read into memory as a whole.
+
+    Args:
+        path (str): Regular or archive path
+        start (int): Start offset
+        end (int): End offset (exclusive)
+        out (file object): Text output stream with a (binary) buffer e.g, sys.stdout
+    """
+    out.flush()
+    out_b = out.buffer
+    out_b.flush()
+    with open(path, "rb") as f:
+        offset = start
+        try:
+            in_fd, out_fd = f.fileno(), out_b.fileno()
+            while offset < end:
+                sent = os.sendfile(out_fd, in_fd, offset, end - offset)
+                if not sent:
+                    break
+                offset += sent
+        except (AttributeError, OSError, io.UnsupportedOperation) as e:
+            lg.debug("Not using sendfile for {}: {}".format(path, e))
+
+        f.seek(offset)
+        remaining = end - offset
+        while remaining > 0:
+            chunk = f.read(min(remaining, COPY_BUFSIZE))
+            if not chunk:
+                break
+            out_b.write(chunk)
+            remaining -= len(chunk)
+    out_b.flush()
@@ -23,7 +23,7 @@ setup(
     install_requires=dependencies,
     entry_points={
         'console_scripts': [
-            'omg = omg.cli:cli',
+            'omg = omg.cli:main',
         ],
     },
     classifiers=[
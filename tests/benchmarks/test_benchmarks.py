@@ -0,0 +1,191 @@
+""" test_benchmarks.py
+
+Benchmarks (pytest-benchmark) of the main code paths, on a synthetic
+must-gather (see tests/synthetic_mg.py). Skipped if pytest-benchmark is
+not installed.
+
+    pytest tests/benchmarks --benchmark-only
+
+Baselines depend on the machine, so the regression check is opt-in.
+Record the baselines on your machine (before making changes) with:
+
+    OMG_BENCH_SAVE=1 pytest tests/benchmarks --benchmark-only
+
+and check for regressions (after making changes) with:
+
+    OMG_BENCH_CHECK=1 pytest tests/benchmarks --benchmark-only
+
+The median time of every benchmark is then compared with its baseline in
+baselines.json (per scale), and fails if it is more than OMG_BENCH_THRESHOLD
+(default 1.5) times slower (and more than 1ms slower, so the fastest ones
+don't fail because of noise).
+
+Environment variables:
+    OMG_BENCH_SCALE: small (default), medium or large
+    OMG_BENCH_THRESHOLD: Allowed slowdown factor
+    OMG_BENCH_SAVE: Save the measured medians as the new baselines
+    OMG_BENCH_CHECK: Fail on regressions from the baselines
+"""
+
+import os
+import sys
+import json
+import types
+import pytest
+from omg.use import use
+from omg.must_gather.scan_mg import scan_mg
+from omg.must_gather.locate_yamls import locate_yamls
+from omg.must_gather.load_resources import load_res
+from omg.get.get_resources import get_all_resources
+from omg.get.output.build_table import build_table
+from omg.get.output.o_raw import o_raw
+from omg.get.complete import complete_get
+from omg.project.complete import complete_projects
+from omg.log.complete import complete_pods
+from omg.log.stream import stream_log
+from omg.utils.selector import parse_selector
+from omg.config.logging import setup_logging
+from tests.synthetic_mg import generate, SCALES
+
+pytest.importorskip("pytest_benchmark")
+
+setup_logging(loglevel="normal")
+
+SCALE = os.getenv("OMG_BENCH_SCALE", "small")
+THRESHOLD = float(os.getenv("OMG_BENCH_THRESHOLD", "1.5"))
+# Slowdowns below this (seconds) are noise, not regressions
+MIN_DELTA = 0.001
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+# Medians measured in this session, saved if OMG_BENCH_SAVE is set
+_measured = {}
+
+
+def _load_baselines():
+    try:
+        with open(BASELINES) as b_f:
+            return json.load(b_f)
+    except (OSError, ValueError):
+        return {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def save_baselines():
+    yield
+    if os.getenv("OMG_BENCH_SAVE") and _measured:
+        baselines = _load_baselines()
+        baselines.setdefault(SCALE, {}).update(_measured)
+        with open(BASELINES, "w") as b_f:
+            json.dump(baselines, b_f, indent=2, sort_keys=True)
+            b_f.write("\n")
+
+
+@pytest.fixture
+def bench(benchmark, request):
+    """benchmark, saved as the baseline or checked against it (if asked to)"""
+    yield benchmark
+    if benchmark.disabled or benchmark.stats is None:
+        return
+    name = request.node.name
+    median = benchmark.stats.stats.median
+    _measured[name] = median
+    if not os.getenv("OMG_BENCH_CHECK") or os.getenv("OMG_BENCH_SAVE"):
+        return
+    baseline = _load_baselines().get(SCALE, {}).get(name)
+    if baseline:
+        assert median <= max(baseline * THRESHOLD, baseline + MIN_DELTA), (
+            "{} regressed: median {:.6f}s, baseline {:.6f}s (threshold {}x)".format(
+                name, median, baseline, THRESHOLD))
+
+
+@pytest.fixture(scope="module")
+def bench_mg(tmp_path_factory):
+    dest = str(tmp_path_factory.mktemp("bench") / "mg")
+    return generate(dest, truncated=1, **SCALES[SCALE])
+
+
+@pytest.fixture
+def bench_use(bench_mg, omgconfig, monkeypatch):
+    """bench_mg selected with omg use, current project ns-001"""
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    use.cmd(mg_paths=(bench_mg,), cfile=omgconfig)
+    from omg.config import config
+    config.save(project="ns-001", cfile=omgconfig)
+    return bench_mg
+
+
+@pytest.fixture
+def devnull(monkeypatch):
+    with open(os.devnull, "w") as null:
+        monkeypatch.setattr(sys, "stdout", null)
+        yield null
+
+
+def test_scan_mg(bench, bench_mg):
+    assert bench(scan_mg, (bench_mg,)) == [bench_mg]
+
+
+def test_locate_yamls(bench, bench_mg):
+    rdef, yamls = bench(locate_yamls, bench_mg, "pods", "_all")
+    assert len(yamls) == SCALES[SCALE]["namespaces"]
+
+
+def test_load_res_parse(bench, bench_mg, monkeypatch):
+    monkeypatch.setenv("OMG_NO_CACHE", "1")
+    assert bench(load_res, bench_mg, "pods", ns="_all")
+
+
+def test_load_res_cached(bench, bench_mg):
+    load_res(bench_mg, "pods", ns="_all")
+    assert bench(load_res, bench_mg, "pods", ns="_all")
+
+
+def test_load_res_selector(bench, bench_mg):
+    load_res(bench_mg, "pods", ns="_all")
+    assert bench(load_res, bench_mg, "pods", ns="_all", selector=parse_selector("app=app1"))
+
+
+def test_build_table(bench, bench_mg):
+    res = load_res(bench_mg, "pods", ns="_all")
+    table = bench(build_table, res, "_all", "wide", False, False)
+    assert len(table) == len(res) + 1
+
+
+@pytest.mark.parametrize("output", ["yaml", "json"])
+def test_o_raw(bench, bench_use, devnull, output):
+    resd = get_all_resources({"pods": []}, "_all")
+    bench(o_raw, resd, output)
+
+
+def test_logs_tail(bench, bench_mg, devnull):
+    logfile = os.path.join(
+        bench_mg, "namespaces", "ns-001", "pods", "ns-001-pod-1", "app1", "app1", "logs",
+        "current.log")
+    bench(stream_log, logfile, devnull, tail=100)
+
+
+def test_logs_full(bench, bench_mg, devnull):
+    logfile = os.path.join(
+        bench_mg, "namespaces", "ns-001", "pods", "ns-001-pod-1", "app1", "app1", "logs",
+        "current.log")
+    bench(stream_log, logfile, devnull)
+
+
+def test_complete_get_types(bench, bench_use):
+    ctx = types.SimpleNamespace(params={"objects": ()})
+    assert "pods" in bench(complete_get, ctx, [], "po")
+
+
+def test_complete_get_names(bench, bench_use):
+    ctx = types.SimpleNamespace(params={"objects": ("pods",)})
+    assert bench(complete_get, ctx, [], "ns-001-pod-1")
+
+
+def test_complete_projects(bench, bench_use):
+    assert sorted(bench(complete_projects, None, [], "ns-")) == [
+        "ns-{:03d}".format(n) for n in range(SCALES[SCALE]["namespaces"])]
+
+
+def test_complete_pods(bench, bench_use):
+    ctx = types.SimpleNamespace(params={})
+    assert bench(complete_pods, ctx, [], "pod-1")
@@ -4,6 +4,7 @@ import pytest
 import tarfile
 from _pytest.logging import caplog as _caplog
 from loguru import logger
+from tests.synthetic_mg import generate
 
 
 _ = _caplog  # to satisfy flake8
@@ -31,3 +32,81 @@ def simple_must_gather(tmpdir):
 @pytest.fixture
 def omgconfig(tmpdir):
     return os.path.join(str(tmpdir), ".omgconfig")
+
+
+@pytest.fixture(autouse=True)
+def omg_cache_dir(tmpdir, monkeypatch):
+    # Keep the cache and generated rdefs (~/.omg.rdefs) out of the real HOME
+    monkeypatch.setenv("HOME", str(tmpdir))
+    cache_d = os.path.join(str(tmpdir), ".cache", "omg")
+    monkeypatch.setenv("OMG_CACHE_DIR", cache_d)
+    return cache_d
+
+
+POD_TMPL = """
+- apiVersion: v1
+  kind: Pod
+  metadata:
+    creationTimestamp: "2021-02-10T10:00:00Z"
+    labels:
+      app: {app}
+    name: {name}
+    namespace: {ns}
+  spec:
+    containers:
+    - name: {app}
+    nodeName: worker-{node}
+  status:
+    phase: {phase}
+"""
+
+
+@pytest.fixture
+def small_must_gather(tmpdir):
+    """A tiny must-gather with pods in two namespaces and one node"""
+    mg = os.path.join(str(tmpdir), "small-mg")
+    for ns in ("ns1", "ns2"):
+        ns_dir = os.path.join(mg, "namespaces", ns)
+        os.makedirs(os.path.join(ns_dir, "core"))
+        with open(os.path.join(ns_dir, ns + ".yaml"), "w") as f:
+            f.write(
+                "apiVersion: v1\nkind: Namespace\nmetadata:\n  name: {}\n".format(ns))
+        with open(os.path.join(ns_dir, "core", "pods.yaml"), "w") as f:
+            f.write("apiVersion: v1\nitems:")
+            for i in range(3):
+                f.write(POD_TMPL.format(
+                    name="{}-pod-{}".format(ns, i), ns=ns, app="app{}".format(i % 2),
+                    node=i, phase="Running" if i else "Pending"))
+            f.write("kind: List\nmetadata:\n  resourceVersion: \"\"\n")
+    nodes_dir = os.path.join(mg, "cluster-scoped-resources", "core", "nodes")
+    os.makedirs(nodes_dir)
+    with open(os.path.join(nodes_dir, "worker-0.yaml"), "w") as f:
+        f.write(
+            "apiVersion: v1\nkind: Node\nmetadata:\n  name: worker-0\n"
+            "  creationTimestamp: \"2021-02-10T10:00:00Z\"\n")
+    return mg
+
+
+@pytest.fixture
+def mg_with_logs(small_must_gather):
+    """small_must_gather with container logs of all pods"""
+    for ns in ("ns1", "ns2"):
+        for i in range(3):
+            pod, con = "{}-pod-{}".format(ns, i), "app{}".format(i % 2)
+            logs = os.path.join(
+                small_must_gather, "namespaces", ns, "pods", pod, con, con, "logs")
+            os.makedirs(logs)
+            with open(os.path.join(logs, "current.log"), "w") as l_f:
+                for n in range(100):
+                    l_f.write("2021-02-10T10:00:{:02d}Z {} line {}\n".format(n % 60, pod, n))
+                l_f.write("2021-02-10T10:01:40Z connection refused by {}\n".format(pod))
+            if i == 2:
+                with open(os.path.join(logs, "previous.log"), "w") as l_f:
+                    l_f.write("2021-02-10T09:00:00Z panic: connection refused\n")
+    return small_must_gather
+
+
+@pytest.fixture
+def synthetic_must_gather(tmpdir):
+    """A small synthetic must-gather (see synthetic_mg.py)"""
+    return generate(os.path.join(str(tmpdir), "synthetic-mg"), truncated=1)
@@ -0,0 +1,248 @@
+""" synthetic_mg.py
+
+Deterministic generator of synthetic must-gathers, for tests and benchmarks.
+
+The same arguments (and seed) always generate the same files, with the
+same contents and mtimes. Besides the common resources (namespaces, pods,
+events, configmaps, nodes, infrastructures), the generated must-gather has
+CRDs (and custom resources of them in every namespace), container logs
+and optionally truncated (broken) pods.yaml files.
+
+From the command line:
+
+    python -m tests.synthetic_mg /tmp/mg --scale large
+    python -m tests.synthetic_mg /tmp/mg --namespaces 200 --pods 50 --log-lines 10000
+"""
+
+import os
+import random
+import argparse
+from datetime import datetime, timedelta
+import yaml
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+# Time the synthetic must-gather was collected (mtime of all the files)
+COLLECTED = datetime(2021, 2, 10, 12, 0, 0)
+
+# Preset scales, see generate()
+SCALES = {
+    "small": dict(namespaces=3, pods=10, events=20, crds=2, log_lines=100),
+    "medium": dict(namespaces=20, pods=50, events=200, crds=10, log_lines=2000),
+    "large": dict(namespaces=100, pods=100, events=1000, crds=50, log_lines=20000),
+}
+
+_PHASES = ["Running"] * 8 + ["Pending", "Failed", "Succeeded"]
+_REASONS = ["Scheduled", "Pulled", "Created", "Started", "BackOff", "Unhealthy", "Killing"]
+
+
+def _ts(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _dump(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as y_f:
+        yaml.dump(data, y_f, Dumper=SafeDumper, default_flow_style=False)
+
+
+def _list(items):
+    return {"apiVersion": "v1", "kind": "List", "items": items,
+            "metadata": {"resourceVersion": ""}}
+
+
+def _pod(rnd, ns, i, nodes):
+    name = "{}-pod-{}".format(ns, i)
+    created = COLLECTED - timedelta(seconds=rnd.randint(60, 90 * 86400))
+    containers = ["app{}".format(c) for c in range(1 + i % 2)]
+    phase = rnd.choice(_PHASES)
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": name,
+            "namespace": ns,
+            "creationTimestamp": _ts(created),
+            "labels": {"app": "app{}".format(i % 5), "tier": rnd.choice(["web", "db", "cache"])},
+            "uid": "{:032x}".format(rnd.getrandbits(128)),
+        },
+        "spec": {
+            "containers": [
+                {"name": c, "image": "quay.io/synthetic/{}:latest".format(c)} for c in containers
+            ],
+            "nodeName": "worker-{}".format(rnd.randrange(nodes)),
+        },
+        "status": {
+            "phase": phase,
+            "podIP": "10.128.{}.{}".format(rnd.randrange(256), rnd.randrange(1, 255)),
+            "containerStatuses": [
+                {
+                    "name": c,
+                    "ready": phase == "Running",
+                    "restartCount": rnd.choice([0, 0, 0, 1, 5]),
+                    "state": {"running": {"startedAt": _ts(created)}},
+                }
+                for c in containers
+            ],
+        },
+    }
+
+
+def _event(rnd, ns, i, pods):
+    last = COLLECTED - timedelta(seconds=rnd.randint(0, 3600))
+    return {
+        "apiVersion": "v1",
+        "kind": "Event",
+        "metadata": {
+            "name": "{}-event-{}".format(ns, i),
+            "namespace": ns,
+            "creationTimestamp": _ts(last - timedelta(seconds=60)),
+        },
+        "involvedObject": {"kind": "Pod", "name": "{}-pod-{}".format(ns, rnd.randrange(pods))},
+        "lastTimestamp": _ts(last),
+        "reason": rnd.choice(_REASONS),
+        "type": rnd.choice(["Normal", "Normal", "Warning"]),
+        "message": "synthetic event {} of {}".format(i, ns),
+        "count": rnd.randint(1, 20),
+    }
+
+
+def _crd(i):
+    group = "synthetic{}.example.com".format(i)
+    return {
+        "apiVersion": "apiextensions.k8s.io/v1",
+        "kind": "CustomResourceDefinition",
+        "metadata": {"name": "widgets.{}".format(group)},
+        "spec": {
+            "group": group,
+            "names": {"kind": "Widget", "plural": "widgets", "singular": "widget",
+                      "shortNames": ["wd{}".format(i)]},
+            "scope": "Namespaced",
+            "versions": [{"name": "v1", "served": True, "storage": True}],
+        },
+    }
+
+
+def _write_log(path, rnd, pod, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    start = COLLECTED - timedelta(seconds=lines)
+    with open(path, "w") as l_f:
+        for n in range(lines):
+            ts = start + timedelta(seconds=n, microseconds=rnd.randrange(1000000))
+            l_f.write("{}.{:06d}Z I0210 {} synthetic.go:{}] {} line {}\n".format(
+                ts.strftime("%Y-%m-%dT%H:%M:%S"), ts.microsecond,
+                ts.strftime("%H:%M:%S"), rnd.randrange(1000), pod, n))
+
+
+def _truncate(path):
+    """Cut a yaml file inside a quoted scalar, like an interrupted collection
+
+    A cut at an arbitrary point can leave valid yaml (e.g, a dangling
+    "key:"), an unterminated quoted scalar never parses.
+    """
+    with open(path, "rb") as y_f:
+        data = y_f.read()
+    cut = data.rfind(b": '", 0, len(data) * 2 // 3) + len(b": '2021")
+    with open(path, "wb") as y_f:
+        y_f.write(data[:cut])
+
+
+def generate(dest, namespaces=3, pods=10, events=20, crds=2, log_lines=100, truncated=0,
+             nodes=3, seed=0):
+    """Generate a synthetic must-gather
+
+    Args:
+        dest (str): Directory to generate the must-gather in
+        namespaces (int): Number of namespaces
+        pods (int): Pods per namespace
+        events (int): Events per namespace
+        crds (int): Number of CRDs (each has a custom resource in every namespace)
+        log_lines (int): Lines of the current.log of every container
+        truncated (int): Number of namespaces with a truncated pods.yaml
+        nodes (int): Number of nodes
+        seed (int): Random seed
+
+    Returns:
+        str: dest
+    """
+    rnd = random.Random(seed)
+    csr = os.path.join(dest, "cluster-scoped-resources")
+
+    for n in range(nodes):
+        _dump(os.path.join(csr, "core", "nodes", "worker-{}.yaml".format(n)), {
+            "apiVersion": "v1", "kind": "Node",
+            "metadata": {"name": "worker-{}".format(n), "creationTimestamp": _ts(COLLECTED),
+                         "labels": {"node-role.kubernetes.io/worker": ""}},
+            "status": {"conditions": [{"type": "Ready", "status": "True"}]},
+        })
+    _dump(os.path.join(csr, "config.openshift.io", "infrastructures.yaml"), _list([{
+        "apiVersion": "config.openshift.io/v1", "kind": "Infrastructure",
+        "metadata": {"name": "cluster", "creationTimestamp": _ts(COLLECTED)},
+        "status": {"platform": "None", "infrastructureName": "synthetic"},
+    }]))
+    crd_dir = os.path.join(csr, "apiextensions.k8s.io", "customresourcedefinitions")
+    for i in range(crds):
+        crd = _crd(i)
+        _dump(os.path.join(crd_dir, crd["metadata"]["name"] + ".yaml"), crd)
+
+    for n in range(namespaces):
+        ns = "ns-{:03d}".format(n)
+        ns_dir = os.path.join(dest, "namespaces", ns)
+        _dump(os.path.join(ns_dir, ns + ".yaml"), {
+            "apiVersion": "v1", "kind": "Namespace",
+            "metadata": {"name": ns, "creationTimestamp": _ts(COLLECTED)},
+        })
+        ns_pods = [_pod(rnd, ns, i, nodes) for i in range(pods)]
+        _dump(os.path.join(ns_dir, "core", "pods.yaml"), _list(ns_pods))
+        _dump(os.path.join(ns_dir, "core", "events.yaml"), _list(
+            [_event(rnd, ns, i, max(pods, 1)) for i in range(events)]))
+        _dump(os.path.join(ns_dir, "core", "configmaps.yaml"), _list([{
+            "apiVersion": "v1", "kind": "ConfigMap",
+            "metadata": {"name": "{}-config".format(ns), "namespace": ns,
+                         "creationTimestamp": _ts(COLLECTED)},
+            "data": {"key": "value"},
+        }]))
+        for i in range(crds):
+            _dump(os.path.join(ns_dir, "synthetic{}.example.com".format(i), "widgets.yaml"), _list([{
+                "apiVersion": "synthetic{}.example.com/v1".format(i), "kind": "Widget",
+                "metadata": {"name": "{}-widget".format(ns), "namespace": ns,
+                             "creationTimestamp": _ts(COLLECTED)},
+            }]))
+        for pod in ns_pods:
+            for con in pod["spec"]["containers"]:
+                logs = os.path.join(ns_dir, "pods", pod["metadata"]["name"],
+                                    con["name"], con["name"], "logs")
+                _write_log(os.path.join(logs, "current.log"), rnd, pod["metadata"]["name"],
+                           log_lines)
+                if pod["status"]["containerStatuses"][0]["restartCount"]:
+                    _write_log(os.path.join(logs, "previous.log"), rnd,
+                               pod["metadata"]["name"], log_lines // 10)
+        if n < truncated:
+            _truncate(os.path.join(ns_dir, "core", "pods.yaml"))
+
+    # Same mtime for every file, so ages etc. are deterministic
+    mtime = (COLLECTED - datetime(1970, 1, 1)).total_seconds()
+    for root, dirs, files in os.walk(dest):
+        for f in files + dirs:
+            os.utime(os.path.join(root, f), (mtime, mtime))
+    return dest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic must-gather")
+    parser.add_argument("dest")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for arg in ("namespaces", "pods", "events", "crds", "log-lines", "truncated", "nodes",
+                "seed"):
+        parser.add_argument("--" + arg, type=int)
+    args = vars(parser.parse_args())
+    kwargs = dict(SCALES[args.pop("scale")])
+    kwargs.update({k: v for k, v in args.items() if k != "dest" and v is not None})
+    print(generate(args["dest"], **kwargs))
+
+
+if __name__ == "__main__":
+    main()
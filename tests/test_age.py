@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+from omg.utils.age import age, ages
+
+# 2020-06-05T00:00:00Z
+MG_TS = 1591315200.0
+
+
+def test_age():
+    assert age("2020-06-04T23:59:15Z", MG_TS) == "45s"
+    assert age("2020-06-04T23:55:15Z", MG_TS) == "4m45s"
+    assert age("2020-06-04T23:15:00Z", MG_TS) == "45m"
+    assert age("2020-06-04T21:15:00Z", MG_TS) == "2h45m"
+    assert age("2020-06-04T10:00:00.123456789Z", MG_TS) == "13h"
+    assert age("2020-04-01T00:00:00Z", MG_TS) == "64d"
+    # timezone offsets are ignored (same as dateutil's ignoretz)
+    assert age("2020-06-04T23:00:00+05:00", MG_TS) == "1h0m"
+    assert age(datetime(2020, 6, 4, 23, 0, tzinfo=timezone.utc), MG_TS) == "1h0m"
+    # non RFC3339 timestamps fall back to dateutil
+    assert age("June 4 2020 23:00", MG_TS) == "1h0m"
+    assert age("2020-06-05T00:00:00Z", "2020-06-05T00:00:30Z", ts2_type="iso") == "30s"
+    assert age(None, MG_TS) == "Unknown"
+    assert age("garbage", MG_TS) == "Unknown"
+
+
+def test_ages():
+    ts1s = ["2020-06-04T23:59:15Z", "2020-06-04T21:15:00Z", "2020-06-04T23:59:15Z", None]
+    ts2s = [MG_TS] * len(ts1s)
+    assert ages(ts1s, ts2s) == [age(t1, t2) for t1, t2 in zip(ts1s, ts2s)]
@@ -0,0 +1,70 @@
+import pytest
+from loguru import logger
+from omg.api import MustGather
+from omg.config import logging
+from omg.must_gather import load_resources
+
+
+def test_resources(small_must_gather, monkeypatch):
+    loads = []
+    load_res = load_resources.load_res
+    monkeypatch.setattr("omg.api.load_res", lambda *a, **kw: loads.append(a) or load_res(*a, **kw))
+
+    mg = MustGather(small_must_gather)
+    pods = mg.resources("pods", namespace="ns1")
+    # Nothing is loaded until the iterator is used
+    assert loads == []
+    assert [p["metadata"]["name"] for p in pods] == ["ns1-pod-0", "ns1-pod-1", "ns1-pod-2"]
+    assert len(list(mg.resources("pods", namespace="ns1"))) == 3
+    assert len(loads) == 1
+
+    assert len(list(mg.resources("pods"))) == 6
+    assert [p["metadata"]["name"] for p in mg.resources(
+        "pods", selector="app=app1", field_selector="metadata.namespace=ns2")] == ["ns2-pod-1"]
+    assert [n["metadata"]["name"] for n in mg.resources("nodes")] == ["worker-0"]
+
+    mg.release("pods")
+    assert len(list(mg.resources("pods", namespace="ns1"))) == 3
+    assert len(loads) == 5
+    with mg:
+        pass
+    assert len(mg._cache) == 0
+
+
+def test_logs(mg_with_logs):
+    mg = MustGather(mg_with_logs)
+    lines = list(mg.logs("ns1-pod-1"))
+    assert len(lines) == 101
+    assert lines[0] == "2021-02-10T10:00:00Z ns1-pod-1 line 0"
+    assert list(mg.logs("ns2-pod-2", "app0", namespace="ns2", tail=2)) == [
+        "2021-02-10T10:00:39Z ns2-pod-2 line 99",
+        "2021-02-10T10:01:40Z connection refused by ns2-pod-2"]
+    assert list(mg.logs("ns1-pod-2", previous=True)) == [
+        "2021-02-10T09:00:00Z panic: connection refused"]
+    with pytest.raises(FileNotFoundError):
+        list(mg.logs("ns1-pod-9"))
+    with pytest.raises(FileNotFoundError):
+        list(mg.logs("ns1-pod-0", "nosuch"))
+
+
+def test_resources_are_copies(small_must_gather):
+    mg = MustGather(small_must_gather)
+    pod = next(mg.resources("pods", namespace="ns1"))
+    pod["metadata"]["name"] = "changed"
+    pod["status"].clear()
+    pod = next(mg.resources("pods", namespace="ns1"))
+    assert pod["metadata"]["name"] == "ns1-pod-0"
+    assert pod["status"]["phase"] == "Pending"
+
+
+def test_logging_left_alone(small_must_gather, monkeypatch):
+    monkeypatch.setattr(logging, "current_loglevel", None)
+    messages = []
+    sink = logger.add(messages.append)
+    try:
+        MustGather(small_must_gather)
+        logger.info("app message")
+        assert len(messages) == 1
+    finally:
+        logger.remove(sink)
+        logger.enable("omg")
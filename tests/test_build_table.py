@@ -0,0 +1,35 @@
+from omg.get.output.build_table import build_table
+from omg.get.output.table_modules import Pod
+
+
+def _pod(name, ns="ns1"):
+    return {
+        "rdef": {"kind": "Pod", "scope": "Namespaced", "singular": "pod", "group": "core"},
+        "res": {
+            "metadata": {"name": name, "namespace": ns, "creationTimestamp": "2020-06-04T23:00:00Z"},
+            "spec": {"containers": [{}]},
+            "status": {"phase": "Running"}
+        },
+        "yfile_ts": 1591315200.0
+    }
+
+
+def test_build_table():
+    res = [_pod("pod-0"), _pod("pod-1", "ns2")]
+    assert build_table(res, "_all", None, False, False) == [
+        ["NAMESPACE", "NAME", "READY", "STATUS", "RESTARTS", "AGE"],
+        ["ns1", "pod-0", "0/1", "Running", 0, "1h0m"],
+        ["ns2", "pod-1", "0/1", "Running", 0, "1h0m"],
+    ]
+    table = build_table(res, "ns1", "wide", True, True)
+    assert table[0] == ["NAME", "READY", "STATUS", "RESTARTS", "AGE", "IP", "NODE", "LABELS"]
+    assert table[1][0] == "pod/pod-0"
+    # show_type of a previous table does not leak into the next one
+    assert build_table(res, "ns1", None, False, False)[1][0] == "pod-0"
+    assert Pod.DEFAULT_COLUMNS["NAME"] is None
+
+
+def test_build_table_default_columns():
+    res = [_pod("pod-0")]
+    res[0]["rdef"]["kind"] = "NoTableModule"
+    assert build_table(res, "ns1", None, False, False) == [["NAME", "AGE"], ["pod-0", "1h0m"]]
@@ -0,0 +1,59 @@
+import os
+import sys
+import subprocess
+from click.testing import CliRunner
+from omg.cli import cli
+
+# Modules that must only be imported when a subcommand that needs them is invoked
+HEAVY_MODULES = [
+    "yaml",
+    "loguru",
+    "tabulate",
+    "dateutil",
+    "cryptography",
+    "omg.must_gather.RDEFS",
+    "omg.get.get",
+    "omg.machine_config.compare",
+]
+
+# Generous budget (cumulative import time of omg.cli), can be tuned on slow CI machines
+BUDGET_US = int(os.getenv("OMG_STARTUP_BUDGET_MS", "200")) * 1000
+
+
+def _importtime(stmt):
+    """Run stmt in a fresh interpreter and parse the -X importtime report
+
+    Returns:
+        dict: {module: cumulative import time (us)}
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", stmt],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_is_lazy():
+    times = _importtime("import omg.cli")
+    assert "omg.cli" in times
+    imported = [m for m in HEAVY_MODULES if m in times]
+    assert imported == []
+
+
+def test_cli_import_time():
+    # Best of 3 runs, to smooth out noise
+    best = min(_importtime("import omg.cli")["omg.cli"] for _ in range(3))
+    assert best < BUDGET_US, "omg.cli took {:.1f}ms to import (budget {:.1f}ms)".format(
+        best / 1000, BUDGET_US / 1000)
+
+
+def test_version_cmd():
+    result = CliRunner().invoke(cli, ["version"])
+    assert result.exit_code == 0
+    assert "omg version" in result.output
@@ -37,3 +37,32 @@ def test_config_save_get(tmpdir):
 
     assert cfg["paths"] == ["/test/path"]
     assert cfg["project"] == "testproject"
+
+
+def test_config_get_cached(tmpdir, monkeypatch):
+    omg_config = tmpdir.join(".omgconfig")
+    config.save(paths=["/test/path"], project="p1", cfile=omg_config)
+    cfg = config.get(cfile=omg_config)
+
+    # Served from memory, no re-loading of the file
+    def _no_load(cfile):
+        raise AssertionError("config file loaded again")
+    monkeypatch.setattr(config, "_load_config", _no_load)
+    cfg["paths"].append("/modified/by/caller")
+    assert config.get(cfile=omg_config) == {"paths": ["/test/path"], "project": "p1"}
+
+    # save() invalidates
+    monkeypatch.undo()
+    config.save(project="p2", cfile=omg_config)
+    assert config.get(cfile=omg_config)["project"] == "p2"
+
+
+def test_config_cwd_scan_cached(tmpdir, small_must_gather, monkeypatch):
+    omg_config = tmpdir.join(".omgconfig")
+    config.save(paths=["."], cfile=omg_config)
+    monkeypatch.chdir(small_must_gather)
+    assert config.get(cfile=omg_config)["paths"] == [small_must_gather]
+
+    config.invalidate()
+    monkeypatch.setattr(config, "scan_mg", None)
+    assert config.get(cfile=omg_config)["paths"] == [small_must_gather]
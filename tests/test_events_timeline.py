@@ -0,0 +1,67 @@
+import os
+from omg.events import timeline as events_timeline
+from omg.events.timeline import timeline, event_time
+from omg.must_gather import item_index
+
+EVENT_TMPL = """
+- apiVersion: v1
+  kind: Event
+  metadata:
+    creationTimestamp: "2021-02-10T09:00:00Z"
+    name: {name}
+    namespace: {ns}
+  lastTimestamp: "{ts}"
+  reason: Test
+"""
+
+EVENTS = {
+    "ns1": [("e1", "2021-02-10T10:00:01Z"), ("e3", "2021-02-10T10:00:03Z")],
+    "ns2": [("e2", "2021-02-10T10:00:02Z"), ("e4", "2021-02-10T10:00:04Z")],
+}
+
+
+def _write_events(mg):
+    for ns, events in EVENTS.items():
+        # events.yaml of each namespace is not sorted by time
+        with open(os.path.join(mg, "namespaces", ns, "core", "events.yaml"), "w") as f:
+            f.write("apiVersion: v1\nitems:")
+            for name, ts in reversed(events):
+                f.write(EVENT_TMPL.format(name=name, ns=ns, ts=ts))
+            f.write("kind: List\n")
+
+
+def test_timeline(small_must_gather):
+    _write_events(small_must_gather)
+    events = list(timeline(small_must_gather, "_all"))
+    assert [e["res"]["metadata"]["name"] for e in events] == ["e1", "e2", "e3", "e4"]
+
+    events = timeline(small_must_gather, "_all",
+                      since="2021-02-10T10:00:02Z", until="2021-02-10T10:00:03Z")
+    assert [e["res"]["metadata"]["name"] for e in events] == ["e2", "e3"]
+
+    events = timeline(small_must_gather, "ns2")
+    assert [e["res"]["metadata"]["name"] for e in events] == ["e2", "e4"]
+
+
+def test_event_time():
+    assert str(event_time({"eventTime": "2021-02-10T10:00:00.123456Z"})) == (
+        "2021-02-10 10:00:00.123456")
+    assert event_time({"metadata": {}}) < event_time(
+        {"metadata": {"creationTimestamp": "2021-02-10T09:00:00Z"}})
+
+
+def test_timeline_lazy(small_must_gather, monkeypatch):
+    _write_events(small_must_gather)
+    loaded = []
+    load_items = item_index.load_items
+    monkeypatch.setattr(item_index, "load_items",
+                        lambda yfile, entries: loaded.extend(entries) or load_items(yfile, entries))
+    monkeypatch.setattr(events_timeline, "CHUNK", 1)
+
+    events = timeline(small_must_gather, "_all")
+    assert loaded == []
+    # Only the first event of every namespace is loaded to start the merge
+    assert next(events)["res"]["metadata"]["name"] == "e1"
+    assert len(loaded) == 2
+    assert [e["res"]["metadata"]["name"] for e in events] == ["e2", "e3", "e4"]
+    assert len(loaded) == 4
@@ -0,0 +1,93 @@
+import os
+import json
+import yaml
+from tabulate import tabulate
+from omg.config import config
+from omg.use import use
+from omg.get.get_resources import get_all_resources
+from omg.get.output.o_raw import o_raw
+from omg.get.output import build_table
+from omg.get.output.o_table import o_table, _rows
+from omg.config.logging import setup_logging
+
+
+setup_logging(loglevel="normal")
+
+
+def test_get_all_resources_multidir(small_must_gather, omgconfig, monkeypatch):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    use.cmd(mg_paths=(small_must_gather, small_must_gather), cfile=omgconfig)
+    paths = config.get()["paths"]
+
+    resd = get_all_resources({"pod": [], "node": [], "ns": []}, "_all")
+
+    assert list(resd.keys()) == list(range(1, len(paths) + 1))
+    for i in resd:
+        assert list(resd[i].keys()) == ["pod", "node", "ns"]
+        assert len(resd[i]["pod"]) == 6
+        assert len(resd[i]["node"]) == 1
+        assert len(resd[i]["ns"]) == 2
+
+
+def test_o_raw_streaming(small_must_gather, omgconfig, monkeypatch, capsys):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    # No item index, so the yaml is never passed through as is
+    monkeypatch.setenv("OMG_NO_CACHE", "1")
+    use.cmd(mg_paths=(small_must_gather,), cfile=omgconfig)
+    resd = get_all_resources({"pod": []}, "_all")
+    items = [r["res"] for r in resd[1]["pod"]]
+    as_list = {"apiVersion": "v1", "kind": "List", "items": items}
+
+    # Same output as dumping the whole List at once
+    o_raw(resd, "yaml")
+    assert capsys.readouterr().out == yaml.dump(as_list) + "\n"
+    o_raw(resd, "json")
+    assert capsys.readouterr().out == json.dumps(as_list) + "\n"
+
+    o_raw(resd, "ndjson")
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(ln) for ln in lines] == items
+
+
+def test_o_raw_passthrough(small_must_gather, omgconfig, monkeypatch, capsys):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    use.cmd(mg_paths=(small_must_gather,), cfile=omgconfig)
+    pods_yaml = os.path.join(small_must_gather, "namespaces", "ns1", "core", "pods.yaml")
+
+    # All pods of a single yaml file: the file is passed through as is
+    resd = get_all_resources({"pod": []}, "ns1")
+    assert all(r["yfile"] == pods_yaml for r in resd[1]["pod"])
+    o_raw(resd, "yaml")
+    with open(pods_yaml) as p_f:
+        assert capsys.readouterr().out == p_f.read() + "\n"
+
+    # All pods of multiple yaml files: items of each file are passed through
+    resd = get_all_resources({"pod": []}, "_all")
+    o_raw(resd, "yaml")
+    out = yaml.safe_load(capsys.readouterr().out)
+    assert out["kind"] == "List"
+    assert out["items"] == [r["res"] for r in resd[1]["pod"]]
+
+    # Some of the pods: re-dumped
+    resd = get_all_resources({"pod": ["ns1-pod-0", "ns1-pod-1"]}, "ns1")
+    o_raw(resd, "yaml")
+    assert capsys.readouterr().out == yaml.dump({
+        "apiVersion": "v1", "kind": "List", "items": [r["res"] for r in resd[1]["pod"]]}) + "\n"
+
+
+def test_o_table_plain_streaming(small_must_gather, omgconfig, monkeypatch, capsys):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    monkeypatch.delenv("OMG_TABLE_FMT", raising=False)
+    # Rows are built in several chunks
+    monkeypatch.setattr(build_table, "CHUNK", 2)
+    use.cmd(mg_paths=(small_must_gather, small_must_gather), cfile=omgconfig)
+    resd = get_all_resources({"pod": [], "node": [], "ns": []}, "_all")
+
+    # Streamed with PlainTable, same output as tabulate
+    o_table(resd, "_all", "wide", True)
+    expected = ""
+    for path_resd in resd.values():
+        rows = list(_rows(path_resd, "_all", "wide", True, True))
+        assert len(rows) > len(path_resd["pod"]) + len(path_resd["ns"])
+        expected += tabulate(rows, tablefmt="plain") + "\n"
+    assert capsys.readouterr().out == expected
@@ -0,0 +1,47 @@
+import os
+import yaml
+from omg.must_gather import get_rdef as get_rdef_mod
+from omg.must_gather.get_rdef import get_rdef, get_registry, RdefRegistry
+from omg.get.complete import _suggest_type
+from omg.config.logging import setup_logging
+
+
+setup_logging(loglevel="normal")
+
+
+def test_registry_lookups():
+    assert get_rdef("pods")["kind"] == "Pod"
+    assert get_rdef("Pod")["kind"] == "Pod"
+    assert get_rdef("po")["kind"] == "Pod"
+    assert get_rdef("pod.core")["kind"] == "Pod"
+    assert get_rdef("route.route.openshift.io")["kind"] == "Route"
+    assert get_rdef("routes.route")["kind"] == "Route"
+    assert get_rdef("routes.openshift") is None
+    assert get_rdef("nonexistent") is None
+
+
+def test_registry_first_match_wins():
+    reg = RdefRegistry([
+        {"kind": "A", "singular": "x", "plural": "xs", "group": "a.io"},
+        {"kind": "B", "singular": "x", "plural": "xs", "group": "b.io"},
+    ])
+    assert reg.find("x")["kind"] == "A"
+    assert reg.find("xs.b")["kind"] == "B"
+
+
+def test_generated_rdefs(monkeypatch):
+    rdefs_f = os.path.join(os.getenv("HOME"), ".omg.rdefs")
+    with open(rdefs_f, "w") as r_f:
+        yaml.dump([{
+            "kind": "Widget", "singular": "widget", "plural": "widgets",
+            "group": "example.com", "scope": "Namespaced", "shortNames": ["wd"]
+        }], r_f)
+
+    assert get_rdef("wd")["kind"] == "Widget"
+    assert "widgets.example.com" in _suggest_type("widg")
+    assert get_registry() is get_registry()
+
+    # Served from the precompiled copy
+    monkeypatch.setattr(get_rdef_mod, "_registry", None)
+    monkeypatch.setattr(get_rdef_mod, "load_yaml", None)
+    assert get_rdef("widgets.example")["kind"] == "Widget"
@@ -0,0 +1,188 @@
+import os
+from omg.utils import cache
+from omg.must_gather import mg_index
+from omg.must_gather.mg_index import save_index, get_index
+from omg.must_gather import load_resources, item_index
+from omg.must_gather.load_resources import load_res, load_res_names
+from omg.must_gather.locate_yamls import locate_yamls, locate_project
+from omg.utils.selector import parse_selector, parse_field_selector
+from omg.config.logging import setup_logging
+
+
+setup_logging(loglevel="normal")
+
+
+def test_load_res_ns(small_must_gather):
+    res = load_res(small_must_gather, "pods", ns="ns1")
+    assert [r["res"]["metadata"]["name"] for r in res] == [
+        "ns1-pod-0", "ns1-pod-1", "ns1-pod-2"]
+
+
+def test_load_res_all_ns_with_names(small_must_gather):
+    res = load_res(small_must_gather, "pod", r_name=["ns2-pod-1"], ns="_all")
+    assert len(res) == 1
+    assert res[0]["res"]["metadata"]["namespace"] == "ns2"
+
+
+def test_parse_cache(small_must_gather, omg_cache_dir):
+    yfile = os.path.join(small_must_gather, "namespaces", "ns1", "core", "pods.yaml")
+    load_res(small_must_gather, "pods", ns="ns1")
+
+    key = os.path.abspath(yfile)
+    stamp = (load_resources.YAML_CACHE_VERSION,) + cache.file_stamp(yfile)
+    cached = cache.load("yaml", key, stamp)
+    assert cached is not cache.MISS
+    ydata, skipped = cached
+    assert len(ydata["items"]) == 3
+    assert skipped is None
+
+    # Modifying the file must invalidate the cache entry
+    with open(yfile, "a") as y_f:
+        y_f.write("\n")
+    stamp = (load_resources.YAML_CACHE_VERSION,) + cache.file_stamp(yfile)
+    assert cache.load("yaml", key, stamp) is cache.MISS
+    assert len(load_res(small_must_gather, "pods", ns="ns1")) == 3
+
+
+def test_locate_yamls_from_index(small_must_gather):
+    fs_results = [
+        locate_yamls(small_must_gather, "pods", ns="_all"),
+        locate_yamls(small_must_gather, "pods", ns="ns2"),
+        locate_yamls(small_must_gather, "nodes"),
+        locate_yamls(small_must_gather, "projects"),
+    ]
+    save_index(small_must_gather)
+    assert get_index(small_must_gather) is not None
+    assert fs_results == [
+        locate_yamls(small_must_gather, "pods", ns="_all"),
+        locate_yamls(small_must_gather, "pods", ns="ns2"),
+        locate_yamls(small_must_gather, "nodes"),
+        locate_yamls(small_must_gather, "projects"),
+    ]
+
+
+def test_stale_index(small_must_gather):
+    save_index(small_must_gather)
+    os.makedirs(os.path.join(small_must_gather, "namespaces", "ns3"))
+    mg_index._indexes.clear()
+    assert get_index(small_must_gather) is None
+    assert "ns3" in locate_project(small_must_gather, "names")
+
+
+def test_stale_index_new_file(small_must_gather, monkeypatch):
+    # Long running process (omg serve/shell), dirs checked on every lookup
+    monkeypatch.setattr(mg_index, "_check_interval", 0)
+    save_index(small_must_gather)
+    assert locate_yamls(small_must_gather, "services", ns="ns1")[1] == []
+
+    # New yaml in an existing namespace (index in memory and in cache)
+    yfile = os.path.join(small_must_gather, "namespaces", "ns1", "core", "services.yaml")
+    with open(yfile, "w") as y_f:
+        y_f.write("apiVersion: v1\nitems: []\nkind: List\n")
+    assert locate_yamls(small_must_gather, "services", ns="ns1")[1] == [yfile]
+    mg_index._indexes.clear()
+    assert locate_yamls(small_must_gather, "services", ns="_all")[1] == [yfile]
+    assert get_index(small_must_gather) is not None
+
+
+def test_index_trusted(small_must_gather, monkeypatch):
+    save_index(small_must_gather)
+    mg_index._indexes.clear()
+    assert get_index(small_must_gather) is not None
+
+    # The root dirs are checked once per process, the index is trusted below them
+    stats = []
+    stat = mg_index.stat
+    monkeypatch.setattr(mg_index, "stat", lambda d: stats.append(d) or stat(d))
+    assert locate_yamls(small_must_gather, "pods", ns="_all")[1]
+    assert locate_project(small_must_gather, "yamls")
+    assert get_index(small_must_gather) is not None
+    assert stats == []
+
+
+def test_load_res_parallel(small_must_gather, monkeypatch):
+    serial = load_res(small_must_gather, "pods", ns="_all")
+    monkeypatch.setenv("OMG_JOBS", "2")
+    monkeypatch.setenv("OMG_NO_CACHE", "1")
+    parallel = load_res(small_must_gather, "pods", ns="_all")
+    assert [r["res"] for r in parallel] == [r["res"] for r in serial]
+
+
+def test_item_index_name_lookup(small_must_gather, monkeypatch):
+    yfile = os.path.join(small_must_gather, "namespaces", "ns1", "core", "pods.yaml")
+    full = load_res(small_must_gather, "pods", ns="ns1")
+
+    index = item_index.get_index(yfile)
+    assert [e["name"] for e in index] == ["ns1-pod-0", "ns1-pod-1", "ns1-pod-2"]
+    assert load_res_names(small_must_gather, "pods", ns="ns1") == [
+        e["name"] for e in index]
+
+    # With an index, the full yaml must not be loaded for name lookups
+    def _no_full_load(*args, **kwargs):
+        raise AssertionError("full yaml load")
+    monkeypatch.setattr(load_resources, "_load_ydata", _no_full_load)
+    res = load_res(small_must_gather, "pods", r_name=["ns1-pod-2", "ns1-pod-0"], ns="ns1")
+    assert [r["res"] for r in res] == [full[0]["res"], full[2]["res"]]
+
+
+def test_label_selector(small_must_gather, monkeypatch):
+    selector = parse_selector("app=app0")
+    # Without the label index (first load), the resources are filtered after loading
+    res = load_res(small_must_gather, "pods", ns="_all", selector=selector)
+    names = ["ns1-pod-0", "ns1-pod-2", "ns2-pod-0", "ns2-pod-2"]
+    assert sorted(r["res"]["metadata"]["name"] for r in res) == names
+
+    # With the label index, only the matching items are loaded
+    def _no_full_load(*args, **kwargs):
+        raise AssertionError("full yaml load")
+    monkeypatch.setattr(load_resources, "_load_ydata", _no_full_load)
+    res = load_res(small_must_gather, "pods", ns="_all", selector=selector)
+    assert sorted(r["res"]["metadata"]["name"] for r in res) == names
+
+    res = load_res(small_must_gather, "pods", r_name=["ns1-pod-1", "ns1-pod-2"], ns="ns1",
+                   selector=parse_selector("app notin (app0),!tier"))
+    assert [r["res"]["metadata"]["name"] for r in res] == ["ns1-pod-1"]
+    assert load_res(small_must_gather, "pods", ns="ns1", selector=parse_selector("tier")) == []
+
+
+def test_label_selector_large_selection(small_must_gather, monkeypatch):
+    selector = parse_selector("app=app0")
+    names = ["ns1-pod-0", "ns1-pod-2", "ns2-pod-0", "ns2-pod-2"]
+    load_res(small_must_gather, "pods", ns="_all", selector=selector)
+
+    # Most of the items match: filtered from the cached full load, not parsed one by one
+    monkeypatch.setattr(load_resources, "INDEX_SELECT_ITEMS", 0)
+    monkeypatch.setattr(item_index, "load_items", None)
+    monkeypatch.setattr(item_index, "build_index", None)
+    monkeypatch.setattr(load_resources, "load_yaml_skipped", None)
+    res = load_res(small_must_gather, "pods", ns="_all", selector=selector)
+    assert sorted(r["res"]["metadata"]["name"] for r in res) == names
+
+
+def test_field_selector(small_must_gather, monkeypatch):
+    selector = parse_field_selector("status.phase!=Pending,metadata.namespace=ns1")
+    res = load_res(small_must_gather, "pods", ns="_all", field_selector=selector)
+    assert sorted(r["res"]["metadata"]["name"] for r in res) == ["ns1-pod-1", "ns1-pod-2"]
+
+    # With the field index, only the matching items are loaded
+    loaded = []
+    load_items = item_index.load_items
+    monkeypatch.setattr(item_index, "load_items",
+                        lambda yfile, entries: loaded.extend(entries) or load_items(yfile, entries))
+    selector = parse_field_selector("spec.nodeName=worker-2,metadata.name!=ns2-pod-2")
+    res = load_res(small_must_gather, "pods", ns="_all", field_selector=selector)
+    assert [r["res"]["metadata"]["name"] for r in res] == ["ns1-pod-2"]
+    assert sorted(e["name"] for e in loaded) == ["ns1-pod-2", "ns2-pod-2"]
+
+
+def test_field_selector_not_indexed(small_must_gather, monkeypatch):
+    selector = parse_field_selector("status.podIP!=10.0.0.1")
+    full = load_res(small_must_gather, "pods", ns="_all")
+    load_res(small_must_gather, "pods", ns="_all", field_selector=selector)
+
+    # No indexed field narrows the items: filtered from the cached full load
+    monkeypatch.setattr(item_index, "select_fields", None)
+    monkeypatch.setattr(item_index, "load_items", None)
+    monkeypatch.setattr(load_resources, "load_yaml_skipped", None)
+    res = load_res(small_must_gather, "pods", ns="_all", field_selector=selector)
+    assert [r["res"] for r in res] == [r["res"] for r in full]
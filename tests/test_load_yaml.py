@@ -0,0 +1,50 @@
+import os
+from omg.utils import cache
+from omg.utils.load_yaml import load_yaml
+from omg.must_gather.load_resources import load_res_from_yaml
+from omg.config.logging import setup_logging
+
+
+setup_logging(loglevel="normal")
+
+
+def _write_truncated(tmpdir, items):
+    yfile = os.path.join(str(tmpdir), "events.yaml")
+    with open(yfile, "w") as y_f:
+        y_f.write("apiVersion: v1\nitems:\n")
+        for i in range(items):
+            y_f.write("- kind: Event\n  metadata:\n    name: ev-{}\n  message: \"m{}\"\n".format(i, i))
+        # truncated in the middle of the next item
+        y_f.write("- kind: Event\n  metadata:\n    name: \"ev-tr")
+    return yfile
+
+
+def test_load_yaml_truncated(tmpdir, caplog):
+    yfile = _write_truncated(tmpdir, 100)
+    ydata = load_yaml(yfile)
+    assert [i["metadata"]["name"] for i in ydata["items"]] == [
+        "ev-{}".format(i) for i in range(100)]
+    assert "Skipped 2/404 lines from the end of {}".format(yfile) in caplog.text
+
+
+def test_load_yaml_truncated_cached_cut(tmpdir):
+    yfile = _write_truncated(tmpdir, 10)
+    ydata = load_yaml(yfile)
+    cut = cache.load("yaml_cut", os.path.abspath(yfile), cache.file_stamp(yfile))
+    assert cut is not cache.MISS
+    with open(yfile) as y_f:
+        assert y_f.read()[cut:].startswith("- kind: Event\n  metadata:\n    name: \"ev-tr")
+    assert load_yaml(yfile) == ydata
+
+
+def test_load_truncated_cached_warns(tmpdir, caplog):
+    yfile = _write_truncated(tmpdir, 10)
+    warning = "Skipped 2/44 lines from the end of {}".format(yfile)
+    res = load_res_from_yaml(yfile)
+    assert caplog.text.count(warning) == 1
+
+    # Served from the parse cache, the warning is repeated
+    caplog.clear()
+    assert load_res_from_yaml(yfile) == res
+    assert caplog.text.count(warning) == 1
+    assert len(res) == 10
@@ -0,0 +1,35 @@
+import pytest
+from omg.config import config
+from omg.use import use
+from omg.log import grep
+from omg.log.grep import literal_prefilter
+from omg.config.logging import setup_logging
+
+
+setup_logging(loglevel="normal")
+
+
+def test_literal_prefilter():
+    assert literal_prefilter("connection.*refused") == b"connection"
+    assert literal_prefilter(r"\bpanic: (x|y)") == b"panic: "
+    assert literal_prefilter("foo|bar") is None
+    assert literal_prefilter("(?i)refused") is None
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_grep(mg_with_logs, omgconfig, monkeypatch, capsys, jobs):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    monkeypatch.setattr(config, "jobs", jobs)
+    monkeypatch.setattr(config, "all_namespaces", True)
+    use.cmd(mg_paths=(mg_with_logs,), cfile=omgconfig)
+
+    grep.cmd("conn[a-z]+ refused", None, False)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "ns1/ns1-pod-0/app0: 2021-02-10T10:01:40Z connection refused by ns1-pod-0"
+    assert "ns1/ns1-pod-2/app0/previous: 2021-02-10T09:00:00Z panic: connection refused" in lines
+    assert len(lines) == 8
+
+    # Label selector
+    grep.cmd("REFUSED", "app=app1", True)
+    lines = capsys.readouterr().out.splitlines()
+    assert [ln.split(":")[0] for ln in lines] == ["ns1/ns1-pod-1/app1", "ns2/ns2-pod-1/app1"]
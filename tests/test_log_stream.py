@@ -0,0 +1,76 @@
+import io
+import os
+import calendar
+import pytest
+from datetime import datetime, timedelta
+from omg.log import stream
+from omg.log.stream import stream_log, parse_duration
+
+
+class _Out(io.TextIOWrapper):
+    def __init__(self):
+        super().__init__(io.BytesIO(), encoding="utf-8")
+
+    def value(self):
+        self.flush()
+        return self.buffer.getvalue().decode()
+
+
+START = datetime(2021, 2, 10, 10, 0, 0)
+
+
+@pytest.fixture
+def logfile(tmpdir):
+    # 1000 lines, one per second
+    lines = [
+        "{}.{:09d}Z line {}\n".format(
+            (START + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%S"), i, i)
+        for i in range(1000)
+    ]
+    lf = os.path.join(str(tmpdir), "current.log")
+    with open(lf, "w") as l_f:
+        l_f.write("".join(lines))
+    mtime = calendar.timegm((START + timedelta(seconds=1000)).timetuple())
+    os.utime(lf, (mtime, mtime))
+    return lf, lines
+
+
+def _stream(lf, **kwargs):
+    out = _Out()
+    stream_log(lf, out, **kwargs)
+    return out.value()
+
+
+@pytest.mark.parametrize("block_size", [7, 64 * 1024])
+def test_tail(logfile, monkeypatch, block_size):
+    monkeypatch.setattr(stream, "BLOCK_SIZE", block_size)
+    lf, lines = logfile
+    assert _stream(lf, tail=10) == "".join(lines[-10:])
+    assert _stream(lf, tail=1) == lines[-1]
+    assert _stream(lf, tail=0) == ""
+    assert _stream(lf, tail=5000) == "".join(lines)
+
+
+def test_since(logfile):
+    lf, lines = logfile
+    assert _stream(lf, since=START + timedelta(seconds=990)) == "".join(lines[990:])
+    assert _stream(lf, since=START + timedelta(seconds=989, milliseconds=500)) == \
+        "".join(lines[990:])
+    assert _stream(lf, since=START - timedelta(days=1)) == "".join(lines)
+    assert _stream(lf, since=START + timedelta(days=1)) == ""
+    # relative to the time of log collection (mtime)
+    assert _stream(lf, since=parse_duration("15s")) == "".join(lines[985:])
+    assert _stream(lf, since=parse_duration("1m"), tail=3) == "".join(lines[-3:])
+
+
+def test_limit_bytes(logfile):
+    lf, lines = logfile
+    assert _stream(lf, limit_bytes=100) == "".join(lines)[:100]
+    assert _stream(lf, tail=2, limit_bytes=10) == lines[-2][:10]
+
+
+def test_parse_duration():
+    assert parse_duration("1h30m") == timedelta(minutes=90)
+    assert parse_duration("500ms") == timedelta(milliseconds=500)
+    with pytest.raises(ValueError):
+        parse_duration("5 minutes")
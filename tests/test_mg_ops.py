@@ -1,7 +1,10 @@
 import pytest
 import os
-from omg.lib.mg_ops.locate_yamls import locate_yamls
-from omg.lib.mg_ops.scan_mg import scan_mg, NoValidMgFound
+import yaml
+from omg.must_gather.locate_yamls import locate_yamls
+from omg.must_gather.scan_mg import scan_mg
+from omg.must_gather.exceptions import NoValidMgFound
+from omg.must_gather.load_resources import load_res
 from omg.config.logging import setup_logging
 
 
@@ -15,9 +18,9 @@ def test_scan_mg_invalid(tmpdir):
         )
 
 
-def test_scan_mg_valid(simple_must_gather, omgconfig):
+def test_scan_mg_valid(synthetic_must_gather, omgconfig):
     paths = scan_mg(
-        (str(simple_must_gather),)
+        (str(synthetic_must_gather),)
     )
     assert len(paths) == 1
     for path in paths:
@@ -31,15 +34,27 @@ def test_scan_mg_valid(simple_must_gather, omgconfig):
         )
 
 
-def test_locate_yamls(simple_must_gather):
+def test_locate_yamls(synthetic_must_gather):
     paths = scan_mg(
-        (str(simple_must_gather),)
+        (str(synthetic_must_gather),)
     )
-    kind, yamls = locate_yamls(
-        paths=paths,
+    rdef, yamls = locate_yamls(
+        paths[0],
         r_type="infrastructure"
     )
-    assert kind == "Infrastructure"
+    assert rdef["kind"] == "Infrastructure"
     assert yamls == [
         paths[0] + "/cluster-scoped-resources/config.openshift.io/infrastructures.yaml"
     ]
+
+
+def test_load_truncated(synthetic_must_gather, caplog):
+    # pods.yaml of the first namespace is truncated, the complete items are loaded
+    yfile = os.path.join(synthetic_must_gather, "namespaces", "ns-000", "core", "pods.yaml")
+    with open(yfile) as y_f:
+        with pytest.raises(yaml.YAMLError):
+            yaml.safe_load(y_f)
+    pods = load_res(synthetic_must_gather, "pods", ns="ns-000")
+    assert 0 < len(pods) < 10
+    assert "lines from the end of {}".format(yfile) in caplog.text
+    assert len(load_res(synthetic_must_gather, "pods", ns="ns-001")) == 10
@@ -0,0 +1,25 @@
+import io
+import pytest
+from tabulate import tabulate
+from omg.get.output.plain_table import PlainTable
+
+TABLES = [
+    [["NAME", "READY", "AGE"], ["pod-0", "1/1", "5d"], ["pod-with-long-name", None, 0]],
+    # tables of multiple types separated by an empty row
+    [["NAME", "AGE"], [" padded ", "1h"], [""], ["NAME", "TYPE", "DATA"], ["secret", "Opaque", 3]],
+    # multiline cells (e.g, event messages), empty rows are dropped in this case
+    [["NAME", "MESSAGE"], ["ev-0", "Back-off\nrestarting"], [""], ["NAME"], ["x", "trailing\n"]],
+    # wide characters
+    [["NAME", "LABELS"], ["日本語", "app=x"], ["b", "<none>"]],
+    # ANSI codes
+    [["NAME", "STATUS"], ["a", "\x1b[31mFailed\x1b[0m"], ["bbbb", "Running"]],
+]
+
+
+@pytest.mark.parametrize("table", TABLES)
+def test_plain_table_matches_tabulate(table):
+    pt = PlainTable()
+    pt.add_rows(iter(table))
+    out = io.StringIO()
+    pt.write(out)
+    assert out.getvalue() == tabulate(table, tablefmt="plain") + "\n"
@@ -0,0 +1,49 @@
+import os
+import json
+from omg.utils import profile
+from omg.must_gather.load_resources import load_res
+
+
+def test_profile_stages(small_must_gather, monkeypatch):
+    monkeypatch.setenv("OMG_NO_CACHE", "1")
+    profile.start()
+    try:
+        load_res(small_must_gather, "pods", ns="_all")
+    finally:
+        summ = profile.summary(profile.stop())
+
+    assert summ["stages"]["load_res"]["calls"] == 1
+    assert summ["stages"]["locate_yamls"]["calls"] == 1
+    assert summ["stages"]["load_yaml"]["calls"] >= 2
+    parsed = [p["yfile"] for p in summ["slowest_yamls"]]
+    for ns in ("ns1", "ns2"):
+        assert os.path.join(small_must_gather, "namespaces", ns, "core", "pods.yaml") in parsed
+
+    # Not recorded once stopped
+    load_res(small_must_gather, "pods", ns="_all")
+    assert profile.summary()["stages"]["load_res"]["calls"] == 1
+
+
+def test_profile_report(small_must_gather, tmpdir, capsys):
+    trace = os.path.join(str(tmpdir), "trace.json")
+    profile.start("json", trace)
+    load_res(small_must_gather, "pods", ns="ns1")
+    profile.report()
+
+    summ = json.loads(capsys.readouterr().err)
+    assert summ["stages"]["load_res"]["calls"] == 1
+    with open(trace) as t_f:
+        events = json.load(t_f)["traceEvents"]
+    assert "load_res" in [e["name"] for e in events]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+
+def test_profile_top(small_must_gather, monkeypatch):
+    monkeypatch.setenv("OMG_NO_CACHE", "1")
+    profile.start()
+    load_res(small_must_gather, "pods", ns="_all")
+    profile.stop()
+    monkeypatch.setenv("OMG_PROFILE_TOP", "1")
+    assert len(profile.summary()["slowest_yamls"]) == 1
+    monkeypatch.setenv("OMG_PROFILE_TOP", "many")
+    assert len(profile.summary()["slowest_yamls"]) >= 2
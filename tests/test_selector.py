@@ -0,0 +1,47 @@
+import pytest
+from omg.utils.selector import (
+    parse_selector, match_labels, parse_field_selector, compile_field_selector)
+
+
+@pytest.mark.parametrize("selector,labels,match", [
+    ("app=web", {"app": "web"}, True),
+    ("app==web", {"app": "db"}, False),
+    ("app!=web", {}, True),
+    ("app=web,tier!=front", {"app": "web", "tier": "front"}, False),
+    ("env in (prod, staging)", {"env": "staging"}, True),
+    ("env notin (prod,staging),release", {"env": "dev", "release": "1"}, True),
+    ("!canary", {"canary": "true"}, False),
+    ("app.kubernetes.io/name=etcd", {"app.kubernetes.io/name": "etcd"}, True),
+    ("app=", {"app": ""}, True),
+])
+def test_match_labels(selector, labels, match):
+    assert match_labels(parse_selector(selector), labels) is match
+
+
+@pytest.mark.parametrize("selector", ["=web", "app in prod", "a=b,,c=d", "a=b c"])
+def test_invalid_selector(selector):
+    with pytest.raises(ValueError):
+        parse_selector(selector)
+
+
+POD = {"metadata": {"name": "p"}, "spec": {"nodeName": "worker-3", "hostNetwork": True},
+       "status": {"phase": "Running"}}
+
+
+@pytest.mark.parametrize("selector,match", [
+    ("status.phase=Running", True),
+    ("status.phase!=Running", False),
+    ("spec.nodeName==worker-3,metadata.name=p", True),
+    ("spec.hostNetwork=true", True),
+    ("spec.missing.field=", True),
+    ("spec.missing.field!=x", True),
+    ("metadata.name.x=p", False),
+])
+def test_field_selector(selector, match):
+    assert compile_field_selector(parse_field_selector(selector))(POD) is match
+
+
+@pytest.mark.parametrize("selector", ["", "status.phase", "=Running", "a=b,"])
+def test_invalid_field_selector(selector):
+    with pytest.raises(ValueError):
+        parse_field_selector(selector)
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import subprocess
+from omg.serve.client import _subcommand
+from omg.must_gather import load_resources
+from omg.must_gather.load_resources import load_res, enable_res_cache, disable_res_cache
+
+OMG = [sys.executable, "-c", "from omg.cli import main; main()"]
+
+
+def test_subcommand():
+    assert _subcommand(["get", "pods"]) == "get"
+    assert _subcommand(["-n", "ns1", "-A", "logs", "pod-1"]) == "logs"
+    assert _subcommand(["--loglevel", "debug"]) is None
+
+
+def test_res_cache(small_must_gather, monkeypatch):
+    loads = []
+    map_ordered = load_resources.map_ordered
+    monkeypatch.setattr(load_resources, "map_ordered",
+                        lambda fn, items: loads.append(1) or map_ordered(fn, items))
+    enable_res_cache(2)
+    try:
+        res = load_res(small_must_gather, "pods", ns="ns1")
+        assert load_res(small_must_gather, "pods", ns="ns1") == res
+        assert len(loads) == 1
+
+        # Changed yaml files are loaded again
+        yfile = os.path.join(small_must_gather, "namespaces", "ns1", "core", "pods.yaml")
+        with open(yfile, "a") as y_f:
+            y_f.write("\n")
+        load_res(small_must_gather, "pods", ns="ns1")
+        assert len(loads) == 2
+    finally:
+        disable_res_cache()
+
+
+def test_warm_in_client_env(small_must_gather, omgconfig, tmpdir, monkeypatch):
+    from omg.serve import server
+    from omg.use import use
+    use.cmd(mg_paths=(small_must_gather,), cfile=omgconfig)
+    # Not the config of the client
+    monkeypatch.setenv("OMGCONFIG", os.path.join(str(tmpdir), "other"))
+    req = {"argv": ["get", "pods", "-A", "-l", "app=x"], "cwd": str(tmpdir),
+           "env": {"OMGCONFIG": omgconfig}}
+    enable_res_cache(8)
+    try:
+        server._warm(req)
+        assert os.getenv("OMGCONFIG") == os.path.join(str(tmpdir), "other")
+
+        # The resources of the command are in memory (for the forked child)
+        loads = []
+        map_ordered = load_resources.map_ordered
+        monkeypatch.setattr(load_resources, "map_ordered",
+                            lambda fn, items: loads.append(1) or map_ordered(fn, items))
+        from omg.utils.selector import parse_selector
+        load_res(small_must_gather, "pods", [], "_all", selector=parse_selector("app=x"))
+        assert not loads
+    finally:
+        disable_res_cache()
+
+
+def _start_daemon(env):
+    daemon = subprocess.Popen(OMG + ["serve"], env=env, stderr=subprocess.PIPE)
+    for _ in range(100):
+        if os.path.exists(env["OMG_SOCKET"]):
+            break
+        time.sleep(0.05)
+    return daemon
+
+
+def test_serve(small_must_gather, omgconfig, tmpdir):
+    env = dict(os.environ, OMGCONFIG=omgconfig, OMG_SOCKET=os.path.join(str(tmpdir), "omg.sock"))
+    env.pop("OMG_NO_SERVE", None)
+    subprocess.run(OMG + ["use", small_must_gather], env=env, check=True, capture_output=True)
+    direct = subprocess.run(OMG + ["get", "pods", "-A", "-o", "wide"],
+                            env=dict(env, OMG_NO_SERVE="1"), capture_output=True, text=True)
+
+    daemon = _start_daemon(env)
+    try:
+        for _ in range(2):
+            served = subprocess.run(OMG + ["get", "pods", "-A", "-o", "wide"],
+                                    env=env, capture_output=True, text=True)
+            assert served.returncode == 0
+            assert served.stdout == direct.stdout
+
+        failed = subprocess.run(OMG + ["get", "nosuch"], env=env, capture_output=True, text=True)
+        assert failed.returncode == 1
+        assert "nosuch" in failed.stderr
+    finally:
+        subprocess.run(OMG + ["serve", "--stop"], env=env, capture_output=True)
+        daemon.wait(timeout=10)
+    assert not os.path.exists(env["OMG_SOCKET"])
+
+
+def test_serve_slow_client(mg_with_logs, omgconfig, tmpdir):
+    env = dict(os.environ, OMGCONFIG=omgconfig, OMG_SOCKET=os.path.join(str(tmpdir), "omg.sock"))
+    env.pop("OMG_NO_SERVE", None)
+    subprocess.run(OMG + ["use", mg_with_logs], env=env, check=True, capture_output=True)
+    subprocess.run(OMG + ["project", "ns1"], env=env, check=True, capture_output=True)
+    # More than a pipe buffer of logs
+    logfile = os.path.join(mg_with_logs, "namespaces", "ns1", "pods", "ns1-pod-0", "app0",
+                           "app0", "logs", "current.log")
+    with open(logfile, "a") as l_f:
+        for n in range(20000):
+            l_f.write("2021-02-10T10:02:00Z line {}\n".format(n))
+
+    daemon = _start_daemon(env)
+    try:
+        # Output not read (paused consumer)
+        slow = subprocess.Popen(OMG + ["logs", "ns1-pod-0"], env=env, stdout=subprocess.PIPE)
+        time.sleep(1)
+        assert slow.poll() is None
+
+        # Other commands are not held up by it
+        start = time.time()
+        projects = subprocess.run(OMG + ["projects"], env=env, capture_output=True, text=True,
+                                  timeout=10)
+        assert projects.returncode == 0
+        assert "2 projects" in projects.stdout
+        assert time.time() - start < 3
+
+        # The command in the daemon stops when the client goes away
+        slow.kill()
+        slow.wait()
+        slow.stdout.close()
+        served = subprocess.run(OMG + ["get", "pods"], env=env, capture_output=True, text=True,
+                                timeout=10)
+        assert served.returncode == 0
+    finally:
+        subprocess.run(OMG + ["serve", "--stop"], env=env, capture_output=True)
+        daemon.wait(timeout=10)
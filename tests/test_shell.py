@@ -0,0 +1,56 @@
+from omg.use import use
+from omg.shell import shell
+from omg.must_gather import load_resources
+
+
+def _reader(lines):
+    lines = iter(lines)
+
+    def read(prompt):
+        try:
+            return next(lines)
+        except StopIteration:
+            raise EOFError
+    return read
+
+
+def test_shell(small_must_gather, omgconfig, monkeypatch, capsys):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    use.cmd(mg_paths=(small_must_gather,), cfile=omgconfig)
+    loads = []
+    map_ordered = load_resources.map_ordered
+    monkeypatch.setattr(load_resources, "map_ordered",
+                        lambda fn, items: loads.append(1) or map_ordered(fn, items))
+    capsys.readouterr()
+
+    shell.cmd(4, read=_reader(["get pods -A", "omg get pods -A", "", "get pods -n ns1", "exit",
+                               "get nodes"]))
+    out = capsys.readouterr().out.splitlines()
+    # -A is not carried over to the next command
+    assert len([ln for ln in out if ln.startswith("NAMESPACE")]) == 2
+    assert len([ln for ln in out if ln.startswith("NAME ")]) == 1
+    # The second `get pods -A` is served from memory, nodes are never loaded
+    assert len(loads) == 2
+    # The in-memory cache is only used while the shell runs
+    assert load_resources._res_cache is None
+
+
+def test_shell_command_fails(small_must_gather, omgconfig, monkeypatch, capsys):
+    monkeypatch.setenv("OMGCONFIG", omgconfig)
+    use.cmd(mg_paths=(small_must_gather,), cfile=omgconfig)
+
+    load_res = load_resources.load_res
+    failed = []
+
+    def _load_res(*args, **kwargs):
+        if not failed:
+            failed.append(1)
+            raise OSError("unreadable yaml")
+        return load_res(*args, **kwargs)
+    monkeypatch.setattr("omg.get.get_resources.load_res", _load_res)
+    capsys.readouterr()
+
+    shell.cmd(4, read=_reader(["get pods -A", "get pods -A"]))
+    out = capsys.readouterr().out.splitlines()
+    # The shell goes on with the next command
+    assert len([ln for ln in out if ln.startswith("NAMESPACE")]) == 1
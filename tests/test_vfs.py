@@ -0,0 +1,52 @@
+import os
+import tarfile
+import zipfile
+import pytest
+from omg.utils import vfs
+from omg.must_gather.scan_mg import scan_mg
+from omg.must_gather.load_resources import load_res
+from omg.config.logging import setup_logging
+
+
+setup_logging(loglevel="normal")
+
+
+def _make_archive(mg, suffix):
+    archive = os.path.join(os.path.dirname(mg), "mg" + suffix)
+    if suffix == ".zip":
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as z_f:
+            for root, _, files in os.walk(mg):
+                for f in files:
+                    fpath = os.path.join(root, f)
+                    z_f.write(fpath, os.path.relpath(fpath, os.path.dirname(mg)))
+    else:
+        with tarfile.open(archive, "w:gz" if suffix.endswith("gz") else "w") as t_f:
+            t_f.add(mg, arcname=os.path.basename(mg))
+    return archive
+
+
+@pytest.mark.parametrize("suffix", [".tar.gz", ".tgz", ".tar", ".zip"])
+def test_archive_must_gather(small_must_gather, suffix):
+    archive = _make_archive(small_must_gather, suffix)
+
+    paths = scan_mg((archive,))
+    assert paths == [os.path.join(archive, "small-mg")]
+
+    from_dir = load_res(small_must_gather, "pods", ns="_all")
+    from_archive = load_res(paths[0], "pods", ns="_all")
+    # listdir order differs between the filesystem and the archive
+    assert sorted(r["res"]["metadata"]["name"] for r in from_archive) == sorted(
+        r["res"]["metadata"]["name"] for r in from_dir)
+    assert len(load_res(paths[0], "nodes")) == 1
+
+    pods_yaml = os.path.join(paths[0], "namespaces", "ns1", "core", "pods.yaml")
+    assert vfs.isfile(pods_yaml)
+    assert not vfs.isdir(pods_yaml)
+    assert sorted(vfs.listdir(os.path.join(paths[0], "namespaces"))) == ["ns1", "ns2"]
+    with open(os.path.join(small_must_gather, "namespaces", "ns1", "core", "pods.yaml")) as f:
+        content = f.read()
+    with vfs.open(pods_yaml) as v_f:
+        assert v_f.read() == content
+    with vfs.open(pods_yaml, "rb") as v_f:
+        v_f.seek(10)
+        assert v_f.read(20) == content.encode()[10:30]